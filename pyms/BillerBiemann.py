@@ -25,10 +25,18 @@ Functions to perform Biller and Biemann deconvolution.
 
 # stdlib
 import copy
-from typing import List, Sequence, Tuple, Union
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+try:
+	from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover (<py38)
+	shared_memory = None  # type: ignore[assignment]
 
 # 3rd party
 import numpy
+from scipy import ndimage  # type: ignore[import-untyped]
 
 # this package
 from pyms.IntensityMatrix import BaseIntensityMatrix
@@ -36,7 +44,7 @@ from pyms.IonChromatogram import IonChromatogram
 from pyms.Peak.Class import Peak
 from pyms.Peak.List.Function import is_peak_list
 from pyms.Spectrum import MassSpectrum
-from pyms.Utils.Utils import _number_types, is_number, is_sequence_of
+from pyms.Utils.Utils import _attach_shared_memory, _number_types, is_number, is_sequence_of
 
 __all__ = [
 		"BillerBiemann",
@@ -57,17 +65,34 @@ __all__ = [
 #######################
 
 
-def BillerBiemann(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> List[Peak]:
+def BillerBiemann(
+		im: BaseIntensityMatrix,
+		points: int = 3,
+		scans: int = 1,
+		n_jobs: int = 1,
+		executor: Optional[Executor] = None,
+		) -> List[Peak]:
 	"""
 	Deconvolution based on the algorithm of Biller and Biemann (1974).
 
 	:param im:
 	:param points: Number of scans over which to consider a maxima to be a peak.
 	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	:param n_jobs: The number of blocks of ions to find the maxima for in parallel.
+		``-1`` uses one block per CPU. The default, ``1``, finds the maxima serially in this process.
+		The intensities are copied into shared memory on each call, so parallel blocks
+		are only worthwhile for large intensity matrices on machines with several CPUs.
+	:param executor: An optional :class:`concurrent.futures.Executor` to find the maxima with.
+		If :py:obj:`None` and ``n_jobs`` is greater than ``1`` a
+		:class:`~concurrent.futures.ProcessPoolExecutor` is used.
 
 	:return: List of detected peaks
 
 	:authors: Andrew Isaac, Dominic Davis-Foster (type assertions)
+
+	.. versionchanged:: 2.8.0
+
+		Added the ``n_jobs`` and ``executor`` arguments.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -82,16 +107,15 @@ def BillerBiemann(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> L
 	rt_list = im.time_list
 	mass_list = im.mass_list
 	peak_list = []
-	maxima_im = get_maxima_matrix(im, points, scans)
+	maxima_im = get_maxima_matrix(im, points, scans, n_jobs=n_jobs, executor=executor)
 
-	for row_idx, row in enumerate(maxima_im):
-		if sum(row) > 0:
-			rt = rt_list[row_idx]
-			ms = MassSpectrum(mass_list, row)
-			peak = Peak(rt, ms)
-			peak.bounds = (0, row_idx, 0)  # store IM index for convenience
-			# TODO: can the bounds be determined from the intensity matrix?
-			peak_list.append(peak)
+	for row_idx in numpy.flatnonzero(maxima_im.sum(axis=1) > 0).tolist():
+		rt = rt_list[row_idx]
+		ms = MassSpectrum(mass_list, maxima_im[row_idx])
+		peak = Peak(rt, ms)
+		peak.bounds = (0, row_idx, 0)  # store IM index for convenience
+		# TODO: can the bounds be determined from the intensity matrix?
+		peak_list.append(peak)
 
 	return peak_list
 
@@ -117,6 +141,9 @@ def get_maxima_indices(ion_intensities: Union[Sequence, numpy.ndarray], points:
 		>>> get_maxima_indices(data, points=10)
 		[13]
 
+	.. versionchanged:: 2.8.0
+
+		The maxima are found with a sliding window maximum rather than a per-scan loop.
 	"""
 
 	if not is_sequence_of(ion_intensities, _number_types):
@@ -125,39 +152,70 @@ def get_maxima_indices(ion_intensities: Union[Sequence, numpy.ndarray], points:
 	if not isinstance(points, int):
 		raise TypeError("'points' must be an integer")
 
-	# find peak inflection points
-	# use a 'points' point window
-	# for a plateau after a rise, need to check if it is the left edge of a peak
-	peak_point = []
-	edge = -1
-	points = int(points)
+	return numpy.flatnonzero(_get_maxima_mask(numpy.asarray(ion_intensities)[:, None], points)).tolist()
+
+
+def _get_maxima_mask(intensity_array: numpy.ndarray, points: int = 3) -> numpy.ndarray:
+	"""
+	Returns a boolean array marking the apexes of each column of ``intensity_array``.
+
+	The local maxima are found for all columns at once, using a sliding window
+	maximum either side of each scan. The plateau handling is the same as the
+	original per-scan loop: a rise onto a plateau records its left edge, and a
+	fall from the plateau marks the midpoint of the plateau as the apex.
+
+	:param intensity_array: Two-dimensional array of intensities, with scans as rows and ions as columns.
+	:param points: Number of scans over which to consider a maxima to be a peak.
+	"""
+
 	half = int(points / 2)
 	points = 2 * half + 1  # ensure odd number of points
 
-	for index in range(len(ion_intensities) - points + 1):
+	if half < 1:
+		raise ValueError("'points' must be at least 2")
+
+	num_scans = intensity_array.shape[0]
+	mask = numpy.zeros(intensity_array.shape, dtype=bool)
+
+	# Number of scans with a full window either side; the first of these is 'half'
+	num_centres = num_scans - points + 1
+	if num_centres <= 0:
+		return mask
+
+	# window_max[j] is the maximum of the 'half' scans starting at scan j
+	window_max = ndimage.maximum_filter1d(intensity_array, size=half, axis=0)[half // 2:half // 2 + num_scans - half + 1]
+	left = window_max[:num_centres]
+	right = window_max[half + 1:half + 1 + num_centres]
+	mid = intensity_array[half:half + num_centres]
 
-		left = ion_intensities[index:index + half]
-		mid = ion_intensities[index + half]
-		right = ion_intensities[index + half + 1:index + points]
-		# print(left, mid, right)
+	above_left = mid > left
+	above_right = mid > right
 
-		if mid > max(left) and mid > max(right):
-			# the max value is in the middle
-			peak_point.append(index + half)
-			edge = -1  # ignore previous rising edge
+	# the max value is in the middle
+	apex = above_left & above_right
+	mask[half:half + num_centres] = apex
 
-		elif mid > max(left) and mid == max(right):
-			# start of plateau following rise (left of peak?)
-			edge = index + half  # ignore previous rising edge, update latest
+	# A rise onto a plateau records its left edge, which is discarded by any later apex or fall.
+	# When the intensity falls from the plateau the apex is the midpoint of the plateau,
+	# provided the most recent event in that column was the rise onto it.
+	plateau_start = above_left & (mid == right)
+	plateau_end = (mid == left) & above_right
 
-		elif mid == max(left) and mid > max(right):
-			# start of fall from plateau
-			if edge > -1:
-				centre = int((edge + index + half) / 2)  # mid point
-				peak_point.append(centre)
-			edge = -1
+	# For each scan, the (1-based) index of the most recent event in each column
+	row_numbers = numpy.arange(1, num_centres + 1, dtype=numpy.int32)[:, None]
+	any_event = apex | plateau_start | plateau_end
+	last_event = numpy.maximum.accumulate(numpy.where(any_event, row_numbers, 0), axis=0)
 
-	return peak_point
+	end_rows, end_cols = numpy.nonzero(plateau_end[1:])
+	start_rows = last_event[end_rows, end_cols] - 1  # the previous event, as end_rows is offset by one
+	end_rows += 1
+
+	valid = start_rows >= 0
+	valid[valid] = plateau_start[start_rows[valid], end_cols[valid]]
+	centres = (start_rows[valid] + end_rows[valid]) // 2 + half
+	mask[centres, end_cols[valid]] = True
+
+	return mask
 
 
 def get_maxima_list(ic: IonChromatogram, points: int = 3) -> List[List[float]]:
@@ -231,7 +289,13 @@ def get_maxima_list_reduced(
 	return maxima_list
 
 
-def get_maxima_matrix(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> numpy.ndarray:
+def get_maxima_matrix(
+		im: BaseIntensityMatrix,
+		points: int = 3,
+		scans: int = 1,
+		n_jobs: int = 1,
+		executor: Optional[Executor] = None,
+		) -> numpy.ndarray:
 	"""
 	Constructs a matrix containing only data for scans in which particular ions apexed.
 
@@ -245,10 +309,25 @@ def get_maxima_matrix(im: BaseIntensityMatrix, points: int = 3, scans: int = 1)
 	:param im:
 	:param points: Number of scans over which to consider a maxima to be a peak.
 	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	:param n_jobs: The number of blocks of ions to find the maxima for in parallel.
+		``-1`` uses one block per CPU. The default, ``1``, finds the maxima serially in this process.
+		The intensities are copied into shared memory on each call, so parallel blocks
+		are only worthwhile for large intensity matrices on machines with several CPUs.
+	:param executor: An optional :class:`concurrent.futures.Executor` to find the maxima with.
+		If :py:obj:`None` and ``n_jobs`` is greater than ``1`` a
+		:class:`~concurrent.futures.ProcessPoolExecutor` is used.
 
 	:return: A matrix of giving the intensities of ion masses (columns) and for each scan (rows).
 
 	:author: Andrew Isaac, Dominic Davis-Foster (type assertions)
+
+	.. versionchanged:: 2.8.0
+
+		The maxima for all ions are found in a single pass over the intensity array,
+		and whole scans are moved when consolidating the data.
+
+		Added the ``n_jobs`` and ``executor`` arguments. The ions are split into blocks
+		whose maxima are found in parallel, before the scans are consolidated.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -260,54 +339,211 @@ def get_maxima_matrix(im: BaseIntensityMatrix, points: int = 3, scans: int = 1)
 	if not isinstance(scans, int):
 		raise TypeError("'scans' must be an integer")
 
+	if not isinstance(n_jobs, int):
+		raise TypeError("'n_jobs' must be an integer")
+
+	if n_jobs == -1:
+		n_jobs = os.cpu_count() or 1
+	elif n_jobs < 1:
+		raise ValueError("'n_jobs' must be a positive integer or -1")
+
 	numrows, numcols = im.size  # scans, masses
 	# zeroed matrix, size numrows*numcols
 	maxima_im = numpy.zeros((numrows, numcols))
 	raw_im = im.intensity_array
 
 	# Construct a 2d array which is all zeros apart from the apexing ions
-	for col in range(numcols):  # assume all rows have same width
-		# 1st, find maxima
-		maxima = get_maxima_indices(raw_im[:, col], points)
-
-		# 2nd, fill intensities
-		for row in maxima:
-			maxima_im[row, col] = raw_im[row, col]
+	if n_jobs == 1 and executor is None:
+		maxima = _get_maxima_mask(raw_im, points)
+	else:
+		maxima = _get_maxima_mask_parallel(raw_im, points, n_jobs, executor)
+	maxima_im[maxima] = raw_im[maxima]
 
 	# combine spectra within 'scans' scans.
+	_consolidate_scans(maxima_im, scans)
+
+	return maxima_im
+
+
+def _get_maxima_mask_parallel(
+		intensity_array: numpy.ndarray,
+		points: int,
+		n_jobs: int,
+		executor: Optional[Executor] = None,
+		) -> numpy.ndarray:
+	"""
+	Find the apexes of each column of ``intensity_array`` in ``n_jobs`` blocks of columns.
+
+	Each column is independent, so the result is the same as :func:`~._get_maxima_mask`.
+	Where available, the intensities and the output mask are placed in shared memory
+	so only the block boundaries are sent to the worker processes.
+
+	:param intensity_array: Two-dimensional array of intensities, with scans as rows and ions as columns.
+	:param points: Number of scans over which to consider a maxima to be a peak.
+	:param n_jobs: The number of blocks of columns.
+	:param executor: The executor to find the maxima with.
+		If :py:obj:`None` a :class:`~concurrent.futures.ProcessPoolExecutor` with ``n_jobs`` workers is used.
+	"""
+
+	intensity_array = numpy.asarray(intensity_array)
+	numcols = intensity_array.shape[1]
+	bounds = numpy.linspace(0, numcols, min(n_jobs, max(numcols, 1)) + 1).astype(int)
+	blocks = [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+	own_executor = executor is None
+	if executor is None:
+		executor = ProcessPoolExecutor(max_workers=n_jobs)
+
+	try:
+		if shared_memory is None:  # pragma: no cover (<py38)
+			futures = [executor.submit(_get_maxima_mask, intensity_array[:, start:stop], points) for start, stop in blocks]
+			return numpy.concatenate([future.result() for future in futures], axis=1)
+
+		shm_in = shared_memory.SharedMemory(create=True, size=max(intensity_array.nbytes, 1))
+		shm_out = shared_memory.SharedMemory(create=True, size=max(intensity_array.size, 1))
+
+		try:
+			shared_in = numpy.ndarray(intensity_array.shape, dtype=intensity_array.dtype, buffer=shm_in.buf)
+			shared_in[:] = intensity_array
+
+			futures = [
+					executor.submit(
+							_maxima_block_worker,
+							shm_in.name,
+							shm_out.name,
+							intensity_array.shape,
+							intensity_array.dtype.str,
+							start,
+							stop,
+							points,
+							) for start, stop in blocks
+					]
+
+			for future in futures:
+				future.result()
+
+			mask = numpy.ndarray(intensity_array.shape, dtype=bool, buffer=shm_out.buf).copy()
+			del shared_in
+
+		finally:
+			for shm in (shm_in, shm_out):
+				shm.close()
+				shm.unlink()
+
+		return mask
+
+	finally:
+		if own_executor:
+			executor.shutdown()
+
+
+def _maxima_block_worker(
+		in_name: str,
+		out_name: str,
+		shape: Tuple[int, int],
+		dtype: str,
+		start: int,
+		stop: int,
+		points: int,
+		) -> None:
+	"""
+	Find the apexes in columns ``start`` to ``stop`` of the intensity array in shared memory ``in_name``,
+	and write them to the boolean array in shared memory ``out_name``.
+	"""
+
+	shm_in = _attach_shared_memory(in_name)
+	shm_out = _attach_shared_memory(out_name)
+
+	try:
+		intensity_array = numpy.ndarray(shape, dtype=dtype, buffer=shm_in.buf)
+		mask = numpy.ndarray(shape, dtype=bool, buffer=shm_out.buf)
+		mask[:, start:stop] = _get_maxima_mask(intensity_array[:, start:stop], points)
+		del intensity_array, mask
+	finally:
+		shm_in.close()
+		shm_out.close()
+
+
+def _consolidate_scans(maxima_im: numpy.ndarray, scans: int) -> None:
+	"""
+	Consolidate the maxima within each window of ``scans`` scans into
+	the scan in that window with the highest total intensity, in place.
+
+	Each scan in turn is taken as the centre of a window, and the scans in the window
+	are added into the first scan with the highest positive total intensity.
+	As the windows are processed in order, the intensities merged for one window
+	are carried into the next. The total intensity of each scan is cached and
+	only the scans which still contain data are moved.
+
+	:param maxima_im: The matrix of maxima, with scans as rows and ions as columns.
+	:param scans: Number of scans to combine peaks from to compensate for spectra skewing.
+	"""  # noqa: D400
+
+	numrows = len(maxima_im)
 	half = int(scans / 2)
 
+	if scans <= 1 or not numrows:
+		return
+
+	row_tic = maxima_im.sum(axis=1)
+	has_data = maxima_im.any(axis=1)
+
 	for row_idx in range(numrows):
-		# print(f"{row_idx=}")
-		# tic = 0
-		best = 0
-		loc = 0
-
-		# find best in scans
-		for ii in range(scans):
-			# print(f"{ii=}")
-
-			# Check the scan window around row_idx is not
-			# out of range on left (0) or right (numrows)
-			if 0 <= row_idx - half + ii < numrows:
-				# print(row_idx - half + ii)
-				tic = maxima_im[row_idx - half + ii].sum()
-
-				# find the index of the scan in the window with the highest TIC intensity
-				if tic > best:
-					best = tic
-					loc = ii
-
-		for ii in range(scans):
-			# Consolidate data in scan with highest TIC
-			source_idx = row_idx - half + ii  # the scan to move data from
-			dest_idx = row_idx - half + loc  # the scan to move data into
-			if 0 <= source_idx < numrows and ii != loc:
-				for col in range(numcols):
-					maxima_im[dest_idx, col] += maxima_im[source_idx, col]
-					maxima_im[source_idx, col] = 0
+		window_start = max(row_idx - half, 0)
+		window_stop = min(row_idx - half + scans, numrows)
+
+		sources = numpy.flatnonzero(has_data[window_start:window_stop]) + window_start
+		if not sources.size:
+			continue
+
+		# find the index of the scan in the window with the highest TIC intensity
+		best = int(row_tic[window_start:window_stop].argmax()) + window_start
+		if row_tic[best] > 0:
+			dest_idx = best
+		elif row_idx - half >= 0:
+			dest_idx = row_idx - half
+		else:
+			continue
+
+		sources = sources[sources != dest_idx]
+		if not sources.size:
+			continue
+
+		# Consolidate data in scan with highest TIC
+		for source_idx in sources:
+			maxima_im[dest_idx] += maxima_im[source_idx]
+
+		maxima_im[sources] = 0
+		row_tic[sources] = 0
+		has_data[sources] = False
+		row_tic[dest_idx] = maxima_im[dest_idx].sum()
+		has_data[dest_idx] = True
+
+
+def _window_sums(values: numpy.ndarray, scans: int) -> numpy.ndarray:
+	"""
+	Returns the sum of ``values`` over a window of ``scans`` scans centred on each scan.
 
-	return maxima_im
+	The window is truncated at either end of the array.
+	The values are added in the order of the scans in the window.
+
+	:param values:
+	:param scans:
+	"""
+
+	numrows = len(values)
+	half = int(scans / 2)
+	sums = numpy.zeros(numrows)
+
+	for offset in range(-half, scans - half):
+		if abs(offset) >= numrows:
+			continue
+		elif offset < 0:
+			sums[-offset:] += values[:numrows + offset]
+		else:
+			sums[:max(numrows - offset, 0)] += values[offset:]
+
+	return sums
 
 
 def num_ions_threshold(
@@ -413,6 +649,10 @@ def sum_maxima(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> IonC
 	:return: The reconstructed TIC.
 
 	:author: Andrew Isaac, Dominic Davis-Foster (type assertions)
+
+	.. versionchanged:: 2.8.0
+
+		The sums over each window of ``scans`` scans are calculated for all scans at once.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -425,16 +665,6 @@ def sum_maxima(im: BaseIntensityMatrix, points: int = 3, scans: int = 1) -> IonC
 		raise TypeError("'scans' must be an integer")
 
 	maxima_im = get_maxima_matrix(im, points)
-	sums = []
-	numrows = len(maxima_im)
-	half = int(scans / 2)
-
-	for row in range(numrows):
-		val = 0
-		for ii in range(scans):
-			if 0 <= row - half + ii < numrows:
-				val += maxima_im[row - half + ii].sum()
-		sums.append(val)
-	tic = IonChromatogram(numpy.array(sums), im.time_list)
+	tic = IonChromatogram(_window_sums(maxima_im.sum(axis=1), scans), im.time_list)
 
 	return tic
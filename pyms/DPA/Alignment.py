@@ -28,7 +28,7 @@ import copy
 import math
 import operator
 import pathlib
-from typing import Dict, List, Optional, Sequence
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
 # 3rd party
 import numpy
@@ -49,6 +49,122 @@ __all__ = ["Alignment", "exprl2alignment"]
 DataFrame.__module__ = "pandas"
 
 
+class _PeakArrays(NamedTuple):
+	"""
+	The peaks in an alignment as arrays, for calculating score matrices.
+
+	The peaks are ordered by experiment, and then by alignment position.
+	"""
+
+	#: The alignment position of each peak.
+	positions: numpy.ndarray
+
+	#: The start of the peaks from each experiment, plus the total number of peaks.
+	offsets: numpy.ndarray
+
+	#: The retention time of each peak.
+	rts: numpy.ndarray
+
+	#: The mass spectrum of each peak, as the rows of a two-dimensional array.
+	spectra: numpy.ndarray
+
+	#: The sum of the squared intensities of the mass spectrum of each peak.
+	sum_squares: numpy.ndarray
+
+	#: The number of peaks at each alignment position.
+	counts: numpy.ndarray
+
+
+class _PeakTable:
+	"""
+	The peaks from one experiment in an alignment, with their retention times, areas and mass spectra as arrays.
+
+	The table is shared by all alignments which contain the experiment.
+	The retention times and areas are recorded when the table is created,
+	and the mass spectra when they are first needed.
+
+	:param peaks:
+	"""
+
+	__slots__ = ("peaks", "rts", "areas", "_spectra", "_sum_squares")
+
+	#: The peaks.
+	peaks: List[Peak]
+
+	#: The retention time of each peak.
+	rts: numpy.ndarray
+
+	#: The area of each peak, or ``NaN`` if the peak has no area.
+	areas: numpy.ndarray
+
+	def __init__(self, peaks: Sequence[Peak]):
+		self.peaks = list(peaks)
+		self.rts = numpy.array([peak.rt for peak in self.peaks], dtype='d')
+		self.areas = numpy.array([numpy.nan if peak.area is None else peak.area for peak in self.peaks], dtype='d')
+		self._spectra: Optional[numpy.ndarray] = None
+		self._sum_squares: Optional[numpy.ndarray] = None
+
+	def __len__(self) -> int:
+		return len(self.peaks)
+
+	def __getstate__(self) -> Tuple[List[Peak], numpy.ndarray, numpy.ndarray]:
+		# The mass spectra are rebuilt from the peaks when needed.
+		return self.peaks, self.rts, self.areas
+
+	def __setstate__(self, state: Tuple[List[Peak], numpy.ndarray, numpy.ndarray]) -> None:
+		self.peaks, self.rts, self.areas = state
+		self._spectra = self._sum_squares = None
+
+	@property
+	def spectra(self) -> numpy.ndarray:
+		"""
+		The mass spectrum of each peak, as the rows of a two-dimensional array.
+		"""
+
+		if self._spectra is None:
+			mass_specs = [peak.mass_spectrum.mass_spec for peak in self.peaks]
+			if len({len(mass_spec) for mass_spec in mass_specs}) > 1:
+				raise ValueError(
+						"Mass Spectra are of different lengths.\n"
+						"Use `IntensityMatrix.crop_mass()` to set same length for all Mass Spectra"
+						)
+
+			if mass_specs:
+				self._spectra = numpy.array(mass_specs, dtype='d')
+			else:
+				self._spectra = numpy.zeros((0, 0))
+
+		return self._spectra
+
+	@property
+	def sum_squares(self) -> numpy.ndarray:
+		"""
+		The sum of the squared intensities of the mass spectrum of each peak,
+		with which the spectra are normalised when they are compared.
+		"""
+
+		if self._sum_squares is None:
+			self._sum_squares = numpy.sum(self.spectra**2, axis=1)
+
+		return self._sum_squares
+
+
+def _take(values: numpy.ndarray, rows: numpy.ndarray, fill: object = numpy.nan) -> numpy.ndarray:
+	"""
+	Returns the elements of ``values`` at the indices in ``rows``, with ``fill`` where the index is ``-1``.
+
+	:param values:
+	:param rows:
+	:param fill:
+	"""
+
+	present = rows >= 0
+	taken = numpy.full(rows.shape, fill, dtype=values.dtype)
+	taken[present] = values[rows[present]]
+
+	return taken
+
+
 class Alignment:
 	"""
 	Models an alignment of peak lists.
@@ -56,25 +172,25 @@ class Alignment:
 	:param expr: The experiment to be converted into an alignment object.
 
 	:authors: Woon Wai Keen, Qiao Wang, Vladimir Likic, Dominic Davis-Foster.
-	"""
 
-	#:
-	peakpos: List[List[Peak]]
+	.. versionchanged:: 2.8.0
+
+		The alignment is stored as an array of the index of the peak from each experiment at each position,
+		into tables of the peaks from each experiment which are shared between alignments.
+		:attr:`~.peakpos` and :attr:`~.peakalgt` are created from the index when they are first accessed.
+	"""
 
 	#: List of experiment codes.
 	expr_code: List[str]
 
-	#:
-	peakalgt: List[List[Peak]]
-
 	#:
 	similarity: Optional[float]
 
 	def __init__(self, expr: Optional[Experiment]):
 
 		if expr is None:
-			self.peakpos = []
-			self.peakalgt = []
+			self._tables: List[_PeakTable] = []
+			self._index = numpy.zeros((0, 0), dtype=numpy.int32)
 			self.expr_code = []
 			self.similarity = None
 		elif not isinstance(expr, Experiment):
@@ -83,11 +199,123 @@ class Alignment:
 			# for peak in expr.peak_list:
 			#    if peak.area() == None or peak.area() <= 0:
 			#        error("All peaks must have an area for alignment")
-			self.peakpos = [copy.deepcopy(expr.peak_list)]
-			self.peakalgt = numpy.transpose(self.peakpos).tolist()  # type: ignore[arg-type]
+			self._tables = [_PeakTable(copy.deepcopy(expr.peak_list))]
+			self._index = numpy.arange(len(expr.peak_list), dtype=numpy.int32)[numpy.newaxis]
 			self.expr_code = [expr.expr_code]
 			self.similarity = None
 
+	@classmethod
+	def _from_index(
+			cls,
+			tables: List[_PeakTable],
+			index: numpy.ndarray,
+			expr_code: List[str],
+			) -> "Alignment":
+		"""
+		Create an alignment from tables of the peaks from each experiment, and the index of the peaks at each position.
+
+		:param tables: The peaks from each experiment.
+		:param index: Two-dimensional array giving the index of the peak from each experiment (rows)
+			at each alignment position (columns), or ``-1`` if the experiment has no peak at the position.
+		:param expr_code: The experiment codes.
+		"""
+
+		alignment = cls(None)
+		alignment._tables = list(tables)
+		alignment._index = numpy.asarray(index, dtype=numpy.int32)
+		alignment.expr_code = list(expr_code)
+
+		return alignment
+
+	def __getstate__(self) -> Dict[str, Any]:
+		# The lists of peaks and the arrays used for score matrices are rebuilt from the index when needed.
+		state = self.__dict__.copy()
+		for cache in ("_peakpos_cache", "_peak_arrays_cache"):
+			state.pop(cache, None)
+
+		return state
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		state = dict(state)
+
+		if "peakpos" in state:
+			# Object pickled before the switch to an index of the peaks
+			peakpos = state.pop("peakpos")
+			state.pop("peakalgt", None)
+			self.__dict__.update(state)
+			self.peakpos = peakpos
+		else:
+			self.__dict__.update(state)
+
+	@property
+	def peakpos(self) -> List[List[Optional[Peak]]]:
+		"""
+		The peak from each experiment (outer list) at each alignment position (inner lists),
+		or :py:obj:`None` if the experiment has no peak at the position.
+
+		.. versionchanged:: 2.8.0
+
+			The lists are created from the index of the alignment when first accessed,
+			and setting this attribute replaces the index.
+		"""
+
+		cached = self.__dict__.get("_peakpos_cache")
+		if cached is not None and cached[0] is self._index:
+			return cached[1]
+
+		peakpos = [
+				[table.peaks[row] if row >= 0 else None for row in rows.tolist()]
+				for table, rows in zip(self._tables, self._index)
+				]
+
+		self.__dict__["_peakpos_cache"] = (self._index, peakpos, None)
+
+		return peakpos
+
+	@peakpos.setter
+	def peakpos(self, peakpos: Sequence[Sequence[Optional[Peak]]]) -> None:
+		tables = []
+		index = []
+
+		for peaks in peakpos:
+			rows = numpy.full(len(peaks), -1, dtype=numpy.int32)
+			present = [position for position, peak in enumerate(peaks) if peak is not None]
+			rows[present] = numpy.arange(len(present))
+			tables.append(_PeakTable([peaks[position] for position in present]))
+			index.append(rows)
+
+		self._tables = tables
+		if index:
+			self._index = numpy.array(index, dtype=numpy.int32)
+		else:
+			self._index = numpy.zeros((0, 0), dtype=numpy.int32)
+
+	@property
+	def peakalgt(self) -> List[List[Optional[Peak]]]:
+		"""
+		The peak from each experiment (inner lists) at each alignment position (outer list),
+		or :py:obj:`None` if the experiment has no peak at the position.
+
+		.. versionchanged:: 2.8.0
+
+			The lists are created from the index of the alignment when first accessed,
+			and setting this attribute replaces the index.
+		"""
+
+		peakpos = self.peakpos
+		index, peakpos, peakalgt = self.__dict__["_peakpos_cache"]
+
+		if peakalgt is None:
+			peakalgt = [list(peaks) for peaks in zip(*peakpos)]
+			self.__dict__["_peakpos_cache"] = (index, peakpos, peakalgt)
+
+		return peakalgt
+
+	@peakalgt.setter
+	def peakalgt(self, peakalgt: Sequence[Sequence[Optional[Peak]]]) -> None:
+		n_exprs = len(peakalgt[0]) if len(peakalgt) else len(self._tables)
+		self.peakpos = [[peaks[expr_idx] for peaks in peakalgt] for expr_idx in range(n_exprs)]
+
 	def __len__(self) -> int:
 		"""
 		Returns the length of the alignment, defined as the number of
@@ -98,7 +326,36 @@ class Alignment:
 		:authors: Qiao Wang, Vladimir Likic
 		"""  # noqa: D400
 
-		return len(self.peakalgt)
+		return self._index.shape[1]
+
+	def _table_values(self, attribute: str) -> numpy.ndarray:
+		"""
+		Returns a two-dimensional array of the given attribute of the peak tables
+		for each experiment (rows) at each alignment position (columns), with ``NaN`` where there is no peak.
+
+		:param attribute: ``'rts'`` or ``'areas'``.
+		"""
+
+		values = numpy.full(self._index.shape, numpy.nan)
+		for expr_idx, (table, rows) in enumerate(zip(self._tables, self._index)):
+			values[expr_idx] = _take(getattr(table, attribute), rows)
+
+		return values
+
+	def _table_objects(self, get: Callable[[Peak], Any]) -> numpy.ndarray:
+		"""
+		Returns a two-dimensional object array of ``get(peak)`` for the peak from each experiment (rows)
+		at each alignment position (columns), with :py:obj:`None` where there is no peak.
+
+		:param get:
+		"""
+
+		objects = numpy.full(self._index.shape, None, dtype=object)
+		for expr_idx, (table, rows) in enumerate(zip(self._tables, self._index)):
+			for position in numpy.flatnonzero(rows >= 0):
+				objects[expr_idx, position] = get(table.peaks[rows[position]])
+
+		return objects
 
 	def aligned_peaks(self, minutes: bool = False) -> Sequence[Optional[Peak]]:
 		"""
@@ -217,6 +474,53 @@ class Alignment:
 
 		return top_ion_list
 
+	def _peak_arrays(self) -> _PeakArrays:
+		"""
+		Returns the retention times and mass spectra of the peaks in the alignment as arrays.
+
+		The result is cached, and rebuilt whenever the alignment positions change.
+		"""
+
+		cached = self.__dict__.get("_peak_arrays_cache")
+		if cached is not None and cached[0] is self._index:
+			return cached[1]
+
+		positions = []
+		rows = []
+
+		for expr_rows in self._index:
+			expr_positions = numpy.flatnonzero(expr_rows >= 0)
+			positions.append(expr_positions)
+			rows.append(expr_rows[expr_positions])
+
+		widths = {table.spectra.shape[1] for table in self._tables if len(table)}
+		if len(widths) > 1:
+			raise ValueError(
+					"Mass Spectra are of different lengths.\n"
+					"Use `IntensityMatrix.crop_mass()` to set same length for all Mass Spectra"
+					)
+
+		width = widths.pop() if widths else 0
+
+		peak_arrays = _PeakArrays(
+				positions=numpy.concatenate([numpy.zeros(0, dtype=numpy.intp), *positions]).astype(numpy.intp),
+				offsets=numpy.cumsum([0] + [len(expr_positions) for expr_positions in positions]).astype(numpy.intp),
+				rts=numpy.concatenate([numpy.zeros(0), *(table.rts[r] for table, r in zip(self._tables, rows))]),
+				spectra=numpy.concatenate([
+						numpy.zeros((0, width)),
+						*(table.spectra[r] for table, r in zip(self._tables, rows) if len(r)),
+						]),
+				sum_squares=numpy.concatenate([
+						numpy.zeros(0),
+						*(table.sum_squares[r] for table, r in zip(self._tables, rows) if len(r)),
+						]),
+				counts=numpy.count_nonzero(self._index >= 0, axis=0),
+				)
+
+		self.__dict__["_peak_arrays_cache"] = (self._index, peak_arrays)
+
+		return peak_arrays
+
 	def filter_min_peaks(self, min_peaks: int) -> None:
 		"""
 		Filters alignment positions that have less peaks than ``min_peaks``.
@@ -227,20 +531,16 @@ class Alignment:
 			position to survive filtering.
 
 		:author: Qiao Wang
+
+		.. versionchanged:: 2.8.0
+
+			The positions are filtered with array operations on the index of the alignment.
 		"""
 
 		if not isinstance(min_peaks, int):
 			raise TypeError("'min_peaks' must be an integer")
 
-		filtered_list = []
-
-		for pos in range(len(self.peakalgt)):
-			# if len(filter(None,self.peakalgt[pos])) >= min_peaks:
-			if len([x for x in self.peakalgt[pos] if x is not None]) >= min_peaks:
-				filtered_list.append(self.peakalgt[pos])
-
-		self.peakalgt = filtered_list
-		self.peakpos = numpy.transpose(self.peakalgt).tolist()  # type: ignore[arg-type]
+		self._index = self._index[:, numpy.count_nonzero(self._index >= 0, axis=0) >= min_peaks]
 
 	@staticmethod
 	def get_highest_mz_ion(ion_dict: Dict[float, int]) -> float:
@@ -559,38 +859,19 @@ class Alignment:
 			all experiments to be included in the data frame.
 
 		:authors: Woon Wai Keen, Andrew Isaac, Vladimir Likic, Dominic Davis-Foster
-		"""
 
-		rt_table = []
+		.. versionchanged:: 2.8.0
 
-		# for each alignment position write alignment's RT
-		for peak_idx in range(len(self.peakpos[0])):
-			rts = []
-			countrt = 0
-
-			for align_idx in range(len(self.peakpos)):
-				peak = self.peakpos[align_idx][peak_idx]
-
-				if peak is not None:
-
-					if minutes:
-						rt = peak.rt / 60.0
-					else:
-						rt = peak.rt
-
-					rts.append(rt)
-					countrt = countrt + 1
-
-				else:
-					rts.append(None)
+			The dataframe is created from arrays of the retention times,
+			with ``NaN`` where an experiment has no peak at a position.
+		"""
 
-			if (require_all_expr and countrt == len(self.expr_code)) or not require_all_expr:
-				rt_table.append(rts)
+		rts = self._table_values("rts")
 
-		rt_alignment = pandas.DataFrame(rt_table, columns=self.expr_code)
-		rt_alignment = rt_alignment.reindex(sorted(rt_alignment.columns), axis=1)
+		if minutes:
+			rts = rts / 60.0
 
-		return rt_alignment
+		return self._alignment_dataframe(rts, require_all_expr)
 
 	def get_ms_alignment(self, require_all_expr: bool = True) -> DataFrame:
 		"""
@@ -602,30 +883,7 @@ class Alignment:
 		:authors: Woon Wai Keen, Andrew Isaac, Vladimir Likic, Dominic Davis-Foster
 		"""
 
-		ms_table = []
-
-		# for each alignment position write alignment's ms
-		for peak_idx in range(len(self.peakpos[0])):
-			specs = []
-			countms = 0
-
-			for align_idx in range(len(self.peakpos)):
-				peak = self.peakpos[align_idx][peak_idx]
-
-				if peak is not None:
-					ms = peak.mass_spectrum
-					specs.append(ms)
-					countms = countms + 1
-				else:
-					specs.append(None)
-
-			if (require_all_expr and countms == len(self.expr_code)) or not require_all_expr:
-				ms_table.append(specs)
-
-		ms_alignment = pandas.DataFrame(ms_table, columns=self.expr_code)
-		ms_alignment = ms_alignment.reindex(sorted(ms_alignment.columns), axis=1)
-
-		return ms_alignment
+		return self._alignment_dataframe(self._table_objects(operator.attrgetter("mass_spectrum")), require_all_expr)
 
 	def get_peaks_alignment(self, require_all_expr: bool = True) -> DataFrame:
 		"""
@@ -637,29 +895,7 @@ class Alignment:
 		:authors: Woon Wai Keen, Andrew Isaac, Vladimir Likic, Dominic Davis-Foster
 		"""
 
-		peaks_table = []
-
-		# for each alignment position write alignment's ms
-		for peak_idx in range(len(self.peakpos[0])):
-			peaks = []
-			count_peaks = 0
-
-			for align_idx in range(len(self.peakpos)):
-				peak = self.peakpos[align_idx][peak_idx]
-
-				if peak is not None:
-					peaks.append(peak)
-					count_peaks = count_peaks + 1
-				else:
-					peaks.append(None)
-
-			if (require_all_expr and count_peaks == len(self.expr_code)) or not require_all_expr:
-				peaks_table.append(peaks)
-
-		peak_alignment = pandas.DataFrame(peaks_table, columns=self.expr_code)
-		peak_alignment = peak_alignment.reindex(sorted(peak_alignment.columns), axis=1)
-
-		return peak_alignment
+		return self._alignment_dataframe(self._table_objects(lambda peak: peak), require_all_expr)
 
 	def get_area_alignment(self, require_all_expr: bool = True) -> DataFrame:
 		"""
@@ -669,32 +905,31 @@ class Alignment:
 			to be included in the data frame.
 
 		:authors: Woon Wai Keen, Andrew Isaac, Vladimir Likic, Dominic Davis-Foster
-		"""
 
-		areas_table = []
+		.. versionchanged:: 2.8.0
 
-		# for each alignment position write alignment's ms
-		for peak_idx in range(len(self.peakpos[0])):
-			areas = []
-			count_areas = 0
+			The dataframe is created from arrays of the areas,
+			with ``NaN`` where an experiment has no peak at a position or the peak has no area.
+		"""
 
-			for align_idx in range(len(self.peakpos)):
-				peak = self.peakpos[align_idx][peak_idx]
+		return self._alignment_dataframe(self._table_values("areas"), require_all_expr)
 
-				if peak is not None:
-					area = peak.area
-					areas.append(area)
-					count_areas = count_areas + 1
-				else:
-					areas.append(None)
+	def _alignment_dataframe(self, values: numpy.ndarray, require_all_expr: bool) -> DataFrame:
+		"""
+		Returns a Pandas dataframe of values for the peak from each experiment (rows of ``values``)
+		at each alignment position (columns of ``values``), with the experiments as the columns of the dataframe.
+
+		:param values:
+		:param require_all_expr: Whether the peak must be present in all experiments
+			for the position to be included in the data frame.
+		"""
 
-			if (require_all_expr and count_areas == len(self.expr_code)) or not require_all_expr:
-				areas_table.append(areas)
+		if require_all_expr:
+			values = values[:, (self._index >= 0).all(axis=0)]
 
-		area_alignment = pandas.DataFrame(areas_table, columns=self.expr_code)
-		area_alignment = area_alignment.reindex(sorted(area_alignment.columns), axis=1)
+		alignment = pandas.DataFrame(values.T, columns=self.expr_code)
 
-		return area_alignment
+		return alignment.reindex(sorted(alignment.columns), axis=1)
 
 
 def exprl2alignment(expr_list: List[Experiment]) -> List[Alignment]:
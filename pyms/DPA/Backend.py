@@ -0,0 +1,211 @@
+"""
+Execution backends for alignment of peak lists by dynamic programming.
+
+A backend is a :class:`concurrent.futures.Executor` which also knows how many workers it has,
+and whether they run on this machine. Any other :class:`~concurrent.futures.Executor`,
+such as a :class:`~concurrent.futures.ThreadPoolExecutor` or the ``MPIPoolExecutor`` from ``mpi4py.futures``,
+can be passed wherever a backend is accepted, and is wrapped with :func:`~.get_backend`.
+
+.. versionadded:: 2.8.0
+"""
+
+################################################################################
+#                                                                              #
+#    PyMassSpec software for processing of mass-spectrometry data              #
+#    Copyright (C) 2026 Dominic Davis-Foster                                   #
+#                                                                              #
+#    This program is free software; you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License version 2 as         #
+#    published by the Free Software Foundation.                                #
+#                                                                              #
+#    This program is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the             #
+#    GNU General Public License for more details.                              #
+#                                                                              #
+#    You should have received a copy of the GNU General Public License         #
+#    along with this program; if not, write to the Free Software               #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.                 #
+#                                                                              #
+################################################################################
+
+# stdlib
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+try:
+	from multiprocessing import resource_tracker
+except ImportError:  # pragma: no cover (<py38)
+	resource_tracker = None  # type: ignore[assignment]
+
+__all__ = ["Backend", "SerialBackend", "ExecutorBackend", "ProcessPoolBackend", "get_backend"]
+
+
+class Backend(Executor):
+	"""
+	Base class for execution backends.
+
+	:param n_workers: The number of tasks which can run at the same time.
+	:param local: Whether the workers run on this machine, so data can be passed to them through shared memory.
+	"""
+
+	#: The number of tasks which can run at the same time.
+	n_workers: int
+
+	#: Whether the workers run on this machine, so data can be passed to them through shared memory.
+	local: bool
+
+	def __init__(self, n_workers: int = 1, local: bool = True):
+		if not isinstance(n_workers, int):
+			raise TypeError("'n_workers' must be an integer")
+
+		if n_workers < 1:
+			raise ValueError("'n_workers' must be a positive integer")
+
+		self.n_workers = n_workers
+		self.local = bool(local)
+
+	@property
+	def parallel(self) -> bool:
+		"""
+		Returns whether tasks submitted to the backend can run at the same time.
+		"""
+
+		return self.n_workers > 1
+
+
+class SerialBackend(Backend):
+	"""
+	Runs each task in this process as soon as it is submitted.
+	"""
+
+	def __init__(self):
+		super().__init__(1, local=True)
+
+	def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:  # type: ignore[override]
+		"""
+		Runs ``fn(*args, **kwargs)``, and returns a :class:`~concurrent.futures.Future` holding the result.
+
+		:param fn:
+		"""
+
+		future: Future = Future()
+
+		try:
+			future.set_result(fn(*args, **kwargs))
+		except BaseException as e:
+			future.set_exception(e)
+
+		return future
+
+
+class ExecutorBackend(Backend):
+	"""
+	Runs tasks with a :class:`concurrent.futures.Executor`.
+
+	:param executor:
+	:param n_workers: The number of tasks which can run at the same time.
+		If :py:obj:`None` the number of workers of a :class:`~concurrent.futures.ProcessPoolExecutor`
+		or :class:`~concurrent.futures.ThreadPoolExecutor` is used, or otherwise the number of CPUs.
+	:param local: Whether the workers run on this machine, so data can be passed to them through shared memory.
+		If :py:obj:`None` this is :py:obj:`True` for :class:`~concurrent.futures.ProcessPoolExecutor`
+		and :class:`~concurrent.futures.ThreadPoolExecutor`, and :py:obj:`False` for other executors.
+	"""
+
+	#: The executor which runs the tasks.
+	executor: Executor
+
+	def __init__(self, executor: Executor, n_workers: Optional[int] = None, local: Optional[bool] = None):
+		if not isinstance(executor, Executor):
+			raise TypeError("'executor' must be a concurrent.futures.Executor")
+
+		is_pool = isinstance(executor, (ProcessPoolExecutor, ThreadPoolExecutor))
+
+		if n_workers is None:
+			n_workers = getattr(executor, "_max_workers", None) if is_pool else None
+			n_workers = n_workers or os.cpu_count() or 1
+
+		if local is None:
+			local = is_pool
+
+		super().__init__(n_workers, local)
+		self.executor = executor
+
+	def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:  # type: ignore[override]
+		"""
+		Submits ``fn(*args, **kwargs)`` to the executor.
+
+		:param fn:
+		"""
+
+		return self.executor.submit(fn, *args, **kwargs)
+
+	def shutdown(self, wait: bool = True, **kwargs: Any) -> None:
+		"""
+		Shuts down the executor.
+
+		:param wait: Whether to wait for the pending tasks to finish.
+		"""
+
+		self.executor.shutdown(wait=wait, **kwargs)
+
+
+class ProcessPoolBackend(ExecutorBackend):
+	"""
+	Runs tasks in a pool of worker processes on this machine.
+
+	:param n_jobs: The number of worker processes. ``-1`` uses one worker per CPU.
+	"""
+
+	def __init__(self, n_jobs: int = -1):
+		n_jobs = _check_n_jobs(n_jobs)
+
+		# Start the resource tracker before the workers, so they share it
+		# and shared memory they attach to is not reported as leaked when they exit.
+		if resource_tracker is not None:
+			resource_tracker.ensure_running()
+
+		super().__init__(ProcessPoolExecutor(max_workers=n_jobs), n_jobs, local=True)
+
+
+def get_backend(n_jobs: int = 1, executor: Optional[Executor] = None) -> Backend:
+	"""
+	Returns the backend for the given ``n_jobs`` and ``executor`` arguments.
+
+	:param n_jobs: The number of worker processes. ``-1`` uses one worker per CPU.
+	:param executor: An optional :class:`concurrent.futures.Executor`, which is returned unchanged if it is a :class:`~.Backend`.
+
+	:return: The ``executor`` if it is a :class:`~.Backend`; otherwise an :class:`~.ExecutorBackend` wrapping it;
+		otherwise a :class:`~.SerialBackend` if ``n_jobs`` is ``1``, or a :class:`~.ProcessPoolBackend` with ``n_jobs`` workers.
+		Backends created for ``n_jobs`` should be shut down by the caller.
+	"""
+
+	n_jobs = _check_n_jobs(n_jobs)
+
+	if isinstance(executor, Backend):
+		return executor
+	elif executor is not None:
+		return ExecutorBackend(executor, n_jobs if n_jobs > 1 else None)
+	elif n_jobs == 1:
+		return SerialBackend()
+	else:
+		return ProcessPoolBackend(n_jobs)
+
+
+def _check_n_jobs(n_jobs: int) -> int:
+	"""
+	Checks the ``n_jobs`` argument, and returns the number of workers it corresponds to.
+
+	:param n_jobs:
+	"""
+
+	if not isinstance(n_jobs, int):
+		raise TypeError("'n_jobs' must be an integer")
+
+	if n_jobs == -1:
+		return os.cpu_count() or 1
+	elif n_jobs < 1:
+		raise ValueError("'n_jobs' must be a positive integer or -1")
+
+	return n_jobs
@@ -25,27 +25,28 @@ Classes for peak alignment by dynamic programming.
 
 # stdlib
 import copy
-import functools
+import heapq
 import math
-from typing import List
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, as_completed, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+	from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover (<py38)
+	shared_memory = None  # type: ignore[assignment]
 
 # 3rd party
+import deprecation  # type: ignore[import-untyped]
 import numpy
 from typing_extensions import TypedDict
 
 # this package
-from pyms.Peak import Peak
-
-try:
-	# 3rd party
-	from mpi4py import MPI  # type: ignore[import-not-found]
-except ModuleNotFoundError:
-	pass
-
-# this package
-from pyms.DPA.Alignment import Alignment
+from pyms import __version__
+from pyms.DPA.Alignment import Alignment, _PeakArrays
+from pyms.DPA.Backend import Backend, get_backend
 from pyms.DPA.clustering import treecluster
-from pyms.Utils.Utils import is_sequence_of
+from pyms.Peak import Peak
+from pyms.Utils.Utils import _attach_shared_memory, is_sequence_of
 
 __all__ = [
 		"PairwiseAlignment",
@@ -53,14 +54,18 @@ __all__ = [
 		"score_matrix",
 		"dp",
 		"DPResult",
+		"rt_band",
 		"position_similarity",
 		"merge_alignments",
 		"alignment_similarity",
 		"alignment_compare",
 		"score_matrix_mpi",
-		"align_with_tree",  # "align_with_tree_mpi",
+		"align_with_tree",
 		]
 
+# Pairs of peaks whose Gaussian retention time weighting is less than this are scored as 1 (the worst score)
+_TOL = 0.001
+
 
 class PairwiseAlignment:
 	"""
@@ -69,11 +74,36 @@ class PairwiseAlignment:
 	:param alignments: A list of alignments.
 	:param D: Retention time tolerance parameter (in seconds) for pairwise alignments.
 	:param gap: Gap parameter for pairwise alignments.
+	:param banded: Whether to only consider pairings of alignment positions within the band given by :func:`~.rt_band`.
+		The result is the same as without the band unless the optimal alignment pairs positions outside of it.
+		The band is not used if ``gap`` is ``0.5`` or more, as pairing positions outside of it is then no worse than two gaps.
+	:param n_jobs: The number of worker processes to calculate the similarity matrix with.
+		``-1`` uses one worker per CPU.
+	:param executor: An optional :class:`concurrent.futures.Executor` or :class:`~pyms.DPA.Backend.Backend`
+		to calculate the similarity matrix with.
+		If :py:obj:`None` and ``n_jobs`` is greater than ``1`` a
+		:class:`~pyms.DPA.Backend.ProcessPoolBackend` is used.
+	:param progress: An optional function which is called with the number of pairs of alignments
+		which have been aligned and the total number of pairs as the similarity matrix is calculated.
+		If :py:obj:`None` the number of pairs remaining is printed after each tenth of the pairs.
 
 	:authors: Woon Wai Keen, Vladimir Likic
+
+	.. versionchanged:: 2.8.0
+
+		Added the ``banded``, ``n_jobs``, ``executor`` and ``progress`` arguments.
 	"""
 
-	def __init__(self, alignments: List[Alignment], D: float, gap: float):
+	def __init__(
+			self,
+			alignments: List[Alignment],
+			D: float,
+			gap: float,
+			banded: bool = False,
+			n_jobs: int = 1,
+			executor: Optional[Executor] = None,
+			progress: Optional[Callable[[int, int], None]] = None,
+			):
 		if not is_sequence_of(alignments, Alignment):
 			raise TypeError("'alignments' must be a Sequence of Alignment objects")
 
@@ -83,19 +113,44 @@ class PairwiseAlignment:
 		if not isinstance(gap, float):
 			raise TypeError("'gap' must be a float")
 
+		if not isinstance(banded, bool):
+			raise TypeError("'banded' must be a boolean")
+
+		backend = get_backend(n_jobs, executor)
+
 		self.alignments = alignments
 		self.D = D
 		self.gap = gap
+		self.banded = banded
+
+		try:
+			self._sim_matrix(backend, progress)
+		finally:
+			if executor is None:
+				backend.shutdown()
 
-		self._sim_matrix()
 		self._dist_matrix()
 		self._guide_tree()
 
-	def _sim_matrix(self) -> None:
+	def _sim_matrix(
+			self,
+			backend: Optional[Backend] = None,
+			progress: Optional[Callable[[int, int], None]] = None,
+			) -> None:
 		"""
 		Calculates the similarity matrix for the set of alignments.
 
+		:param backend: The backend to calculate the similarity matrix with.
+			If :py:obj:`None` the similarities are calculated in this process.
+		:param progress: An optional function which is called with the number of pairs which have been aligned
+			and the total number of pairs.
+
 		:authors: Woon Wai Keen, Vladimir Likic
+
+		.. versionchanged:: 2.8.0
+
+			Only the similarity of each pair of alignments is calculated, from the arrays of their peaks,
+			and the pairs can be divided between several worker processes.
 		"""
 
 		n = len(self.alignments)
@@ -104,15 +159,41 @@ class PairwiseAlignment:
 
 		print(f" Calculating pairwise alignments for {n:d} alignments (D={self.D:.2f}, gap={self.gap:.2f})")
 
+		if progress is None:
+			# Report after each tenth of the pairs, rather than after every pair
+			reported = 0
+
+			def progress(done: int, total: int) -> None:
+				nonlocal reported
+
+				if done * 10 // total > reported:
+					reported = done * 10 // total
+					print(f" -> {total - done:d} pairs remaining")
+
 		self.sim_matrix = numpy.zeros((n, n), dtype='f')
 
-		# Could we parallelize this pairwise alignment loop??
-		for i in range(n - 1):
-			for j in range(i + 1, n):
-				ma = align(self.alignments[i], self.alignments[j], self.D, self.gap)
-				self.sim_matrix[i, j] = self.sim_matrix[j, i] = ma.similarity
-				total_n = total_n - 1
-				print(f" -> {total_n:d} pairs remaining")
+		pairs = [(i, j) for i in range(n - 1) for j in range(i + 1, n)]
+		peak_arrays = [alignment._peak_arrays() for alignment in self.alignments]
+
+		if backend is None or not backend.parallel:
+			for done, (i, j) in enumerate(pairs, start=1):
+				self.sim_matrix[i, j] = _pair_similarity(peak_arrays[i], peak_arrays[j], self.D, self.gap, self.banded)
+				progress(done, total_n)
+		else:
+			similarities = _pair_similarities_parallel(
+					peak_arrays,
+					pairs,
+					self.D,
+					self.gap,
+					self.banded,
+					backend,
+					progress,
+					)
+
+			for (i, j), similarity in zip(pairs, similarities):
+				self.sim_matrix[i, j] = similarity
+
+		self.sim_matrix += self.sim_matrix.T
 
 	def _dist_matrix(self) -> None:
 		"""
@@ -143,7 +224,7 @@ class PairwiseAlignment:
 		print("Done")
 
 
-def align(a1: Alignment, a2: Alignment, D: float, gap: float) -> Alignment:
+def align(a1: Alignment, a2: Alignment, D: float, gap: float, banded: bool = False) -> Alignment:
 	"""
 	Aligns two alignments.
 
@@ -151,54 +232,338 @@ def align(a1: Alignment, a2: Alignment, D: float, gap: float) -> Alignment:
 	:param a2: The second alignment
 	:param D: Retention time tolerance in seconds.
 	:param gap: Gap penalty
+	:param banded: Whether to only consider pairings of alignment positions within the band given by :func:`~.rt_band`.
+		The result is the same as without the band unless the optimal alignment pairs positions outside of it.
+		The band is not used if ``gap`` is ``0.5`` or more, as pairing positions outside of it is then no worse than two gaps.
 
 	:return: Aligned alignments
 
 	:authors: Woon Wai Keen, Vladimir Likic
-	"""
 
-	# comm = MPI.COMM_WORLD
-	# rank = comm.Get_rank()
+	.. versionchanged:: 2.8.0
+
+		Added the ``banded`` argument.
+	"""
 
 	# calculate score matrix for two alignments
 	M = score_matrix(a1, a2, D)
-	# print("calculated score matrix on rank", rank)
 
 	# run dynamic programming
-	result = dp(M, gap)
+	if banded:
+		trace = _banded_dp(M, a1._peak_arrays(), a2._peak_arrays(), D, gap)
+	else:
+		trace = dp(M, gap)["trace"]
 
 	# make composite alignment from the results
-	ma = merge_alignments(a1, a2, result["trace"])
+	ma = merge_alignments(a1, a2, trace)
 
 	# calculate the similarity score
-	ma.similarity = alignment_similarity(result["trace"], M, gap)
+	ma.similarity = alignment_similarity(trace, M, gap)
 
 	return ma
 
 
-def score_matrix(a1: Alignment, a2: Alignment, D: float) -> numpy.ndarray:
+def _pair_similarity(peaks1: _PeakArrays, peaks2: _PeakArrays, D: float, gap: float, banded: bool) -> float:
+	"""
+	Calculates the similarity of the alignment of two alignments from the arrays of their peaks,
+	without merging them.
+
+	The result is the same as the :attr:`~.Alignment.similarity` of the alignment returned by :func:`~.align`.
+
+	:param peaks1: The peaks in the first alignment.
+	:param peaks2: The peaks in the second alignment.
+	:param D: Retention time tolerance in seconds.
+	:param gap: Gap penalty.
+	:param banded: Whether to only consider pairings of alignment positions within the band given by :func:`~.rt_band`.
+	"""
+
+	M = _score_matrix(peaks1, peaks2, D)
+
+	if banded:
+		trace = _banded_dp(M, peaks1, peaks2, D, gap)
+	else:
+		trace = dp(M, gap)["trace"]
+
+	return alignment_similarity(trace, M, gap)
+
+
+def _pair_similarities_parallel(
+		peak_arrays: Sequence[_PeakArrays],
+		pairs: Sequence[Tuple[int, int]],
+		D: float,
+		gap: float,
+		banded: bool,
+		backend: Backend,
+		progress: Callable[[int, int], None],
+		) -> List[float]:
+	"""
+	Calculates the similarities of pairs of alignments in several chunks of pairs for each worker of the backend.
+
+	Each pair is independent, and the similarities are returned in the order of ``pairs``,
+	so the result is the same as calculating them one at a time with :func:`~._pair_similarity`.
+	Where available, and if the workers are on this machine, the mass spectra of all the alignments
+	are placed in shared memory so only the smaller arrays of the peaks are sent to the workers.
+
+	:param peak_arrays: The peaks in each alignment.
+	:param pairs: The indices of the alignments in each pair.
+	:param D: Retention time tolerance in seconds.
+	:param gap: Gap penalty.
+	:param banded: Whether to only consider pairings of alignment positions within the band given by :func:`~.rt_band`.
+	:param backend: The backend to calculate the similarities with.
+	:param progress: A function which is called with the number of pairs which have been aligned
+		and the total number of pairs as each chunk is completed.
+	"""
+
+	# Several chunks per worker, so that the workers finish at about the same time.
+	bounds = numpy.linspace(0, len(pairs), min(4 * backend.n_workers, max(len(pairs), 1)) + 1).astype(int)
+	chunks = [(int(start), pairs[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+	widths = {peaks.spectra.shape[1] for peaks in peak_arrays if peaks.spectra.size}
+	if len(widths) > 1:
+		raise ValueError(
+				"Mass Spectra are of different lengths.\n"
+				"Use `IntensityMatrix.crop_mass()` to set same length for all Mass Spectra"
+				)
+
+	similarities: List[float] = [0.0] * len(pairs)
+
+	shm = None
+
+	try:
+		if shared_memory is None or not backend.local:
+			futures = {
+					backend.submit(_pair_similarities_worker, peak_arrays, chunk, D, gap, banded): start
+					for start, chunk in chunks
+					}
+		else:
+			# The spectra of all the alignments, one after the other.
+			spectra_offsets = numpy.cumsum([0] + [len(peaks.spectra) for peaks in peak_arrays])
+			shape = (int(spectra_offsets[-1]), widths.pop() if widths else 0)
+			shm = shared_memory.SharedMemory(create=True, size=max(shape[0] * shape[1] * 8, 1))
+
+			shared_spectra = numpy.ndarray(shape, dtype='d', buffer=shm.buf)
+			for peaks, offset in zip(peak_arrays, spectra_offsets):
+				shared_spectra[offset:offset + len(peaks.spectra)] = peaks.spectra
+			del shared_spectra
+
+			# The spectra are read from shared memory by the workers.
+			stripped = [peaks._replace(spectra=None) for peaks in peak_arrays]
+
+			futures = {
+					backend.submit(
+							_pair_similarities_shared_worker,
+							shm.name,
+							shape,
+							spectra_offsets,
+							stripped,
+							chunk,
+							D,
+							gap,
+							banded,
+							): start
+					for start, chunk in chunks
+					}
+
+		done = 0
+		for future in as_completed(futures):
+			chunk_similarities = future.result()
+			start = futures[future]
+			similarities[start:start + len(chunk_similarities)] = chunk_similarities
+			done += len(chunk_similarities)
+			progress(done, len(pairs))
+
+		return similarities
+
+	finally:
+		if shm is not None:
+			shm.close()
+			shm.unlink()
+
+
+def _pair_similarities_worker(
+		peak_arrays: Sequence[_PeakArrays],
+		pairs: Sequence[Tuple[int, int]],
+		D: float,
+		gap: float,
+		banded: bool,
+		) -> List[float]:
+	"""
+	Calculates the similarities of the alignments in ``pairs``.
+	"""
+
+	return [_pair_similarity(peak_arrays[i], peak_arrays[j], D, gap, banded) for i, j in pairs]
+
+
+def _pair_similarities_shared_worker(
+		name: str,
+		shape: Tuple[int, int],
+		spectra_offsets: numpy.ndarray,
+		peak_arrays: Sequence[_PeakArrays],
+		pairs: Sequence[Tuple[int, int]],
+		D: float,
+		gap: float,
+		banded: bool,
+		) -> List[float]:
+	"""
+	Calculates the similarities of the alignments in ``pairs``,
+	with the mass spectra read from the array in shared memory ``name``.
+	"""
+
+	shm = _attach_shared_memory(name)
+
+	try:
+		spectra = numpy.ndarray(shape, dtype='d', buffer=shm.buf)
+		peak_arrays = [
+				peaks._replace(spectra=spectra[start:stop])
+				for peaks, start, stop in zip(peak_arrays, spectra_offsets[:-1], spectra_offsets[1:])
+				]
+		similarities = _pair_similarities_worker(peak_arrays, pairs, D, gap, banded)
+		del spectra, peak_arrays
+	finally:
+		shm.close()
+
+	return similarities
+
+
+def score_matrix(
+		a1: Alignment,
+		a2: Alignment,
+		D: float,
+		n_jobs: int = 1,
+		executor: Optional[Executor] = None,
+		) -> numpy.ndarray:
 	"""
 	Calculates the score matrix between two alignments.
 
 	:param a1: The first alignment.
 	:param a2: The second alignment.
 	:param D: Retention time tolerance in seconds.
+	:param n_jobs: The number of worker processes to calculate the score matrix with.
+		``-1`` uses one worker per CPU.
+	:param executor: An optional :class:`concurrent.futures.Executor` or :class:`~pyms.DPA.Backend.Backend`
+		to calculate the score matrix with.
+		If :py:obj:`None` and ``n_jobs`` is greater than ``1`` a
+		:class:`~pyms.DPA.Backend.ProcessPoolBackend` is used.
 
 	:return: Aligned alignments.
 
 	:authors: Qiao Wang, Andrew Isaac
+
+	.. versionchanged:: 2.8.0
+
+		The scores for all pairs of alignment positions are calculated together with array operations,
+		from arrays of the peaks' retention times and mass spectra which are cached by each alignment.
+
+		Added the ``n_jobs`` and ``executor`` arguments. The rows of the score matrix are split into
+		one stripe for each worker, and only the peaks of ``a1`` in each stripe are sent to the worker.
 	"""
 
-	# sim_score = 0
+	backend = get_backend(n_jobs, executor)
 
-	score_matrix = numpy.zeros((len(a1.peakalgt), len(a2.peakalgt)))
+	try:
+		if backend.parallel:
+			return _score_matrix_striped(a1._peak_arrays(), a2._peak_arrays(), D, backend)
+		else:
+			return _score_matrix(a1._peak_arrays(), a2._peak_arrays(), D)
+	finally:
+		if executor is None:
+			backend.shutdown()
 
-	for i, algt1pos in enumerate(a1.peakalgt):
-		for j, algt2pos in enumerate(a2.peakalgt):
-			sim_score = position_similarity(algt1pos, algt2pos, D)
-			score_matrix[i][j] = sim_score
 
-	return score_matrix
+def _score_matrix_striped(peaks1: _PeakArrays, peaks2: _PeakArrays, D: float, backend: Backend) -> numpy.ndarray:
+	"""
+	Calculates the score matrix between two alignments in stripes of rows, one for each worker of the backend.
+
+	Each score only depends on the peaks at the two positions, so the result is the same as :func:`~._score_matrix`.
+
+	:param peaks1: The peaks in the first alignment.
+	:param peaks2: The peaks in the second alignment.
+	:param D: Retention time tolerance in seconds.
+	:param backend: The backend to calculate the stripes with.
+	"""
+
+	n_rows = len(peaks1.counts)
+	bounds = numpy.linspace(0, n_rows, min(backend.n_workers, max(n_rows, 1)) + 1).astype(int)
+
+	futures = [
+			backend.submit(_score_matrix, _peak_arrays_rows(peaks1, start, stop), peaks2, D)
+			for start, stop in zip(bounds[:-1], bounds[1:])
+			if stop > start
+			]
+
+	if not futures:
+		return _score_matrix(peaks1, peaks2, D)
+
+	return numpy.concatenate([future.result() for future in futures], axis=0)
+
+
+def _peak_arrays_rows(peaks: _PeakArrays, start: int, stop: int) -> _PeakArrays:
+	"""
+	Returns the arrays of the peaks at alignment positions ``start`` to ``stop``,
+	with the positions numbered from ``start``.
+
+	:param peaks:
+	:param start:
+	:param stop:
+	"""
+
+	selected = numpy.flatnonzero((peaks.positions >= start) & (peaks.positions < stop))
+
+	return _PeakArrays(
+			positions=peaks.positions[selected] - start,
+			offsets=numpy.searchsorted(selected, peaks.offsets),
+			rts=peaks.rts[selected],
+			spectra=peaks.spectra[selected],
+			sum_squares=peaks.sum_squares[selected],
+			counts=peaks.counts[start:stop],
+			)
+
+
+def _score_matrix(peaks1: _PeakArrays, peaks2: _PeakArrays, D: float) -> numpy.ndarray:
+	"""
+	Calculates the score matrix between two alignments from the arrays of their peaks.
+
+	:param peaks1: The peaks in the first alignment.
+	:param peaks2: The peaks in the second alignment.
+	:param D: Retention time tolerance in seconds.
+	"""
+
+	# Every pair of peaks in each pair of alignment positions is scored, and the mean is taken.
+	# The scores for the peaks from each pair of experiments are calculated for all positions at once,
+	# and added up in the same order as position_similarity() does.
+
+	score_matrix = numpy.zeros((len(peaks1.counts), len(peaks2.counts)))
+
+	if peaks1.spectra.size and peaks2.spectra.size and peaks1.spectra.shape[1] != peaks2.spectra.shape[1]:
+		raise ValueError(
+				"Mass Spectra are of different lengths.\n"
+				"Use `IntensityMatrix.crop_mass()` to set same length for all Mass Spectra"
+				)
+
+	cutoff = D * math.sqrt(-2.0 * math.log(_TOL))
+
+	for start1, end1 in zip(peaks1.offsets[:-1], peaks1.offsets[1:]):
+		positions1 = peaks1.positions[start1:end1]
+		rts1 = peaks1.rts[start1:end1, numpy.newaxis]
+		spectra1 = peaks1.spectra[start1:end1]
+		sum_squares1 = peaks1.sum_squares[start1:end1, numpy.newaxis]
+
+		for start2, end2 in zip(peaks2.offsets[:-1], peaks2.offsets[1:]):
+			rt_diff = rts1 - peaks2.rts[start2:end2]
+
+			top = spectra1 @ peaks2.spectra[start2:end2].T
+			bot = numpy.sqrt(sum_squares1 * peaks2.sum_squares[start2:end2])
+			cos = numpy.divide(top, bot, out=numpy.zeros_like(top), where=bot > 0)
+			rtime = numpy.exp(-(rt_diff / float(D))**2 / 2.0)
+
+			# NB score of 1 is worst
+			scores = numpy.where(numpy.abs(rt_diff) > cutoff, 1.0, 1.0 - (cos * rtime))
+			score_matrix[numpy.ix_(positions1, peaks2.positions[start2:end2])] += scores
+
+	count = numpy.multiply.outer(peaks1.counts, peaks2.counts)
+
+	# NB score of 1 is worst
+	return numpy.divide(score_matrix, count, out=numpy.ones_like(score_matrix), where=count > 0)
 
 
 class DPResult(TypedDict):
@@ -214,21 +579,33 @@ class DPResult(TypedDict):
 	phi: numpy.ndarray
 
 
-def dp(S: numpy.ndarray, gap_penalty: float) -> DPResult:
-	"""
+def dp(
+		S: numpy.ndarray,
+		gap_penalty: float,
+		band: Optional[Tuple[numpy.ndarray, numpy.ndarray]] = None,
+		) -> DPResult:
+	r"""
 	Solves optimal path in score matrix based on global sequence alignment.
 
 	:param S: Score matrix
 	:param gap_penalty: Gap penalty
+	:param band: Optional limits on the cells of the dynamic programming matrix to evaluate.
+		A tuple of two arrays, giving the first and last column (inclusive) to evaluate in each row.
+		The arrays must be non-decreasing, and have one element more than the number of rows of ``S``,
+		with row and column ``0`` corresponding to the gap penalties at the start of the alignment.
+		Cells outside of the band are never part of the path.
+		See :func:`~.rt_band`.
 
 	:return: A dictionary of results
 
 	:author: Tim Erwin
-	"""
 
-	# comm = MPI.COMM_WORLD
-	# rank = comm.Get_rank()
-	# print " In DP.py, I am rank", rank
+	.. versionchanged:: 2.8.0
+
+		* The dynamic programming matrix is filled in one anti-diagonal at a time with array operations.
+		* The trace matrix (``phi``) is stored as ``int8``, and ``trace`` contains :class:`int`\s.
+		* Added the ``band`` argument.
+	"""  # noqa: D301
 
 	try:
 		row_length = len(S[:, 0])
@@ -237,48 +614,94 @@ def dp(S: numpy.ndarray, gap_penalty: float) -> DPResult:
 
 	col_length = len(S[0, :])
 
-	# D contains the score of the optimal alignment
-	D = numpy.zeros((row_length + 1, col_length + 1), dtype='d')
+	if band is None:
+		lower = numpy.zeros(row_length + 1, dtype=numpy.intp)
+		upper = numpy.full(row_length + 1, col_length, dtype=numpy.intp)
+	else:
+		lower, upper = (numpy.asarray(limits, dtype=numpy.intp) for limits in band)
+
+		if lower.shape != (row_length + 1, ) or upper.shape != (row_length + 1, ):
+			raise ValueError("The band must have limits for each row of 'S', and for the initial row")
+		if lower[0] != 0 or upper[-1] != col_length:
+			raise ValueError("The band must include the first and last cells of the matrix")
 
-	for i in range(1, row_length + 1):
-		D[i, 0] = gap_penalty * i
-	for j in range(1, col_length + 1):
-		D[0, j] = gap_penalty * j
+	# D contains the score of the optimal alignment.
+	# Cells outside of the band cannot be reached.
+	D = numpy.full((row_length + 1, col_length + 1), numpy.inf, dtype='d')
 
+	first_row = numpy.arange(upper[0] + 1)
+	D[0, first_row] = gap_penalty * first_row
+	first_column = numpy.flatnonzero(lower == 0)
+	D[first_column, 0] = gap_penalty * first_column
 	D[0, 0] = 0.0
-	D[1:(row_length + 1), 1:(col_length + 1)] = S.copy()
 
 	# Directions for trace
 	# 0 - match               (move diagonal)
 	# 1 - peaks1 has no match (move up)
 	# 2 - peaks2 has no match (move left)
 	# 3 - stop
-	trace_matrix = numpy.zeros((row_length + 1, col_length + 1))
+	trace_matrix = numpy.zeros((row_length + 1, col_length + 1), dtype=numpy.int8)
 	trace_matrix[:, 0] = 1
 	trace_matrix[0, :] = 2
 	trace_matrix[0, 0] = 3
 
-	for i in range(1, row_length + 1):
-		for j in range(1, col_length + 1):
-			#
-			# Needleman-Wunsch Algorithm assuming a score function S(x,x)=0
-			#
-			#              | D[i-1,j-1] + S(i,j)
-			# D[i,j] = min | D(i-1,j] + gap
-			#              | D[i,j-1] + gap
-			#
-
-			darray = [D[i - 1, j - 1] + S[i - 1, j - 1], D[i - 1, j] + gap_penalty, D[i, j - 1] + gap_penalty]
-			D[i, j] = min(darray)
-			# Store direction in trace matrix
-			trace_matrix[i, j] = darray.index(D[i, j])
+	#
+	# Needleman-Wunsch Algorithm assuming a score function S(x,x)=0
+	#
+	#              | D[i-1,j-1] + S(i,j)
+	# D[i,j] = min | D(i-1,j] + gap
+	#              | D[i,j-1] + gap
+	#
+	# Each cell only depends on cells in the previous two anti-diagonals (i + j = constant),
+	# so all the cells of an anti-diagonal are calculated at once.
+	# Within the band, the cells of an anti-diagonal are in a contiguous range of rows.
+
+	rows = numpy.arange(1, row_length + 1)
+	diagonal_start = rows + lower[1:]
+	diagonal_end = rows + upper[1:]
+
+	# The cells of an anti-diagonal are evenly spaced in the flattened matrices,
+	# so they can be accessed with slices.
+	D_flat = D.ravel()
+	S_flat = numpy.ascontiguousarray(S, dtype='d').ravel()
+	trace_flat = trace_matrix.ravel()
+	width = col_length + 1
+	S_step = max(col_length - 1, 1)
+
+	for diagonal in range(2, row_length + col_length + 1):
+		first = max(numpy.searchsorted(diagonal_end, diagonal) + 1, diagonal - col_length)
+		last = min(numpy.searchsorted(diagonal_start, diagonal, side="right"), diagonal - 1)
+
+		if first > last:
+			continue
+
+		# Index of cell (first, diagonal - first) in D, and of cell (first - 1, diagonal - first - 1) in S
+		start = first * col_length + diagonal
+		stop = last * col_length + diagonal + 1
+		S_start = first * (col_length - 1) + diagonal - col_length - 1
+
+		match = D_flat[start - width - 1:stop - width - 1:col_length] + S_flat[S_start::S_step][:last - first + 1]
+		gap1 = D_flat[start - width:stop - width:col_length] + gap_penalty
+		gap2 = D_flat[start - 1:stop - 1:col_length] + gap_penalty
+
+		# Store direction in trace matrix.
+		# Where there is a tie the first direction is used.
+		D_flat[start:stop:col_length] = numpy.minimum(numpy.minimum(match, gap1), gap2)
+		trace_flat[start:stop:col_length] = numpy.where(
+				(match <= gap1) & (match <= gap2),
+				0,
+				numpy.where(gap1 <= gap2, 1, 2),
+				)
+
+	if numpy.isinf(D[row_length, col_length]):
+		raise ValueError("The band does not connect the first and last cells of the matrix")
 
 	# Trace back from bottom right
 	trace = []
 	matches = []
 	i = row_length
 	j = col_length
-	direction = trace_matrix[i, j]
+	direction = int(trace_matrix[i, j])
 	p = [row_length - 1]
 	q = [col_length - 1]
 
@@ -295,7 +718,7 @@ def dp(S: numpy.ndarray, gap_penalty: float) -> DPResult:
 		p.append(i - 1)
 		q.append(j - 1)
 		trace.append(direction)
-		direction = trace_matrix[i, j]
+		direction = int(trace_matrix[i, j])
 
 	# remove 'stop' entry
 	p.pop()
@@ -309,6 +732,117 @@ def dp(S: numpy.ndarray, gap_penalty: float) -> DPResult:
 	return {'p': p, 'q': q, "trace": trace, "matches": matches, 'D': D, "phi": trace_matrix}
 
 
+def rt_band(a1: Alignment, a2: Alignment, D: float, margin: float = 120.0) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Returns a band of the dynamic programming matrix for two alignments, based on the retention times of the positions.
+
+	Cell ``(i, j)`` of the dynamic programming matrix is the state where the first ``i`` positions of ``a1``
+	and the first ``j`` positions of ``a2`` have been aligned. The band excludes the states where a position
+	from one alignment has been aligned while a position from the other alignment, with a retention time earlier by
+	more than the retention time cutoff of :func:`~.score_matrix` plus ``margin``, has not.
+
+	The ``margin`` allows for runs of positions which are only present in one of the alignments,
+	where the order of the gaps does not affect the score.
+	Pairs of positions outside of the band score ``1``, so the optimal alignment may leave the band
+	if the gap penalty is ``0.5`` or more.
+
+	:param a1: The first alignment.
+	:param a2: The second alignment.
+	:param D: Retention time tolerance in seconds.
+	:param margin: Additional retention time window in seconds.
+
+	:return: The first and last column to evaluate in each row of the dynamic programming matrix,
+		in the form accepted by :func:`~.dp`.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	return _rt_band(a1._peak_arrays(), a2._peak_arrays(), D, margin)
+
+
+def _rt_band(
+		peaks1: _PeakArrays,
+		peaks2: _PeakArrays,
+		D: float,
+		margin: float = 120.0,
+		) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Returns the band of the dynamic programming matrix for two alignments from the arrays of their peaks.
+
+	:param peaks1: The peaks in the first alignment.
+	:param peaks2: The peaks in the second alignment.
+	:param D: Retention time tolerance in seconds.
+	:param margin: Additional retention time window in seconds.
+	"""
+
+	window = D * math.sqrt(-2.0 * math.log(_TOL)) + margin
+
+	# The average retention time of each position.
+	# Positions are sorted by their average retention time, but enforce this for the binary searches below.
+	mean_rts = []
+	for peaks in (peaks1, peaks2):
+		rt_sums = numpy.bincount(peaks.positions, weights=peaks.rts, minlength=len(peaks.counts))
+		mean_rts.append(numpy.maximum.accumulate(rt_sums / peaks.counts))
+
+	rts1, rts2 = mean_rts
+
+	# Positions of a2 up to 'window' after the next unaligned position of a1 may have been aligned
+	upper = numpy.searchsorted(rts2, numpy.append(rts1, numpy.inf) + window, side="right")
+
+	# Positions of a2 more than 'window' before the last aligned position of a1 must have been aligned
+	lower = numpy.searchsorted(rts2, numpy.insert(rts1, 0, -numpy.inf) - window, side="left")
+
+	lower[0] = 0
+	upper[-1] = len(rts2)
+
+	return lower, numpy.maximum(upper, lower)
+
+
+def _banded_dp(M: numpy.ndarray, peaks1: _PeakArrays, peaks2: _PeakArrays, D: float, gap: float) -> List[int]:
+	"""
+	Returns the trace back of :func:`~.dp` for two alignments, only evaluating the band given by :func:`~.rt_band`.
+
+	The trace back is the same as without the band, provided the optimal alignment
+	does not pair positions outside of the band.
+
+	:param M: The score matrix of the two alignments.
+	:param peaks1: The peaks in the first alignment.
+	:param peaks2: The peaks in the second alignment.
+	:param D: Retention time tolerance in seconds.
+	:param gap: Gap penalty.
+	"""
+
+	if gap >= 0.5:
+		# Pairing positions outside of the band, which scores 1, is no worse than two gaps,
+		# so the optimal alignment may leave the band.
+		return dp(M, gap)["trace"]
+
+	trace = dp(M, gap, _rt_band(peaks1, peaks2, D))["trace"]
+
+	# Between two matched positions all orders of the gaps have the same score,
+	# and the band may exclude the order chosen without it. Without the band the
+	# gaps in the second alignment come first, except before the first match where
+	# the order depends on the rounding of the gap penalties in the first row and column.
+	ordered: List[int] = []
+	run: List[int] = []
+
+	for direction in trace + [0]:
+		if direction:
+			run.append(direction)
+			continue
+
+		if ordered:
+			run.sort(reverse=True)
+		elif 0 < run.count(1) < len(run):
+			run = dp(numpy.full((run.count(1), run.count(2)), numpy.inf), gap)["trace"]
+
+		ordered.extend(run)
+		ordered.append(0)
+		run = []
+
+	return ordered[:-1]
+
+
 def position_similarity(pos1: List[Peak], pos2: List[Peak], D: float) -> float:
 	"""
 	Calculates the similarity between the two alignment positions.
@@ -328,8 +862,6 @@ def position_similarity(pos1: List[Peak], pos2: List[Peak], D: float) -> float:
 	count = 0
 
 	# Attempt to speed up by only calculating 'in-range' values
-	# set tolerance to 1/1000
-	_TOL = 0.001
 	cutoff = D * math.sqrt(-2.0 * math.log(_TOL))
 
 	for a in pos1:
@@ -390,53 +922,94 @@ def merge_alignments(A1: Alignment, A2: Alignment, traces: List[int]) -> Alignme
 	:return: A single alignment from ``A1`` and ``A2``.
 
 	:authors: Woon Wai Keen, Vladimir Likic, Qiao Wang
-	"""
 
-	# Create object to hold new merged alignment and fill in its expr_codes
-	ma = Alignment(None)
-	ma.expr_code = A1.expr_code + A2.expr_code
+	.. versionchanged:: 2.8.0
 
-	# create empty lists of dimension |A1| + |A2|
-	dimension = len(A1.peakpos) + len(A2.peakpos)
-	merged: List[List[Peak]] = [[] for _ in range(dimension)]
+		The alignments are merged with array operations on their indices,
+		and the merged alignment shares the tables of peaks of ``A1`` and ``A2``.
+	"""
 
-	idx1 = idx2 = 0
+	tables = A1._tables + A2._tables
+	index = _merge_index(A1._index, A2._index, traces, [table.rts for table in tables])
 
-	# trace can either be 0, 1, or 2
-	# if it is 0, there are no gaps. otherwise, if it is 1 or 2,
-	# there is a gap in A2 or A1 respectively.
+	return Alignment._from_index(tables, index, A1.expr_code + A2.expr_code)
 
-	for trace in traces:
 
-		if trace in {0, 1}:
-			for i, _ in enumerate(A1.peakpos):
-				merged[i].append(A1.peakpos[i][idx1])
+def _merge_index(
+		index1: numpy.ndarray,
+		index2: numpy.ndarray,
+		traces: Sequence[int],
+		rts: Sequence[numpy.ndarray],
+		) -> numpy.ndarray:
+	"""
+	Merges the indices of two alignments with gaps added in from DP traceback,
+	and sorts the positions by their average retention time.
 
-			idx1 = idx1 + 1
+	:param index1: The index of the peaks from each experiment at each position of the first alignment.
+	:param index2: The index of the peaks from each experiment at each position of the second alignment.
+	:param traces: DP traceback.
+	:param rts: The retention times of the peaks from each experiment in the merged alignment.
+	"""
 
-		elif trace == 2:
-			for i, _ in enumerate(A1.peakpos):
-				merged[i].append(None)  # type: ignore[arg-type]
+	# trace can either be 0, 1, or 2
+	# if it is 0, there are no gaps. otherwise, if it is 1 or 2,
+	# there is a gap in A2 or A1 respectively.
+	traces = numpy.asarray(traces, dtype=numpy.intp)
+	from_1 = traces != 2
+	from_2 = traces != 1
+
+	index = numpy.full((len(index1) + len(index2), len(traces)), -1, dtype=numpy.int32)
+	index[:len(index1), from_1] = index1[:, :numpy.count_nonzero(from_1)]
+	index[len(index1):, from_2] = index2[:, :numpy.count_nonzero(from_2)]
+
+	# sort according to average peak, as alignment_compare() does.
+	# The retention times are added up in the order of the experiments.
+	rt_sums = numpy.zeros(len(traces))
+	for expr_rts, rows in zip(rts, index):
+		present = rows >= 0
+		rt_sums[present] += expr_rts[rows[present]]
+
+	avg_rts = rt_sums / numpy.count_nonzero(index >= 0, axis=0)
+
+	return index[:, numpy.argsort(avg_rts, kind="stable")]
+
+
+def _align_index(
+		peaks1: _PeakArrays,
+		index1: numpy.ndarray,
+		peaks2: _PeakArrays,
+		index2: numpy.ndarray,
+		rts: Sequence[numpy.ndarray],
+		D: float,
+		gap: float,
+		banded: bool,
+		) -> Tuple[numpy.ndarray, float]:
+	"""
+	Aligns two alignments from the arrays of their peaks and their indices.
 
-		# ---
+	This is the same as :func:`~.align`, but only the arrays are sent to worker processes,
+	rather than the alignments and their peaks.
 
-		if trace in {0, 2}:
-			for j, peak in enumerate(A2.peakpos):
-				merged[1 + i + j].append(peak[idx2])
+	:param peaks1: The peaks in the first alignment.
+	:param index1: The index of the peaks from each experiment at each position of the first alignment.
+	:param peaks2: The peaks in the second alignment.
+	:param index2: The index of the peaks from each experiment at each position of the second alignment.
+	:param rts: The retention times of the peaks from each experiment in the merged alignment.
+	:param D: Retention time tolerance in seconds.
+	:param gap: Gap penalty.
+	:param banded: Whether to only consider pairings of alignment positions within the band given by :func:`~.rt_band`.
 
-			idx2 = idx2 + 1
+	:return: The index of the merged alignment, and the similarity score.
+	"""
 
-		elif trace == 1:
-			for j, _ in enumerate(A2.peakpos):
-				merged[1 + i + j].append(None)  # type: ignore[arg-type]
+	M = _score_matrix(peaks1, peaks2, D)
 
-	ma.peakalgt = numpy.transpose(merged)  # type: ignore[assignment, arg-type]
-	# sort according to average peak
-	ma.peakalgt = list(ma.peakalgt)
-	ma.peakalgt.sort(key=functools.cmp_to_key(alignment_compare))
-	ma.peakpos = numpy.transpose(ma.peakalgt)  # type: ignore[arg-type, assignment]
+	if banded:
+		trace = _banded_dp(M, peaks1, peaks2, D, gap)
+	else:
+		trace = dp(M, gap)["trace"]
 
-	return ma
+	return _merge_index(index1, index2, trace, rts), alignment_similarity(trace, M, gap)
 
 
 def alignment_similarity(traces: List[int], score_matrix: numpy.ndarray, gap: float) -> float:
@@ -497,6 +1070,12 @@ def alignment_compare(x, y) -> int:  # noqa: MAN001
 		return 1
 
 
+@deprecation.deprecated(
+		deprecated_in="2.8.0",
+		removed_in="3.0.0",
+		current_version=__version__,
+		details="Use :func:`pyms.DPA.PairwiseAlignment.score_matrix` with the ``n_jobs`` or ``executor`` arguments instead",
+		)
 def score_matrix_mpi(a1: Alignment, a2: Alignment, D: float) -> numpy.ndarray:
 	"""
 	Calculates the score matrix between two alignments.
@@ -508,77 +1087,48 @@ def score_matrix_mpi(a1: Alignment, a2: Alignment, D: float) -> numpy.ndarray:
 	:return: Aligned alignments
 
 	:authors: Qiao Wang, Andrew Isaac
-	"""
-
-	# sim_score = 0
-
-	comm = MPI.COMM_WORLD
-	rank = comm.Get_rank()
-	size = comm.Get_size()
-
-	portion = int(float(len(a1.peakalgt)) / size)
-
-	# print("length of a1.peakalgt =", len(a1.peakalgt))
-	# print("portion size = ", portion)
-
-	# if rank == 0:
-	score_matrix = numpy.zeros((len(a1.peakalgt), len(a2.peakalgt)))
-
-	if rank < size - 1:  # if it's not the last slice
-		score_matrix_part = numpy.zeros((portion, len(a2.peakalgt)))
-		a1_part = a1.peakalgt[rank * portion:(rank + 1) * portion]
-	else:  # if it's the last strip, prob not full portion
-		score_matrix_part = numpy.zeros((
-				len(a1.peakalgt) - (rank * portion),
-				len(a2.peakalgt),
-				))
-		a1_part = a1.peakalgt[rank * portion:len(a1.peakalgt)]
 
-	for i, algt1pos in enumerate(a1_part):
-		for j, algt2pos in enumerate(a2.peakalgt):
-			sim_score = position_similarity(algt1pos, algt2pos, D)
-			score_matrix_part[i][j] = sim_score
+	.. versionchanged:: 2.8.0
 
-	if rank == 0:
-		score_matrix[0:portion] = score_matrix_part
-		for i in range(1, size):
-			if i == size - 1:
-				recv_buffer = numpy.zeros((len(a1.peakalgt) - (i * portion), len(a2.peakalgt)))
-				comm.Recv(recv_buffer, i)
-				score_matrix[i * portion:len(a1.peakalgt)] = recv_buffer
-			else:
-				recv_buffer = numpy.zeros((portion, len(a2.peakalgt)))
-				comm.Recv(recv_buffer, i)
-				score_matrix[i * portion:(i + 1) * portion] = recv_buffer
-
-	# print("I am rank 0, done!", score_matrix)
-
-	else:
-		# all other process send their result
-		comm.Send(score_matrix_part)
-
-	outputs = []
-	if rank == 0:
-		for rank in range(size):
-			# print rank
-			outputs.append(score_matrix)
-
-	score_matrix = comm.scatter(outputs, root=0)
+		The score matrix is calculated by :func:`~.score_matrix` in each process, and ``mpi4py`` is not required.
+		An ``MPIPoolExecutor`` from ``mpi4py.futures`` can be passed to :func:`~.score_matrix` as the ``executor``
+		to divide the rows of the score matrix between MPI processes.
+	"""
 
-	# print("before return, rank", rank)
-	return score_matrix
+	return score_matrix(a1, a2, D)
 
 
-def align_with_tree(T: PairwiseAlignment, min_peaks: int = 1) -> Alignment:
+def align_with_tree(
+		T: PairwiseAlignment,
+		min_peaks: int = 1,
+		n_jobs: int = 1,
+		executor: Optional[Executor] = None,
+		) -> Alignment:
 	"""
 	Aligns a list of alignments using the supplied guide tree.
 
 	:param T: The pairwise alignment object.
 	:param min_peaks:
+	:param n_jobs: The number of worker processes to align independent subtrees of the guide tree with.
+		``-1`` uses one worker per CPU.
+	:param executor: An optional :class:`concurrent.futures.Executor` or :class:`~pyms.DPA.Backend.Backend`
+		to align independent subtrees of the guide tree with.
+		If :py:obj:`None` and ``n_jobs`` is greater than ``1`` a
+		:class:`~pyms.DPA.Backend.ProcessPoolBackend` is used.
 
 	:return: The final alignment consisting of aligned input alignments.
 
 	:authors: Woon Wai Keen, Vladimir Likic
+
+	.. versionchanged:: 2.8.0
+
+		Added the ``n_jobs`` and ``executor`` arguments.
+		Each node of the guide tree is aligned as soon as both of its children have been,
+		with up to one node for each worker being aligned at a time.
+		The alignment of each node is discarded once its parent has been aligned.
+
+		The alignments in ``T`` are no longer copied, so the peaks in the returned alignment
+		are the same objects as the peaks in ``T.alignments``.
 	"""
 
 	print(f" Aligning {len(T.alignments):d} items with guide tree (D={T.D:.2f}, gap={T.gap:.2f})")
@@ -590,22 +1140,12 @@ def align_with_tree(T: PairwiseAlignment, min_peaks: int = 1) -> Alignment:
 	#   nodes are numbered {-1, ... , -(n-1)}. Note that the number of nodes
 	#   is one less than the number of items.
 
-	# extend As to length 2n to hold the n items, n-1 nodes, and 1 root
-	As_padding = [None for _ in range(len(T.alignments))]
-	As: List[Alignment] = copy.deepcopy(T.alignments) + As_padding  # type: ignore[operator]
+	if not len(T.tree):
+		# A single item. Copy it so filtering it does not change the input alignment.
+		final_algt = copy.copy(T.alignments[0])
 
-	# align the alignments into positions -1, ... ,-(n-1)
-	total = len(T.tree)
-	index = 0
-
-	for node in T.tree[:]:
-		index = index - 1
-		As[index] = align(As[node.left], As[node.right], T.D, T.gap)
-		total = total - 1
-		print(f" -> {total:d} item(s) remaining")
-
-	# the final alignment is in the root. Filter min peaks and return
-	final_algt: Alignment = As[index]
+	else:
+		final_algt = _align_tree_nodes(T, get_backend(n_jobs, executor), own_backend=executor is None)
 
 	# useful for within state alignment only
 	if min_peaks > 1:
@@ -614,53 +1154,88 @@ def align_with_tree(T: PairwiseAlignment, min_peaks: int = 1) -> Alignment:
 	return final_algt
 
 
-#
-# def align_with_tree_mpi(T: Alignment, min_peaks: int = 1) -> Alignment:
-# 	"""
-# 	Aligns a list of alignments using the supplied guide tree
-#
-# 	:param T: The pairwise alignment object
-# 	:param min_peaks:
-#
-# 	:return: The final alignment consisting of aligned input alignments
-#
-# 	:authors: Woon Wai Keen, Vladimir Likic
-# 	"""
-#
-# 	try:
-# 		rank = MPI.COMM_WORLD.Get_rank()
-# 	except:
-# 		rank = 0
-#
-# 	if rank == 0:
-# 		print(f" Aligning {len(T.alignments):d} items with guide tree (D={T.D:.2f}, gap={T.gap:.2f})")
-#
-# 	# For everything else, we align according to the guide tree provided by
-# 	# Pycluster. From Pycluster documentation:
-# 	#   Each item and subnode is represented by an integer. For hierarchical
-# 	#   clustering of n items, we number the original items {0, ... , n-1},
-# 	#   nodes are numbered {-1, ... , -(n-1)}. Note that the number of nodes
-# 	#   is one less than the number of items.
-#
-# 	# extend As to length 2n to hold the n items, n-1 nodes, and 1 root
-# 	As = copy.deepcopy(T.alignments) + [None for _ in range(len(T.alignments))]
-#
-# 	# align the alignments into positions -1, ... ,-(n-1)
-# 	total = len(T.tree)
-# 	index = 0
-#
-# 	for node in T.tree[:]:
-# 		index = index - 1
-# 		As[index] = align(As[node.left], As[node.right], T.D, T.gap)
-# 		total = total - 1
-# 		if rank == 0:
-# 			print(f" -> {total:d} item(s) remaining")
-#
-# 	# the final alignment is in the root. Filter min peaks and return
-# 	final_algt = As[index]
-#
-# 	# useful for within state alignment only
-# 	if min_peaks > 1:
-# 		final_algt.filter_min_peaks(min_peaks)
-#
-# 	return final_algt
+def _align_tree_nodes(T: PairwiseAlignment, backend: Backend, own_backend: bool = False) -> Alignment:
+	"""
+	Aligns the nodes of the guide tree of ``T``, and returns the alignment of the root.
+
+	Each node only depends on the nodes below it, so a node is aligned as soon as both of its children have been.
+	The nodes which are ready are aligned in the order they were created by the clustering,
+	so with a single worker the nodes are aligned in the same order as the guide tree.
+
+	:param T: The pairwise alignment object.
+	:param backend: The backend to align the nodes with.
+	:param own_backend: Whether to shut down the backend afterwards.
+	"""
+
+	# The alignments of the items, and of the nodes whose parents have not yet been aligned.
+	alignments: Dict[int, Alignment] = dict(enumerate(T.alignments))
+
+	# The parent of each item and node, and the number of each node's children which have not yet been aligned.
+	parents: Dict[int, int] = {}
+	pending: List[int] = []
+
+	# The nodes whose children have been aligned, as a heap.
+	ready: List[int] = []
+
+	for node_idx, node in enumerate(T.tree[:]):
+		parents[node.left] = parents[node.right] = node_idx
+		pending.append(int(node.left < 0) + int(node.right < 0))
+		if not pending[node_idx]:
+			heapq.heappush(ready, node_idx)
+
+	total = len(pending)
+	running: Dict[Future, Tuple[int, Alignment, Alignment]] = {}
+
+	try:
+		while ready or running:
+			while ready and len(running) < backend.n_workers:
+				node_idx = heapq.heappop(ready)
+				node = T.tree[node_idx]
+
+				# The children are only needed until the node has been aligned.
+				# Only the arrays of their peaks are sent to the workers.
+				left, right = alignments.pop(node.left), alignments.pop(node.right)
+				future = backend.submit(
+						_align_index,
+						left._peak_arrays(),
+						left._index,
+						right._peak_arrays(),
+						right._index,
+						[table.rts for table in left._tables + right._tables],
+						T.D,
+						T.gap,
+						T.banded,
+						)
+				running[future] = (node_idx, left, right)
+				del left, right
+
+			finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+			for future in sorted(finished, key=lambda f: running[f][0]):
+				node_idx, left, right = running.pop(future)
+				node_id = -node_idx - 1
+
+				index, similarity = future.result()
+				alignments[node_id] = Alignment._from_index(
+						left._tables + right._tables,
+						index,
+						left.expr_code + right.expr_code,
+						)
+				alignments[node_id].similarity = similarity
+				del left, right
+
+				total = total - 1
+				print(f" -> {total:d} item(s) remaining")
+
+				if node_id in parents:
+					parent_idx = parents[node_id]
+					pending[parent_idx] -= 1
+					if not pending[parent_idx]:
+						heapq.heappush(ready, parent_idx)
+
+	finally:
+		if own_backend:
+			backend.shutdown()
+
+	# the final alignment is in the root
+	return alignments[-len(pending)]
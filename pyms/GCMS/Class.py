@@ -27,7 +27,7 @@ Class to model GC-MS data.
 import copy
 import pathlib
 from statistics import mean, median, stdev
-from typing import List, Optional, Sequence, TypeVar, cast
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union, cast
 
 # 3rd party
 import numpy
@@ -39,7 +39,7 @@ from pyms.Base import pymsBaseClass
 from pyms.IonChromatogram import IonChromatogram
 from pyms.Mixins import GetIndexTimeMixin, MaxMinMassMixin, TimeListMixin
 from pyms.Spectrum import MassSpectrum, Scan
-from pyms.Utils.IO import prepare_filepath
+from pyms.Utils.IO import _read_npz, _write_npz, prepare_filepath
 from pyms.Utils.Time import time_str_secs
 from pyms.Utils.Utils import _number_types, is_path, is_sequence_of, signedinteger
 
@@ -57,13 +57,26 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 
 	Contains the raw data as a list of scans and a list of times.
 
+	Internally the scans are stored in columnar form, as a single contiguous array of *m/z* values,
+	a single array of intensities, and the offset of each scan in those arrays
+	(the same layout as the ``mass_values``, ``intensity_values`` and ``point_count``
+	variables of an ANDI-MS file). :class:`~pyms.Spectrum.Scan` objects are created on demand.
+
 	:param time_list: Scan retention times.
 	:param scan_list:
 
 	:authors: Qiao Wang, Andrew Isaac, Vladimir Likic,
 		Dominic Davis-Foster (type assertions and properties)
+
+	.. versionchanged:: 2.8.0
+
+		The scans are stored as contiguous arrays rather than a list of :class:`~pyms.Spectrum.Scan` objects.
 	"""
 
+	_mass_values: numpy.ndarray
+	_intensity_values: numpy.ndarray
+	_scan_offsets: numpy.ndarray
+
 	def __init__(self, time_list: Sequence[float], scan_list: Sequence[Scan]):
 		if not is_sequence_of(time_list, _number_types):
 			raise TypeError("'time_list' must be a Sequence of numbers")
@@ -71,12 +84,109 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 		if not is_sequence_of(scan_list, Scan):
 			raise TypeError("'scan_list' must be a Sequence of Scan objects")
 
+		point_counts = [len(scan) for scan in scan_list]
+
+		if scan_list:
+			mass_values = numpy.concatenate([numpy.asarray(scan._mass_list, dtype=numpy.float64) for scan in scan_list])
+			intensity_values = numpy.concatenate([
+					numpy.asarray(scan._intensity_list, dtype=numpy.float64) for scan in scan_list
+					])
+		else:
+			mass_values = numpy.empty(0)
+			intensity_values = numpy.empty(0)
+
+		self._set_arrays(time_list, mass_values, intensity_values, point_counts)
+
+	@classmethod
+	def from_arrays(
+			cls,
+			time_list: Sequence[float],
+			mass_values: Union[Sequence[float], numpy.ndarray],
+			intensity_values: Union[Sequence[float], numpy.ndarray],
+			point_counts: Union[Sequence[int], numpy.ndarray],
+			) -> "GCMS_data":
+		"""
+		Construct a :class:`~.GCMS_data` object from columnar arrays.
+
+		The *m/z* and intensity values of all scans are given end to end,
+		with ``point_counts`` giving the number of data points in each scan.
+
+		:param time_list: Scan retention times.
+		:param mass_values: The *m/z* values of every scan, concatenated.
+		:param intensity_values: The intensity values of every scan, concatenated.
+		:param point_counts: The number of data points in each scan.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		if not is_sequence_of(time_list, _number_types):
+			raise TypeError("'time_list' must be a Sequence of numbers")
+
+		mass_values = numpy.asarray(mass_values, dtype=numpy.float64)
+		intensity_values = numpy.asarray(intensity_values, dtype=numpy.float64)
+		point_counts = numpy.asarray(point_counts, dtype=numpy.intp)
+
+		if len(mass_values) != len(intensity_values):
+			raise ValueError("The lengths of the mass and intensity lists differ!")
+
+		if len(point_counts) != len(time_list):
+			raise ValueError("number of time points does not equal the number of scans")
+
+		if point_counts.sum() != len(mass_values):
+			raise ValueError("The sum of 'point_counts' does not equal the number of data points")
+
+		data = cls.__new__(cls)
+		data._set_arrays(time_list, mass_values, intensity_values, point_counts)
+		return data
+
+	def _set_arrays(
+			self,
+			time_list: Sequence[float],
+			mass_values: numpy.ndarray,
+			intensity_values: numpy.ndarray,
+			point_counts: Union[Sequence[int], numpy.ndarray],
+			) -> None:
+		"""
+		Sets the columnar data arrays and recalculates the derived properties.
+
+		:param time_list: Scan retention times.
+		:param mass_values: The *m/z* values of every scan, concatenated.
+		:param intensity_values: The intensity values of every scan, concatenated.
+		:param point_counts: The number of data points in each scan.
+		"""
+
+		scan_offsets = numpy.zeros(len(point_counts) + 1, dtype=numpy.intp)
+		numpy.cumsum(point_counts, out=scan_offsets[1:])
+
 		self._time_list = list(time_list)
-		self._scan_list = list(scan_list)
+		self._mass_values = mass_values
+		self._intensity_values = intensity_values
+		self._scan_offsets = scan_offsets
+		self._sort_scans()
 		self._set_time()
 		self._set_min_max_mass()
 		self._calc_tic()
 
+	def _sort_scans(self) -> None:
+		"""
+		Ensure the *m/z* values within each scan are in ascending order.
+
+		Scans in descending order are reversed, matching the behaviour of :class:`~pyms.Spectrum.Scan`.
+		"""
+
+		self._mass_values, self._intensity_values = _sort_scan_points(
+				self._mass_values,
+				self._intensity_values,
+				self._scan_offsets,
+				)
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		if "_scan_list" in state:
+			# Object pickled before the switch to columnar storage
+			self.__init__(state["_time_list"], state["_scan_list"])  # type: ignore[misc]
+		else:
+			self.__dict__.update(state)
+
 	def __eq__(self, other) -> bool:  # noqa: MAN001
 		"""
 		Return whether this GCMS_data object is equal to another object.
@@ -85,7 +195,22 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 		"""
 
 		if isinstance(other, self.__class__):
-			return self.scan_list == other.scan_list and self.time_list == other.time_list
+			if not (
+					self._time_list == other._time_list
+					and numpy.array_equal(self._scan_offsets, other._scan_offsets)
+					):
+				return False
+
+			# Compare block by block, so data read from disk on demand is never all in memory at once
+			for first_scan, mass_values, intensity_values, point_counts in self._iter_chunks():
+				other_mass_values, other_intensity_values = other._read_range(first_scan, first_scan + len(point_counts))
+				if not (
+						numpy.array_equal(mass_values, other_mass_values)
+						and numpy.array_equal(intensity_values, other_intensity_values)
+						):
+					return False
+
+			return True
 
 		return NotImplemented
 
@@ -96,7 +221,7 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 		:author: Vladimir Likic
 		"""
 
-		return len(self._scan_list)
+		return len(self._time_list)
 
 	def __repr__(self) -> str:
 		return f"<GCMS_data({self.min_rt} - {self.max_rt} seconds, time step {self.time_step}, {len(self)} scans)>"
@@ -111,10 +236,12 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 		:authors: Qiao Wang, Andrew Isaac, Vladimir Likic
 		"""
 
-		intensities = []
-		for scan in self._scan_list:
-			intensities.append(sum(scan.intensity_list))
-		ia = numpy.array(intensities)
+		# bincount sums in input order, giving the same result as summing each scan in turn
+		ia = numpy.bincount(
+				self._scan_indices(),
+				weights=self._intensity_values,
+				minlength=len(self._time_list),
+				)
 		rt = copy.deepcopy(self._time_list)
 		tic = IonChromatogram(ia, rt)
 
@@ -155,23 +282,19 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 		:authors: Qiao Wang, Andrew Isaac, Vladimir Likic
 		"""
 
-		min_mass = None
-		max_mass = None
-
-		for scan in self._scan_list:
-
-			if min_mass is None:
-				min_mass = scan.min_mass
-			elif scan.min_mass is not None:
-				min_mass = min(scan.min_mass, min_mass)
+		if self._mass_values.size:
+			self._min_mass = self._mass_values.min()
+			self._max_mass = self._mass_values.max()
+		else:
+			self._min_mass = None
+			self._max_mass = None
 
-			if max_mass is None:
-				max_mass = scan.max_mass
-			elif scan.max_mass is not None:
-				max_mass = max(scan.max_mass, max_mass)
+	def _scan_indices(self) -> numpy.ndarray:
+		"""
+		Returns the index of the scan each data point belongs to.
+		"""
 
-		self._min_mass = min_mass
-		self._max_mass = max_mass
+		return numpy.repeat(numpy.arange(len(self._time_list), dtype=numpy.intp), self.point_counts)
 
 	def info(self, print_scan_n: bool = False) -> None:
 		"""
@@ -185,17 +308,14 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 		# print the summary of simply attributes
 		print(f" Data retention time range: {self._min_rt / 60.0:.3f} min -- {self._max_rt / 60:.3f} min")
 		print(f" Time step: {self._time_step:.3f} s (std={self._time_step_std:.3f} s)")
-		print(f" Number of scans: {len(self._scan_list):d}")
-		print(f" Minimum m/z measured: {self._min_mass:.3f}")
-		print(f" Maximum m/z measured: {self._max_mass:.3f}")
+		print(f" Number of scans: {len(self):d}")
+		print(f" Minimum m/z measured: {self.min_mass:.3f}")
+		print(f" Maximum m/z measured: {self.max_mass:.3f}")
 
 		# calculate median number of m/z values measured per scan
-		n_list = []
-		for ii in range(len(self._scan_list)):
-			scan = self._scan_list[ii]
-			n = len(scan)
-			n_list.append(n)
-			if print_scan_n:
+		n_list = self.point_counts.tolist()
+		if print_scan_n:
+			for n in n_list:
 				print(n)
 		mz_mean = mean(n_list)
 		mz_median = median(n_list)
@@ -210,7 +330,45 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 		:authors: Qiao Wang, Andrew Isaac, Vladimir Likic
 		"""
 
-		return copy.deepcopy(self._scan_list)
+		return list(self.iter_scans())
+
+	def iter_scans(self) -> Iterator[Scan]:
+		"""
+		Iterate over the scans, creating each :class:`~pyms.Spectrum.Scan` object only when it is requested.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		for ix in range(len(self)):
+			yield self.get_scan_at_index(ix)
+
+	def get_scan_at_index(self, ix: int) -> Scan:
+		"""
+		Returns the scan at the given index.
+
+		:param ix: The index of the scan.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		if not isinstance(ix, (int, signedinteger)):
+			raise TypeError("'ix' must be an integer")
+
+		if ix < 0 or ix >= len(self):
+			raise IndexError("index out of range")
+
+		start, stop = self._scan_offsets[ix], self._scan_offsets[ix + 1]
+		return Scan(self._mass_values[start:stop], self._intensity_values[start:stop])
+
+	@property
+	def point_counts(self) -> numpy.ndarray:
+		"""
+		Returns the number of data points in each scan.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		return numpy.diff(self._scan_offsets)
 
 	@property
 	def time_list(self) -> List[float]:
@@ -290,7 +448,7 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 		if begin is None and end is None:
 			raise SyntaxError("At least one of 'begin' and 'end' is required")
 
-		N = len(self._scan_list)
+		N = len(self)
 
 		# process 'begin' and 'end'
 		if begin is None:
@@ -329,22 +487,51 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 
 		print(f"Trimming data to between {first_scan + 1:d} and {last_scan + 1:d} scans")
 
-		scan_list_new = []
-		time_list_new = []
-		for ii in range(len(self._scan_list)):
-			if first_scan <= ii <= last_scan:
-				scan = self._scan_list[ii]
-				time = self._time_list[ii]
-				scan_list_new.append(scan)
-				time_list_new.append(time)
+		self._trim_scans(first_scan, last_scan)
+
+	def _trim_scans(self, first_scan: int, last_scan: int) -> None:
+		"""
+		Discard the scans before ``first_scan`` and after ``last_scan``.
+
+		:param first_scan: The index of the first scan to keep.
+		:param last_scan: The index of the last scan to keep.
+		"""
+
+		start = self._scan_offsets[first_scan]
+		stop = self._scan_offsets[last_scan + 1]
 
 		# update info
-		self._scan_list = scan_list_new
-		self._time_list = time_list_new
+		self._time_list = self._time_list[first_scan:last_scan + 1]
+		self._mass_values = self._mass_values[start:stop].copy()
+		self._intensity_values = self._intensity_values[start:stop].copy()
+		self._scan_offsets = self._scan_offsets[first_scan:last_scan + 2] - start
 		self._set_time()
 		self._set_min_max_mass()
 		self._calc_tic()
 
+	def _read_range(self, first_scan: int, stop_scan: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+		"""
+		Returns the *m/z* values and intensities for a range of scans.
+
+		:param first_scan: The index of the first scan.
+		:param stop_scan: The index after the last scan.
+		"""
+
+		start, stop = self._scan_offsets[first_scan], self._scan_offsets[stop_scan]
+		return self._mass_values[start:stop], self._intensity_values[start:stop]
+
+	def _iter_chunks(self) -> Iterator[Tuple[int, numpy.ndarray, numpy.ndarray, numpy.ndarray]]:
+		"""
+		Iterate over the data in blocks of consecutive scans.
+
+		For data held in memory there is a single block containing all scans.
+
+		:return: An iterator of tuples giving the index of the first scan in the block,
+			the *m/z* values, the intensity values, and the number of data points in each scan.
+		"""
+
+		yield 0, self._mass_values, self._intensity_values, self.point_counts
+
 	def write(self, file_root: PathLike) -> None:
 		"""
 		Writes the entire raw data to two CSV files:
@@ -373,21 +560,14 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 
 		with open(file_name1, 'w', encoding="UTF-8") as fp1, open(file_name2, 'w', encoding="UTF-8") as fp2:
 
-			for scan in self._scan_list:
-
-				for index, intensity in enumerate(scan.intensity_list):
-					if index == 0:
-						fp1.write(f"{intensity:.4f}")
-					else:
-						fp1.write(f",{intensity:.4f}")
-				fp1.write('\n')
+			for _, mass_values, intensity_values, point_counts in self._iter_chunks():
+				offsets = numpy.cumsum(point_counts)
+				for start, stop in zip(offsets - point_counts, offsets):
+					fp1.write(','.join(f"{intensity:.4f}" for intensity in intensity_values[start:stop].tolist()))
+					fp1.write('\n')
 
-				for index, mass in enumerate(scan.mass_list):
-					if index == 0:
-						fp2.write(f"{mass:.4f}")
-					else:
-						fp2.write(f",{mass:.4f}")
-				fp2.write('\n')
+					fp2.write(','.join(f"{mass:.4f}" for mass in mass_values[start:stop].tolist()))
+					fp2.write('\n')
 
 	def write_intensities_stream(self, file_name: PathLike) -> None:
 		"""
@@ -406,13 +586,100 @@ class GCMS_data(pymsBaseClass, TimeListMixin, MaxMinMassMixin, GetIndexTimeMixin
 
 		file_name = prepare_filepath(file_name)
 
-		# n = len(self._scan_list)
-
 		print(" -> Writing scans to a file")
 
 		with file_name.open('w', encoding="UTF-8") as fp:
 
-			for scan in self._scan_list:
-				intensities = scan.intensity_list
-				for i in intensities:
+			for _, _, intensity_values, _ in self._iter_chunks():
+				for i in intensity_values.tolist():
 					fp.write(f"{i:8.4f}\n")
+
+	def write_npz(self, file_name: PathLike, metadata: Optional[Dict[str, Any]] = None) -> None:
+		"""
+		Writes the data to an uncompressed ``.npz`` file, which can be read
+		back, memory mapped, with :meth:`~.GCMS_data.from_npz`.
+
+		:param file_name: Output file name.
+		:param metadata: Additional JSON serialisable data to store in the file.
+
+		All of the data is held in memory while it is written,
+		including for :class:`~pyms.GCMS.IO.ANDI.LazyGCMS_data`, which reads the whole file first.
+
+		.. versionadded:: 2.8.0
+		"""  # noqa: D400
+
+		if not is_path(file_name):
+			raise TypeError("'file_name' must be a string or a PathLike object")
+
+		_write_npz(
+				prepare_filepath(file_name),
+				"GCMS_data",
+				{
+						"time_list": numpy.asarray(self._time_list, dtype=numpy.float64),
+						"mass_values": self._mass_values,
+						"intensity_values": self._intensity_values,
+						"point_counts": self.point_counts,
+						},
+				{"user_metadata": metadata or {}},
+				)
+
+	@classmethod
+	def from_npz(cls, file_name: PathLike, mmap: bool = True) -> "GCMS_data":
+		"""
+		Read data written by :meth:`~.GCMS_data.write_npz`.
+
+		:param file_name: The file to read.
+		:param mmap: Whether the *m/z* and intensity arrays should be memory mapped
+			rather than read into memory.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		if not is_path(file_name):
+			raise TypeError("'file_name' must be a string or a PathLike object")
+
+		arrays, _ = _read_npz(prepare_filepath(file_name, mkdirs=False), "GCMS_data", 'r' if mmap else None)
+
+		return cls.from_arrays(
+				arrays["time_list"].tolist(),
+				arrays["mass_values"],
+				arrays["intensity_values"],
+				arrays["point_counts"],
+				)
+
+
+def _sort_scan_points(
+		mass_values: numpy.ndarray,
+		intensity_values: numpy.ndarray,
+		scan_offsets: numpy.ndarray,
+		) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Ensure the *m/z* values within each scan are in ascending order.
+
+	Scans in descending order are reversed, matching the behaviour of :class:`~pyms.Spectrum.Scan`.
+
+	:param mass_values: The *m/z* values of every scan, concatenated.
+	:param intensity_values: The intensity values of every scan, concatenated.
+	:param scan_offsets: The offset of each scan in the arrays, followed by the total number of data points.
+
+	:return: The *m/z* values and intensities, which are copies if any scan needed sorting.
+	"""
+
+	# Find decreasing m/z values, ignoring the step from the last point of one scan to the first point of the next
+	decreasing = numpy.flatnonzero(numpy.diff(mass_values) < 0) + 1
+	decreasing = decreasing[~numpy.isin(decreasing, scan_offsets)]
+
+	if not decreasing.size:
+		return mass_values, intensity_values
+
+	# Don't modify arrays which may belong to the caller
+	mass_values = mass_values.copy()
+	intensity_values = intensity_values.copy()
+
+	for ix in numpy.unique(numpy.searchsorted(scan_offsets, decreasing, side="right") - 1):
+		start, stop = scan_offsets[ix], scan_offsets[ix + 1]
+		scan = Scan(mass_values[start:stop], intensity_values[start:stop])
+		mass_values[start:stop] = scan._mass_list
+		intensity_values[start:stop] = scan._intensity_list
+
+	return mass_values, intensity_values
@@ -26,8 +26,10 @@ Functions for reading ANDI-MS data files.
 # stdlib
 import os
 import pathlib
+from typing import Iterator, List, Optional, Tuple
 
 # 3rd party
+import numpy
 from domdf_python_tools.typing import PathLike
 from netCDF4 import Dataset
 
@@ -38,10 +40,12 @@ except ModuleNotFoundError:
 	pass
 
 # this package
-from pyms.GCMS.Class import GCMS_data
+from pyms.GCMS.Class import GCMS_data, _sort_scan_points
+from pyms.GCMS.IO.Cache import read_with_cache
+from pyms.IonChromatogram import IonChromatogram
 from pyms.Spectrum import Scan
 
-__all__ = ["ANDI_reader"]
+__all__ = ["ANDI_reader", "LazyGCMS_data"]
 
 # netCDF dimension names
 __POINT_NUMBER = "point_number"
@@ -54,15 +58,26 @@ __TIME_STRING = "scan_acquisition_time"
 __POINT_COUNT = "point_count"
 
 
-def ANDI_reader(file_name: PathLike) -> GCMS_data:
+def ANDI_reader(file_name: PathLike, lazy: bool = False, cache: bool = False) -> GCMS_data:
 	"""
 	A reader for ANDI-MS NetCDF files.
 
 	:param file_name: The path of the ANDI-MS file
+	:param lazy: If :py:obj:`True`, return a :class:`~.LazyGCMS_data` object,
+		which reads the scans from the file only when they are needed.
+	:param cache: If :py:obj:`True`, load the data from a sidecar cache file if it is
+		up to date, or else write one. See :func:`~pyms.GCMS.IO.Cache.read_with_cache`.
 
 	:return: GC-MS data object
 
 	:authors: Qiao Wang, Andrew Isaac, Vladimir Likic, Dominic Davis-Foster
+
+	.. versionchanged:: 2.8.0
+
+		The file is opened read-only, and the data arrays are passed to
+		:class:`~pyms.GCMS.Class.GCMS_data` without conversion to lists.
+
+	.. versionadded:: 2.8.0  The ``lazy`` and ``cache`` arguments.
 	"""
 
 	if not isinstance(file_name, (str, pathlib.Path)):
@@ -73,43 +88,327 @@ def ANDI_reader(file_name: PathLike) -> GCMS_data:
 		# and instead creates an empty file, for some reason.
 		raise FileNotFoundError(2, "No such file or directory", file_name)
 
-	rootgrp = Dataset(file_name, "r+", format="NETCDF3_CLASSIC")
-	# TODO: find out if netCDF4 throws specific errors that we can use here
+	if lazy:
+		if cache:
+			raise ValueError("'lazy' and 'cache' cannot both be True")
+		return LazyGCMS_data(file_name)
+
+	if cache:
+		return read_with_cache(ANDI_reader, file_name)
 
 	print(f" -> Reading netCDF file '{file_name}'")
 
-	scan_list = []
-	mass = rootgrp.variables[__MASS_STRING][:]
-	intensity = rootgrp.variables[__INTENSITY_STRING][:]
+	with _open_andi(file_name) as rootgrp:
+		time_list, point_counts = _read_scan_info(rootgrp)
+		mass_values, intensity_values = _read_points(rootgrp, 0, int(point_counts.sum()))
 
-	scan_lengths = rootgrp.variables["point_count"]  # The number of data points in each scan
+	# The scans are sliced out of these arrays by GCMS_data using the cumulative point counts
+	return GCMS_data.from_arrays(time_list, mass_values, intensity_values, point_counts)
 
-	mass_values = mass.tolist()
-	intensity_values = intensity.tolist()
 
-	if len(mass_values) != len(intensity_values):
-		raise ValueError("The lengths of the mass and intensity lists differ!")
+def _open_andi(file_name: PathLike) -> Dataset:
+	"""
+	Open an ANDI-MS file for reading.
+
+	The file is opened read-only so several processes can read the same file at once.
+
+	:param file_name: The path of the ANDI-MS file
+	"""
+
+	rootgrp = Dataset(file_name, 'r', format="NETCDF3_CLASSIC")
+	# TODO: find out if netCDF4 throws specific errors that we can use here
+
+	# Values are still scaled by 'scale_factor' and 'add_offset', but returned as plain arrays
+	rootgrp.set_auto_mask(False)
+
+	return rootgrp
+
+
+def _read_scan_info(rootgrp: Dataset) -> Tuple[List[float], numpy.ndarray]:
+	"""
+	Read the retention times and the number of data points in each scan from an ANDI-MS file.
 
-	offset = 0
-	for idx, length in enumerate(scan_lengths):
-		mass_list = mass_values[offset:offset + length]
-		assert len(mass_values[offset:offset + length]) == length
-		intensity_list = intensity_values[offset:offset + length]
-		assert len(intensity_values[offset:offset + length]) == length
-		scan_list.append(Scan(mass_list, intensity_list))
-		offset += length
+	:param rootgrp: The open netCDF file.
+	"""
 
-	assert offset == len(mass_values)
+	time_list = rootgrp.variables[__TIME_STRING][:].tolist()
+	point_counts = rootgrp.variables[__POINT_COUNT][:]  # The number of data points in each scan
 
-	time = rootgrp.variables[__TIME_STRING][:]
-	time_list = time.tolist()
+	if rootgrp.variables[__MASS_STRING].shape != rootgrp.variables[__INTENSITY_STRING].shape:
+		raise ValueError("The lengths of the mass and intensity lists differ!")
 
 	# sanity check
-	if len(time_list) != len(scan_list):
+	if len(time_list) != len(point_counts):
 		raise ValueError("number of time points does not equal the number of scans")
 
-	rootgrp.close()
-	return GCMS_data(time_list, scan_list)
+	return time_list, point_counts
+
+
+def _read_points(rootgrp: Dataset, start: int, stop: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Read a range of data points from an ANDI-MS file.
+
+	:param rootgrp: The open netCDF file.
+	:param start: The index of the first data point to read.
+	:param stop: The index after the last data point to read.
+
+	:return: The *m/z* values and intensities.
+	"""
+
+	mass_values = rootgrp.variables[__MASS_STRING][start:stop]
+	intensity_values = rootgrp.variables[__INTENSITY_STRING][start:stop]
+
+	return mass_values, intensity_values
+
+
+class LazyGCMS_data(GCMS_data):
+	"""
+	GC-MS data which is read from an ANDI-MS file only when needed.
+
+	Only the retention times and the number of data points in each scan are read when the object is created.
+	Individual scans, or ranges of scans, are read from the file on demand,
+	and operations on the whole dataset (such as :func:`~pyms.IntensityMatrix.build_intensity_matrix`)
+	read the file in blocks of ``chunk_size`` scans, so the raw data never needs to fit in memory.
+	This includes comparing the data with ``==`` and writing it with :meth:`~.GCMS_data.write`
+	or :meth:`~.GCMS_data.write_intensities_stream`. :meth:`~.GCMS_data.write_npz` and
+	:attr:`~.GCMS_data.scan_list` do read all of the data into memory.
+
+	As with :class:`~.GCMS_data`, the *m/z* values of scans stored in descending order are reversed when read.
+
+	:param file_name: The path of the ANDI-MS file
+	:param chunk_size: The number of scans to read from the file at a time.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	def __init__(self, file_name: PathLike, chunk_size: int = 1000):
+		if not isinstance(chunk_size, int):
+			raise TypeError("'chunk_size' must be an integer")
+
+		if chunk_size < 1:
+			raise ValueError("'chunk_size' must be greater than zero")
+
+		print(f" -> Opening netCDF file '{file_name}'")
+
+		self._file_name = os.fspath(file_name)
+		self.chunk_size = chunk_size
+
+		with _open_andi(self._file_name) as rootgrp:
+			time_list, point_counts = _read_scan_info(rootgrp)
+
+		self._time_list = time_list
+		self._first_point = 0  # The index in the file of the first data point of the first scan
+		self._scan_offsets = numpy.zeros(len(point_counts) + 1, dtype=numpy.intp)
+		numpy.cumsum(point_counts, out=self._scan_offsets[1:])
+		self._set_time()
+		self._reset_statistics()
+
+	@property
+	def file_name(self) -> str:
+		"""
+		The path of the ANDI-MS file.
+		"""
+
+		return self._file_name
+
+	@property  # type: ignore[override]
+	def _mass_values(self) -> numpy.ndarray:  # type: ignore[override]
+		# Methods inherited from GCMS_data which need all of the data at once read it here.
+		# Those which can work block by block use _iter_chunks instead.
+		return self._read_range(0, len(self))[0]
+
+	@property  # type: ignore[override]
+	def _intensity_values(self) -> numpy.ndarray:  # type: ignore[override]
+		return self._read_range(0, len(self))[1]
+
+	def _read_range(self, first_scan: int, stop_scan: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+		"""
+		Read the *m/z* values and intensities for a range of scans.
+
+		:param first_scan: The index of the first scan to read.
+		:param stop_scan: The index after the last scan to read.
+		"""
+
+		with _open_andi(self._file_name) as rootgrp:
+			mass_values, intensity_values = _read_points(
+					rootgrp,
+					self._first_point + self._scan_offsets[first_scan],
+					self._first_point + self._scan_offsets[stop_scan],
+					)
+
+		return _sort_scan_points(
+				mass_values,
+				intensity_values,
+				self._scan_offsets[first_scan:stop_scan + 1] - self._scan_offsets[first_scan],
+				)
+
+	def _iter_chunks(self) -> Iterator[Tuple[int, numpy.ndarray, numpy.ndarray, numpy.ndarray]]:
+		"""
+		Iterate over the data in blocks of ``chunk_size`` consecutive scans, read from the file.
+
+		:return: An iterator of tuples giving the index of the first scan in the block,
+			the *m/z* values, the intensity values, and the number of data points in each scan.
+		"""
+
+		point_counts = self.point_counts
+
+		with _open_andi(self._file_name) as rootgrp:
+			for first_scan in range(0, len(self), self.chunk_size):
+				stop_scan = min(first_scan + self.chunk_size, len(self))
+				mass_values, intensity_values = _read_points(
+						rootgrp,
+						self._first_point + self._scan_offsets[first_scan],
+						self._first_point + self._scan_offsets[stop_scan],
+						)
+				mass_values, intensity_values = _sort_scan_points(
+						mass_values,
+						intensity_values,
+						self._scan_offsets[first_scan:stop_scan + 1] - self._scan_offsets[first_scan],
+						)
+				yield first_scan, mass_values, intensity_values, point_counts[first_scan:stop_scan]
+
+	def _reset_statistics(self) -> None:
+		"""
+		Clear the cached mass range and TIC, which are recalculated when next needed.
+		"""
+
+		self._min_mass = None
+		self._max_mass = None
+		self._tic = None  # type: ignore[assignment]
+
+	def _calc_statistics(self) -> None:
+		"""
+		Calculate the mass range and TIC in a single pass over the file.
+		"""
+
+		min_mass = None
+		max_mass = None
+		tic = numpy.zeros(len(self))
+
+		for first_scan, mass_values, intensity_values, point_counts in self._iter_chunks():
+			if mass_values.size:
+				chunk_min, chunk_max = mass_values.min(), mass_values.max()
+				min_mass = chunk_min if min_mass is None else min(min_mass, chunk_min)
+				max_mass = chunk_max if max_mass is None else max(max_mass, chunk_max)
+
+			scan_indices = numpy.repeat(numpy.arange(len(point_counts)), point_counts)
+			tic[first_scan:first_scan + len(point_counts)] = numpy.bincount(
+					scan_indices,
+					weights=intensity_values.astype(numpy.float64),
+					minlength=len(point_counts),
+					)
+
+		self._min_mass = None if min_mass is None else float(min_mass)
+		self._max_mass = None if max_mass is None else float(max_mass)
+		self._tic = IonChromatogram(tic, self._time_list[:])
+
+	@property
+	def min_mass(self) -> Optional[float]:
+		"""
+		Returns the minimum *m/z* value in the data.
+
+		This is calculated from the file the first time it is needed.
+		"""
+
+		if self._tic is None:
+			self._calc_statistics()
+
+		return self._min_mass
+
+	@property
+	def max_mass(self) -> Optional[float]:
+		"""
+		Returns the maximum *m/z* value in the data.
+
+		This is calculated from the file the first time it is needed.
+		"""
+
+		if self._tic is None:
+			self._calc_statistics()
+
+		return self._max_mass
+
+	@property
+	def tic(self) -> IonChromatogram:
+		"""
+		Returns the total ion chromatogram.
+
+		This is calculated from the file the first time it is needed.
+		"""
+
+		if self._tic is None:
+			self._calc_statistics()
+
+		return self._tic  # type: ignore[return-value]
+
+	def get_scan_at_index(self, ix: int) -> Scan:
+		"""
+		Reads the scan at the given index from the file.
+
+		:param ix: The index of the scan.
+		"""
+
+		if not isinstance(ix, (int, numpy.signedinteger)):
+			raise TypeError("'ix' must be an integer")
+
+		if ix < 0 or ix >= len(self):
+			raise IndexError("index out of range")
+
+		return Scan(*self._read_range(ix, ix + 1))
+
+	def iter_scans(self) -> Iterator[Scan]:
+		"""
+		Iterate over the scans, reading them from the file in blocks of ``chunk_size`` scans.
+		"""
+
+		for _, mass_values, intensity_values, point_counts in self._iter_chunks():
+			offsets = numpy.cumsum(point_counts)[:-1]
+			for masses, intensities in zip(numpy.split(mass_values, offsets), numpy.split(intensity_values, offsets)):
+				yield Scan(masses, intensities)
+
+	def get_scans_in_rt_range(self, min_rt: float, max_rt: float) -> GCMS_data:
+		"""
+		Reads the scans with retention times between ``min_rt`` and ``max_rt`` (inclusive) into memory.
+
+		:param min_rt: The minimum retention time, in seconds.
+		:param max_rt: The maximum retention time, in seconds.
+		"""
+
+		if min_rt >= max_rt:
+			raise ValueError("'min_rt' must be less than 'max_rt'")
+
+		first_scan = int(numpy.searchsorted(self._time_list, min_rt, side="left"))
+		stop_scan = int(numpy.searchsorted(self._time_list, max_rt, side="right"))
+
+		if stop_scan - first_scan < 2:
+			raise ValueError(f"Fewer than two scans between {min_rt} and {max_rt} seconds")
+
+		mass_values, intensity_values = self._read_range(first_scan, stop_scan)
+
+		return GCMS_data.from_arrays(
+				self._time_list[first_scan:stop_scan],
+				mass_values,
+				intensity_values,
+				self.point_counts[first_scan:stop_scan],
+				)
+
+	def _trim_scans(self, first_scan: int, last_scan: int) -> None:
+		"""
+		Discard the scans before ``first_scan`` and after ``last_scan``.
+
+		No data is read from the file.
+
+		:param first_scan: The index of the first scan to keep.
+		:param last_scan: The index of the last scan to keep.
+		"""
+
+		start = self._scan_offsets[first_scan]
+
+		self._first_point += start
+		self._time_list = self._time_list[first_scan:last_scan + 1]
+		self._scan_offsets = self._scan_offsets[first_scan:last_scan + 2] - start
+		self._set_time()
+		self._reset_statistics()
 
 
 #
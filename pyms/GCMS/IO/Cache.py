@@ -0,0 +1,174 @@
+"""
+Sidecar cache for GC-MS data read from raw data files.
+"""
+
+################################################################################
+#                                                                              #
+#    PyMassSpec software for processing of mass-spectrometry data              #
+#    Copyright (C) 2026 Dominic Davis-Foster                                   #
+#                                                                              #
+#    This program is free software; you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License version 2 as         #
+#    published by the Free Software Foundation.                                #
+#                                                                              #
+#    This program is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the             #
+#    GNU General Public License for more details.                              #
+#                                                                              #
+#    You should have received a copy of the GNU General Public License         #
+#    along with this program; if not, write to the Free Software               #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.                 #
+#                                                                              #
+################################################################################
+
+# stdlib
+import hashlib
+import json
+import pathlib
+import warnings
+import zipfile
+from typing import Any, Callable, Dict, Optional
+
+# 3rd party
+from domdf_python_tools.typing import PathLike
+
+# this package
+from pyms.GCMS.Class import GCMS_data
+from pyms.Utils.IO import _read_npz_metadata, prepare_filepath
+
+__all__ = ["get_cache_path", "read_with_cache"]
+
+
+def get_cache_path(file_name: PathLike) -> pathlib.Path:
+	"""
+	Returns the path of the sidecar cache file for the given raw data file.
+
+	The cache file is placed alongside the raw data file, with ``.pyms.npz`` appended to its name.
+
+	:param file_name: The path of the raw data file.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	file_name = prepare_filepath(file_name, mkdirs=False)
+	return file_name.with_name(file_name.name + ".pyms.npz")
+
+
+def _file_hash(file_name: pathlib.Path) -> str:
+	"""
+	Returns the BLAKE2b hash of the contents of the file.
+
+	:param file_name:
+	"""
+
+	file_hash = hashlib.blake2b(digest_size=20)
+
+	with file_name.open("rb") as fp:
+		for block in iter(lambda: fp.read(2**20), b''):
+			file_hash.update(block)
+
+	return file_hash.hexdigest()
+
+
+def _read_cache_key(cache_file: pathlib.Path) -> Optional[Dict[str, Any]]:
+	"""
+	Returns the key stored in a cache file, or :py:obj:`None` if the file does not exist or cannot be read.
+
+	:param cache_file:
+	"""
+
+	if not cache_file.is_file():
+		return None
+
+	try:
+		return _read_npz_metadata(cache_file)["user_metadata"]
+	except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+		return None
+
+
+def read_with_cache(reader: Callable[..., GCMS_data], file_name: PathLike, **options: Any) -> GCMS_data:
+	"""
+	Read a raw data file using a sidecar cache.
+
+	If a valid cache file exists (see :func:`~.get_cache_path`) the data are loaded,
+	memory mapped, from it. Otherwise the file is read with ``reader`` and the cache file is written.
+
+	The cache is keyed on the name of the reader and its options, and on the size and
+	modification time of the raw data file. If the modification time has changed the
+	contents of the file are hashed and compared with the hash stored in the cache,
+	so a file which has only been touched or copied does not need to be read again.
+	The new modification time is then recorded in a small file alongside the cache,
+	with ``.json`` in place of ``.npz``, so the file need not be hashed next time.
+
+	:param reader: The function to read the file with, e.g. :func:`~pyms.GCMS.IO.ANDI.ANDI_reader`.
+	:param file_name: The path of the raw data file.
+	:param options: Keyword arguments for ``reader``.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	file_name = prepare_filepath(file_name, mkdirs=False)
+	cache_file = get_cache_path(file_name)
+	stamp_file = cache_file.with_suffix(".json")
+	stat = file_name.stat()
+	reader_key = {"reader": reader.__name__, "options": json.loads(json.dumps(options, default=float))}
+
+	cache_key = _read_cache_key(cache_file)
+	file_hash = None
+
+	if cache_key is not None and all(cache_key.get(key) == value for key, value in reader_key.items()):
+		stamp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": cache_key.get("hash")}
+
+		unchanged = (cache_key.get("size"), cache_key.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns)
+
+		if unchanged or _read_stamp(stamp_file) == stamp:
+			print(f" -> Reading cached data for '{file_name}'")
+			return GCMS_data.from_npz(cache_file)
+
+		if cache_key.get("size") == stat.st_size:
+			file_hash = _file_hash(file_name)
+
+			if cache_key.get("hash") == file_hash:
+				print(f" -> Reading cached data for '{file_name}'")
+
+				# Record the new modification time, rather than rewriting the whole cache
+				try:
+					stamp_file.write_text(json.dumps(stamp))
+				except OSError as e:
+					warnings.warn(f"Unable to write the cache file '{stamp_file}': {e}")
+
+				return GCMS_data.from_npz(cache_file)
+
+	data = reader(file_name, **options)
+
+	try:
+		data.write_npz(
+				cache_file,
+				metadata={
+						**reader_key,
+						"size": stat.st_size,
+						"mtime_ns": stat.st_mtime_ns,
+						"hash": file_hash or _file_hash(file_name),
+						},
+				)
+	except OSError as e:
+		warnings.warn(f"Unable to write the cache file '{cache_file}': {e}")
+
+	return data
+
+
+def _read_stamp(stamp_file: pathlib.Path) -> Optional[Dict[str, Any]]:
+	"""
+	Returns the size, modification time and hash of the raw data file recorded alongside a cache file,
+	or :py:obj:`None` if the file does not exist or cannot be read.
+
+	The record only applies to a cache file with the same hash.
+
+	:param stamp_file:
+	"""
+
+	try:
+		return json.loads(stamp_file.read_text())
+	except (OSError, ValueError):
+		return None
@@ -30,16 +30,17 @@ Functions for I/O of data in JCAMP-DX format.
 # stdlib
 import sys
 from pathlib import Path
-from typing import Any, List, MutableMapping, Union
+from typing import Any, Dict, List, MutableMapping, Union
 
 # 3rd party
+import numpy
 from domdf_python_tools.paths import PathPlus
 
 # this package
 from pyms.GCMS.Class import GCMS_data
-from pyms.Spectrum import Scan
+from pyms.GCMS.IO.Cache import read_with_cache
 from pyms.Utils.IO import prepare_filepath
-from pyms.Utils.jcamp import header_info_fields, xydata_tags
+from pyms.Utils.jcamp import header_info_fields, iter_jcamp_records, xydata_tags, xydata_to_arrays
 from pyms.Utils.Math import is_float
 from pyms.Utils.Utils import is_path
 
@@ -55,103 +56,85 @@ def _removeprefix(string: str, prefix: str) -> str:
 		return string
 
 
-def JCAMP_reader(file_name: Union[str, Path]) -> GCMS_data:
+def JCAMP_reader(file_name: Union[str, Path], cache: bool = False) -> GCMS_data:
 	"""
 	Generic reader for JCAMP DX files.
 
 	:param file_name: Path of the file to read
+	:param cache: If :py:obj:`True`, load the data from a sidecar cache file if it is
+		up to date, or else write one. See :func:`~pyms.GCMS.IO.Cache.read_with_cache`.
 
 	:return: GC-MS data object
 
 	:authors: Qiao Wang, Andrew Isaac, Vladimir Likic, David Kainer,
 		Dominic Davis-Foster (pathlib support)
+
+	.. versionchanged:: 2.8.0
+
+		The file is now parsed in a single pass, with each block of XY data converted in bulk.
+		Data in the compressed ASDF forms (SQZ, DIF and DUP) is also supported.
+
+	.. versionadded:: 2.8.0  The ``cache`` argument.
 	"""
 
 	if not is_path(file_name):
 		raise TypeError("'file_name' must be a string or a PathLike object")
 
+	if cache:
+		return read_with_cache(JCAMP_reader, file_name)
+
 	file_name = PathPlus(prepare_filepath(file_name, mkdirs=False))
 
 	print(f" -> Reading JCAMP file {file_name.as_posix()!r}")
-	lines_list = file_name.read_lines()
 	time_list: List[float] = []
-	scan_list: List[Scan] = []
+	mass_arrays: List[numpy.ndarray] = []
+	intensity_arrays: List[numpy.ndarray] = []
 
 	header_info: MutableMapping[Any, Any] = {}  # Dictionary containing header information
-
-	line_idx = 0
-	while line_idx < len(lines_list):
-		line = lines_list[line_idx]
-
-		if line.strip():
-			if line.startswith("##"):
-				# Label
-				label, value = line.split('=', 1)
-				label = _removeprefix(label, "##").upper()
-				value = value.strip()
-
-				if "PAGE" in label:
-					if "T=" in value:
-						# PAGE contains retention time starting with T=
-						# FileConverter Pro style
-						time = float(_removeprefix(value, "T="))  # rt for the scan to be submitted
-						time_list.append(time)
-
-				elif "RETENTION_TIME" in label:
-					# OpenChrom style
-					time = float(value)  # rt for the scan to be submitted
-
-					# Check to make sure time is not already in the time list;
-					# Can happen when both ##PAGE and ##RETENTION_TIME are specified
-					if time_list[-1] != time:
-						time_list.append(time)
-
-				elif label in header_info_fields:
-					if value.isdigit():
-						header_info[label] = int(value)
-					elif is_float(value):
-						header_info[label] = float(value)
-					else:
-						header_info[label] = value
-
-				elif label in xydata_tags:
-					# Read ahead to find all XY data
-					xydata_line_idx = line_idx + 1
-					xy_data_lines: List[str] = []
-					while xydata_line_idx < len(lines_list):
-						xy_data_line = lines_list[xydata_line_idx]
-						if xy_data_line.startswith("##"):
-							break
-						else:
-							xy_data_lines.append(xy_data_line)
-							xydata_line_idx += 1
-
-					line_idx += len(xy_data_lines)
-
-					mass_list = []
-					intensity_list = []
-					for xy_data_line in xy_data_lines:
-						if not xy_data_line.strip():
-							continue
-
-						elements = xy_data_line.strip().rstrip(',').split(',')
-						if len(elements) % 2:
-							print(elements)
-							raise ValueError(f"Expected an even number of values, got {len(elements)}")
-						for mass, intensity in zip(elements[::2], elements[1::2]):
-							mass_list.append(float(mass.strip()))
-							intensity_list.append(float(intensity.strip()))
-
-					scan_list.append(Scan(mass_list, intensity_list))
-
-		line_idx += 1  # End of while loop
+	labels: Dict[str, str] = {}  # The most recent value of every label, for scaling the XY data
+
+	with file_name.open(encoding="UTF-8") as fp:
+		for label, value, data in iter_jcamp_records(fp):
+			labels[label] = value
+
+			if "PAGE" in label:
+				if "T=" in value:
+					# PAGE contains retention time starting with T=
+					# FileConverter Pro style
+					time = float(_removeprefix(value, "T="))  # rt for the scan to be submitted
+					time_list.append(time)
+
+			elif "RETENTION_TIME" in label:
+				# OpenChrom style
+				time = float(value)  # rt for the scan to be submitted
+
+				# Check to make sure time is not already in the time list;
+				# Can happen when both ##PAGE and ##RETENTION_TIME are specified
+				if not time_list or time_list[-1] != time:
+					time_list.append(time)
+
+			elif label in header_info_fields:
+				if value.isdigit():
+					header_info[label] = int(value)
+				elif is_float(value):
+					header_info[label] = float(value)
+				else:
+					header_info[label] = value
+
+			elif label in xydata_tags:
+				mass_array, intensity_array = xydata_to_arrays(data, value, labels)
+				mass_arrays.append(mass_array)
+				intensity_arrays.append(intensity_array)
 
 	# sanity check
 	time_len = len(time_list)
-	scan_len = len(scan_list)
+	scan_len = len(mass_arrays)
 	if time_len != scan_len:
-		print(time_list)
-		print(scan_list)
 		raise ValueError(f"Number of time points ({time_len}) does not equal the number of scans ({scan_len})")
 
-	return GCMS_data(time_list, scan_list)
+	return GCMS_data.from_arrays(
+			time_list,
+			numpy.concatenate(mass_arrays) if mass_arrays else numpy.empty(0),
+			numpy.concatenate(intensity_arrays) if intensity_arrays else numpy.empty(0),
+			[len(mass_array) for mass_array in mass_arrays],
+			)
@@ -25,84 +25,168 @@ Functions for reading mzML format data files.
 
 # stdlib
 import os
+from typing import Iterator, List, Optional, Tuple
 
 # 3rd party
+import numpy
 from domdf_python_tools.typing import PathLike
 from pymzml.run import Reader
 from pymzml.spec import Spectrum
 
-try:
-	# 3rd party
-	from mpi4py import MPI  # type: ignore[import-not-found]
-except ModuleNotFoundError:
-	pass
-
 # this package
 from pyms.Base import is_path
 from pyms.GCMS.Class import GCMS_data
+from pyms.GCMS.IO.Cache import read_with_cache
 from pyms.Spectrum import Scan
+from pyms.Utils.Utils import is_number
 
-__all__ = ["mzML_reader"]
+__all__ = ["mzML_reader", "iter_mzML_scans"]
 
 
-def mzML_reader(file_name: PathLike) -> GCMS_data:
+def mzML_reader(
+		file_name: PathLike,
+		rt_range: Optional[Tuple[float, float]] = None,
+		ms_level: Optional[int] = None,
+		scan_stride: int = 1,
+		cache: bool = False,
+		) -> GCMS_data:
 	"""
 	A reader for mzML files.
 
 	:param file_name: The name of the mzML file.
+	:param rt_range: Optional minimum and maximum retention times, in seconds, of the scans to read.
+	:param ms_level: If given, only spectra of this MS level are read.
+	:param scan_stride: Read only every ``scan_stride``-th scan which passes the other filters.
+	:param cache: If :py:obj:`True`, load the data from a sidecar cache file if it is
+		up to date, or else write one. See :func:`~pyms.GCMS.IO.Cache.read_with_cache`.
 
 	:return: GC-MS data object.
 
 	:authors: Sean O'Callaghan, Dominic Davis-Foster (pathlib support)
+
+	.. versionchanged:: 2.8.0
+
+		Added the ``rt_range``, ``ms_level``, ``scan_stride`` and ``cache`` arguments.
+		The *m/z* and intensity arrays decoded by :mod:`pymzml` are used directly.
+	"""
+
+	if cache:
+		return read_with_cache(
+				mzML_reader,
+				file_name,
+				rt_range=rt_range,
+				ms_level=ms_level,
+				scan_stride=scan_stride,
+				)
+
+	time_list: List[float] = []
+	mass_arrays: List[numpy.ndarray] = []
+	intensity_arrays: List[numpy.ndarray] = []
+
+	for time, mass_values, intensity_values in _iter_spectra(file_name, rt_range, ms_level, scan_stride):
+		time_list.append(time)
+		mass_arrays.append(mass_values)
+		intensity_arrays.append(intensity_values)
+
+	if not time_list:
+		raise ValueError("No spectra in the file matched the given filters")
+
+	return GCMS_data.from_arrays(
+			time_list,
+			numpy.concatenate(mass_arrays),
+			numpy.concatenate(intensity_arrays),
+			[len(mass_values) for mass_values in mass_arrays],
+			)
+
+
+def iter_mzML_scans(
+		file_name: PathLike,
+		rt_range: Optional[Tuple[float, float]] = None,
+		ms_level: Optional[int] = None,
+		scan_stride: int = 1,
+		) -> Iterator[Tuple[float, Scan]]:
+	"""
+	Iterate over the scans in an mzML file, reading them one at a time.
+
+	This allows processing to start before the whole file has been read.
+
+	:param file_name: The name of the mzML file.
+	:param rt_range: Optional minimum and maximum retention times, in seconds, of the scans to read.
+	:param ms_level: If given, only spectra of this MS level are read.
+	:param scan_stride: Read only every ``scan_stride``-th scan which passes the other filters.
+
+	:return: An iterator of (retention time, scan) tuples. The retention time is in seconds.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	for time, mass_values, intensity_values in _iter_spectra(file_name, rt_range, ms_level, scan_stride):
+		yield time, Scan(mass_values, intensity_values)
+
+
+def _iter_spectra(
+		file_name: PathLike,
+		rt_range: Optional[Tuple[float, float]] = None,
+		ms_level: Optional[int] = None,
+		scan_stride: int = 1,
+		) -> Iterator[Tuple[float, numpy.ndarray, numpy.ndarray]]:
+	"""
+	Iterate over the spectra in an mzML file which pass the given filters.
+
+	The filters only use the spectrum metadata, so the binary data arrays of
+	spectra which are skipped are never decoded.
+
+	:param file_name: The name of the mzML file.
+	:param rt_range: Optional minimum and maximum retention times, in seconds, of the scans to read.
+	:param ms_level: If given, only spectra of this MS level are read.
+	:param scan_stride: Read only every ``scan_stride``-th scan which passes the other filters.
+
+	:return: An iterator of (retention time, *m/z* values, intensity values) tuples.
 	"""
 
 	if not is_path(file_name):
 		raise TypeError("'file_name' must be a string or a PathLike object")
 
-	with Reader(os.fspath(file_name)) as mzml_file:
-
-		try:  # avoid printing from each rank
-			comm = MPI.COMM_WORLD
-			rank = comm.Get_rank()
-			size = comm.Get_size()
+	if rt_range is not None:
+		if len(rt_range) != 2 or not all(is_number(rt) for rt in rt_range):
+			raise TypeError("'rt_range' must be a (minimum, maximum) tuple of numbers")
+		if rt_range[0] > rt_range[1]:
+			raise ValueError("The minimum of 'rt_range' must not be greater than the maximum")
 
-			if rank == 0:
-				file_names = []
+	if ms_level is not None and not isinstance(ms_level, int):
+		raise TypeError("'ms_level' must be an integer")
 
-				for i in range(1, size):
-					recv_buffer = ''
-					file_n = comm.recv(recv_buffer, i)
-					file_names.append(file_n)
+	if not isinstance(scan_stride, int):
+		raise TypeError("'scan_stride' must be an integer")
+	if scan_stride < 1:
+		raise ValueError("'scan_stride' must be greater than zero")
 
-				print(" -> Reading mzML files:")
-				print(file_name)
-				for file_n in file_names:
-					print(file_n)
-			else:
-				comm.send(file_name, dest=0)
-		# TODO: Find specific error
-		except Exception as e:
-			print(e)
-			print(f" -> Reading mzML file '{file_name}'")
+	print(f" -> Reading mzML file '{file_name}'")
 
-		scan_list = []
-		time_list = []
+	with Reader(os.fspath(file_name)) as mzml_file:
+		n_accepted = 0
 
 		for spectrum in mzml_file:
 			assert isinstance(spectrum, Spectrum)
-			mass_list = []
-			intensity_list = []
 
-			for mz, i in spectrum.peaks("raw"):  # TODO: expose option
-				mass_list.append(mz)
-				intensity_list.append(i)
+			if ms_level is not None and spectrum.ms_level != ms_level:
+				continue
 
-			time_list.append(spectrum.scan_time_in_minutes() * 60)
-			scan_list.append(Scan(mass_list, intensity_list))
+			time = spectrum.scan_time_in_minutes() * 60
 
-	# print("time:", len(time_list))
-	# print("scan:", len(scan_list))
+			if rt_range is not None:
+				if time < rt_range[0]:
+					continue
+				elif time > rt_range[1]:
+					# Spectra are in order of retention time
+					break
 
-	data = GCMS_data(time_list, scan_list)
+			n_accepted += 1
+			if (n_accepted - 1) % scan_stride:
+				continue
 
-	return data
+			peaks = spectrum.peaks("raw")  # TODO: expose option
+			if len(peaks):
+				yield time, peaks[:, 0], peaks[:, 1]
+			else:
+				yield time, numpy.empty(0), numpy.empty(0)
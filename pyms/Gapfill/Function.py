@@ -36,9 +36,8 @@ from enum_tools import IntEnum
 from pyms.BillerBiemann import get_maxima_list_reduced
 from pyms.Gapfill.Class import MissingPeak, Sample
 from pyms.IntensityMatrix import build_intensity_matrix_i
-from pyms.Noise.SavitzkyGolay import savitzky_golay
 from pyms.Peak.Function import ion_area
-from pyms.TopHat import tophat
+from pyms.Preprocessing import CropMassStage, NullMassStage, PreprocessingPipeline, SavitzkyGolayStage, TopHatStage
 from pyms.Utils.IO import prepare_filepath
 from pyms.Utils.Utils import is_path
 
@@ -146,21 +145,14 @@ def missing_peak_finder(
 	# build integer intensity matrix
 	im = build_intensity_matrix_i(data)
 
-	for null_ion in null_ions:
-		im.null_mass(null_ion)
-
-	im.crop_mass(crop_ions[0], crop_ions[1])
-
-	# get the size of the intensity matrix
-	n_scan, n_mz = im.size
-
-	# smooth data
-	for ii in range(n_mz):
-		ic = im.get_ic_at_index(ii)
-		ic1 = savitzky_golay(ic, points)
-		ic_smooth = savitzky_golay(ic1, points)
-		ic_base = tophat(ic_smooth, struct="1.5m")
-		im.set_ic_at_index(ii, ic_base)
+	# remove unwanted ions, smooth data and correct baseline
+	pipeline = PreprocessingPipeline([
+			NullMassStage(null_ions),
+			CropMassStage(crop_ions[0], crop_ions[1]),
+			SavitzkyGolayStage(points, passes=2),
+			TopHatStage("1.5m"),
+			])
+	pipeline.process(im, inplace=True)
 
 	for mp in sample.missing_peaks:
 
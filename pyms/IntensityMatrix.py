@@ -36,9 +36,16 @@ from enum_tools import IntEnum, document_enum
 from pyms.Base import pymsBaseClass
 from pyms.GCMS.Class import GCMS_data
 from pyms.IonChromatogram import BasePeakChromatogram, IonChromatogram
-from pyms.Mixins import GetIndexTimeMixin, IntensityArrayMixin, MassListMixin, TimeListMixin
+from pyms.Mixins import (
+		GetIndexTimeMixin,
+		IntensityArrayMixin,
+		MassListMixin,
+		TimeListMixin,
+		_get_sorted_index,
+		_nearest_indices,
+		)
 from pyms.Spectrum import MassSpectrum
-from pyms.Utils.IO import prepare_filepath, save_data
+from pyms.Utils.IO import _read_npz, _write_npz, prepare_filepath, save_data
 from pyms.Utils.Utils import _number_types, is_number, is_path, is_sequence, is_sequence_of
 
 __all__ = [
@@ -183,6 +190,10 @@ class BaseIntensityMatrix(pymsBaseClass, TimeListMixin, MassListMixin, Intensity
 		dimension of the intensity matrix.
 
 		:author: Vladimir Likic
+
+		.. versionchanged:: 2.8.0
+
+			The intensities are copied into the column with a single slice assignment.
 		"""
 
 		if not isinstance(ix, int):
@@ -191,36 +202,42 @@ class BaseIntensityMatrix(pymsBaseClass, TimeListMixin, MassListMixin, Intensity
 		if not isinstance(ic, IonChromatogram):
 			raise TypeError("'ic' must be an IonChromatogram object")
 
-		ia: numpy.ndarray = ic.intensity_array
+		ia: numpy.ndarray = ic._intensity_array
 
 		# check if the dimension is ok
 		if len(ia) != len(self._intensity_array):
 			raise ValueError("ion chromatogram incompatible with the intensity matrix")
 
-		for row_idx, intensity in enumerate(ia):
-			self._intensity_array[row_idx][ix] = intensity
+		self._intensity_array[:, ix] = ia
 
-	def get_ic_at_index(self, ix: int) -> IonChromatogram:
+	def get_ic_at_index(self, ix: int, view: bool = False) -> IonChromatogram:
 		"""
 		Returns the ion chromatogram at the specified index.
 
 		:param ix: Index of an ion chromatogram in the intensity data matrix.
+		:param view: If :py:obj:`True` the intensities of the ion chromatogram are a view
+			of the column in the intensity matrix rather than a copy.
+			Changes made to the ion chromatogram's intensities in place will change the intensity matrix.
 
 		:return: Ion chromatogram at given index.
 
 		:authors: Qiao Wang, Andrew Isaac, Vladimir Likic
+
+		.. versionchanged:: 2.8.0
+
+			Added the ``view`` argument.
 		"""
 
 		if not isinstance(ix, int):
 			raise TypeError("'ix' must be an integer")
 
-		ia = [intensities[ix] for intensities in self._intensity_array]
-
-		ic_ia = numpy.array(ia)
 		mass = self.get_mass_at_index(ix)
-		rt = self._time_list[:]
+		ic_ia = self._intensity_array[:, ix]
+
+		if not view:
+			ic_ia = ic_ia.copy()
 
-		return IonChromatogram(ic_ia, rt, mass)
+		return IonChromatogram._from_validated(ic_ia, self._time_list, mass, self._min_rt, self._max_rt)
 
 	def get_ms_at_index(self, ix: int) -> MassSpectrum:
 		"""
@@ -234,9 +251,10 @@ class BaseIntensityMatrix(pymsBaseClass, TimeListMixin, MassListMixin, Intensity
 		if not isinstance(ix, int):
 			raise TypeError("'ix' must be an an integer")
 
-		scan = self.get_scan_at_index(ix)
+		if ix < 0 or ix >= len(self._intensity_array):
+			raise IndexError("index out of range")
 
-		return MassSpectrum(self.mass_list, scan)
+		return MassSpectrum(self._mass_list, self._intensity_array[ix])
 
 	def get_scan_at_index(self, ix: int) -> List[float]:
 		"""
@@ -283,19 +301,31 @@ class BaseIntensityMatrix(pymsBaseClass, TimeListMixin, MassListMixin, Intensity
 		:param mass: Mass to lookup in list of masses
 
 		:author: Andrew Isaac
+
+		.. versionchanged:: 2.8.0
+
+			The index is found with a binary search rather than by comparing every mass.
 		"""
 
 		if not is_number(mass):
 			raise TypeError("'mass' must be a number")
 
-		best = self._max_mass
-		ix = 0
-		for idx, mass_ in enumerate(self._mass_list):
-			tmp = abs(mass_ - mass)
-			if tmp < best:
-				best = tmp
-				ix = idx
-		return ix
+		return int(self.get_indices_of_masses([mass])[0])
+
+	def get_indices_of_masses(self, masses: Union[Sequence[float], numpy.ndarray]) -> numpy.ndarray:
+		"""
+		Returns the index of the nearest binned mass to each of the given masses.
+
+		Where two masses are equally near the lower index is returned.
+
+		:param masses: Masses to lookup in list of masses
+
+		.. versionadded:: 2.8.0
+		"""
+
+		sorted_masses, order = _get_sorted_index(self, "_mass_list")
+
+		return _nearest_indices(sorted_masses, order, masses, self._max_mass, 0)
 
 	def crop_mass(self, mass_min: float, mass_max: float) -> None:
 		"""
@@ -354,9 +384,7 @@ class BaseIntensityMatrix(pymsBaseClass, TimeListMixin, MassListMixin, Intensity
 
 		ii = self.get_index_of_mass(mass)
 
-		im = self._intensity_array
-		for spec_jj in range(len(im)):
-			im[spec_jj][ii] = 0
+		self._intensity_array[:, ii] = 0
 
 	def reduce_mass_spectra(self, n_intensities: int = 5) -> None:
 		"""
@@ -636,6 +664,49 @@ class IntensityMatrix(BaseIntensityMatrix):
 						raise TypeError("datum not a number")
 				fp.write("\r\n")
 
+	def write_npz(self, file_name: PathLike) -> None:
+		"""
+		Writes the intensity matrix to an uncompressed ``.npz`` file, which can be
+		read back, memory mapped, with :meth:`~.IntensityMatrix.from_npz`.
+
+		:param file_name: The name of the output file.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		if not is_path(file_name):
+			raise TypeError("'file_name' must be a string or a PathLike object")
+
+		_write_npz(
+				prepare_filepath(file_name),
+				"IntensityMatrix",
+				{
+						"time_list": numpy.asarray(self._time_list, dtype=numpy.float64),
+						"mass_list": numpy.asarray(self._mass_list, dtype=numpy.float64),
+						"intensity_array": self._intensity_array,
+						},
+				{},
+				)
+
+	@classmethod
+	def from_npz(cls, file_name: PathLike, mmap: bool = True) -> "IntensityMatrix":
+		"""
+		Read an intensity matrix written by :meth:`~.IntensityMatrix.write_npz`.
+
+		:param file_name: The file to read.
+		:param mmap: Whether the intensity array should be memory mapped rather than read into memory.
+			The array is mapped copy-on-write, so changes to the intensity matrix are not written back to the file.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		if not is_path(file_name):
+			raise TypeError("'file_name' must be a string or a PathLike object")
+
+		arrays, _ = _read_npz(prepare_filepath(file_name, mkdirs=False), "IntensityMatrix", 'c' if mmap else None)
+
+		return cls(arrays["time_list"].tolist(), arrays["mass_list"].tolist(), arrays["intensity_array"])
+
 	@property
 	def bpc(self) -> IonChromatogram:
 		"""
@@ -885,26 +956,82 @@ def _fill_bins(
 	# initialise masses to bin centres
 	mass_list = [i * bin_interval + min_mass for i in range(num_bins)]
 
-	# Modified binning loops. I've replaced the deepcopy getting routines with
-	# the alias properties. This way we can avoid performing the copies when
-	# it is clear that we do not intend on modifying the contents of the arrays
-	# here.
-	#           - Luke Hodkinson, 18/05/2010
-
-	# fill the bins
-	intensity_matrix = []
-	for scan in data.scan_list:  # use the alias, not the copy (Luke)
-		intensity_list = [0.0] * num_bins
-		masses = scan.mass_list  # use the alias, not the copy (Luke)
-		intensities = scan.intensity_list  # use the alias, not the copy (Luke)
-		for ii, mass in enumerate(masses):
-			mm = int((mass + bl - min_mass) / bin_interval)
-			intensity_list[mm] += intensities[ii]
-		intensity_matrix.append(intensity_list)
+	# Bin the raw data block by block into a preallocated matrix.
+	# Data held in memory is binned in one pass; data read from disk on demand in several.
+	intensity_matrix = numpy.zeros((len(data), num_bins))
+	for first_scan, masses, intensities, point_counts in data._iter_chunks():
+		intensity_matrix[first_scan:first_scan + len(point_counts)] = _bin_flat_arrays(
+				masses,
+				intensities,
+				point_counts,
+				min_mass,
+				bl,
+				bin_interval,
+				num_bins,
+				)
 
 	return IntensityMatrix(data.time_list, mass_list, intensity_matrix)
 
 
+def _bin_flat_arrays(
+		masses: numpy.ndarray,
+		intensities: numpy.ndarray,
+		point_counts: numpy.ndarray,
+		min_mass: float,
+		bl: float,
+		bin_interval: float,
+		num_bins: int,
+		) -> numpy.ndarray:
+	"""
+	Bins concatenated mass and intensity arrays into a two-dimensional intensity array.
+
+	The arrays hold the data for all scans end to end, in the same layout as the
+	``mass_values``, ``intensity_values`` and ``point_count`` variables of an ANDI-MS file.
+
+	:param masses: The *m/z* values of every scan, concatenated.
+	:param intensities: The intensity values of every scan, concatenated.
+	:param point_counts: The number of data points in each scan.
+	:param min_mass: The centre of the first bin.
+	:param bl: The fractional part of the left bin boundary offset.
+	:param bin_interval: Interval between bin centres.
+	:param num_bins: The number of bins.
+
+	:return: Array of binned intensities, with one row per scan and one column per bin.
+	"""
+
+	point_counts = numpy.asarray(point_counts, dtype=numpy.intp)
+	num_scans = len(point_counts)
+
+	# Dividing and truncating (rather than using floor division) gives
+	# exactly the same bin as ``int((mass + bl - min_mass) / bin_interval)``
+	bin_positions = (numpy.asarray(masses, dtype=numpy.float64) + bl - min_mass) / bin_interval
+	scan_indices = numpy.repeat(numpy.arange(num_scans, dtype=numpy.intp), point_counts)
+	intensities = numpy.asarray(intensities, dtype=numpy.float64)
+
+	# Masses above the last bin cannot be binned
+	if len(bin_positions) and bin_positions.max() >= num_bins:
+		raise ValueError("mass values must not be above the last bin")
+
+	# Masses below the first bin (e.g. below a user-supplied ``min_mass``) are not binned.
+	# Positions in (-1, 0) truncate towards zero, so belong to the first bin.
+	in_range = bin_positions > -1
+	if not in_range.all():
+		bin_positions = bin_positions[in_range]
+		scan_indices = scan_indices[in_range]
+		intensities = intensities[in_range]
+
+	bin_indices = bin_positions.astype(numpy.intp)
+
+	# bincount accumulates in input order, so the sums match the sequential loop
+	binned = numpy.bincount(
+			scan_indices * num_bins + bin_indices,
+			weights=intensities,
+			minlength=num_scans * num_bins,
+			)
+
+	return binned.reshape(num_scans, num_bins)
+
+
 def _fill_bins_old(
 		data: GCMS_data,
 		min_mass: float,
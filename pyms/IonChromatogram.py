@@ -26,7 +26,7 @@ Classes to model a GC-MS Ion Chromatogram.
 # stdlib
 import copy
 import warnings
-from typing import Any, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 # 3rd party
 import numpy
@@ -35,11 +35,13 @@ from domdf_python_tools.typing import PathLike
 # this package
 from pyms.Base import pymsBaseClass
 from pyms.Mixins import GetIndexTimeMixin, IntensityArrayMixin, TimeListMixin
-from pyms.Utils.IO import prepare_filepath
+from pyms.Utils.IO import _read_npz, _write_npz, prepare_filepath
 from pyms.Utils.Utils import _number_types, is_number, is_path, is_sequence, is_sequence_of
 
 __all__ = ["IonChromatogram", "ExtractedIonChromatogram", "BasePeakChromatogram"]
 
+_IC = TypeVar("_IC", bound="IonChromatogram")
+
 
 class IonChromatogram(pymsBaseClass, TimeListMixin, IntensityArrayMixin, GetIndexTimeMixin):
 	r"""
@@ -93,6 +95,38 @@ class IonChromatogram(pymsBaseClass, TimeListMixin, IntensityArrayMixin, GetInde
 		self._min_rt = min(time_list)
 		self._max_rt = max(time_list)
 
+	@classmethod
+	def _from_validated(
+			cls: Type[_IC],
+			intensity_array: numpy.ndarray,
+			time_list: List[float],
+			mass: Optional[float],
+			min_rt: float,
+			max_rt: float,
+			) -> _IC:
+		"""
+		Construct an ion chromatogram from an intensity array and time list which have already been validated,
+		such as a column of an intensity matrix.
+
+		The intensity array is used as-is, so may be a view of another array.
+
+		:param intensity_array:
+		:param time_list:
+		:param mass:
+		:param min_rt: The minimum value in ``time_list``.
+		:param max_rt: The maximum value in ``time_list``.
+		"""
+
+		ic = cls.__new__(cls)
+		ic._intensity_array = intensity_array
+		ic._time_list = list(time_list)
+		ic._mass = mass
+		ic._time_step = ic._calc_time_step()
+		ic._min_rt = min_rt
+		ic._max_rt = max_rt
+
+		return ic
+
 	def __len__(self) -> int:
 		"""
 		Returns the length of the IonChromatogram object.
@@ -243,12 +277,7 @@ class IonChromatogram(pymsBaseClass, TimeListMixin, IntensityArrayMixin, GetInde
 		:authors: Lewis Lee, Vladimir Likic
 		"""
 
-		td_list = []
-		for ii in range(len(self._time_list) - 1):
-			td = self._time_list[ii + 1] - self._time_list[ii]
-			td_list.append(td)
-
-		td_array = numpy.array(td_list)
+		td_array = numpy.diff(numpy.asarray(self._time_list, dtype=numpy.float64))
 		time_step = td_array.mean()
 
 		return time_step
@@ -283,6 +312,56 @@ class IonChromatogram(pymsBaseClass, TimeListMixin, IntensityArrayMixin, GetInde
 				else:
 					fp.write(f"{time_list[ii]} {self._intensity_array[ii]}\n")
 
+	def _npz_kwargs(self) -> Dict[str, Any]:
+		"""
+		Returns the keyword arguments, other than the intensities and times,
+		needed to reconstruct the ion chromatogram from a ``.npz`` file.
+		"""  # noqa: D400
+
+		return {"mass": None if self._mass is None else float(self._mass)}
+
+	def write_npz(self, file_name: PathLike) -> None:
+		"""
+		Writes the ion chromatogram to an uncompressed ``.npz`` file, which can be
+		read back, memory mapped, with :meth:`~.IonChromatogram.from_npz`.
+
+		:param file_name: The name of the output file.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		if not is_path(file_name):
+			raise TypeError("'file_name' must be a string or a PathLike object")
+
+		_write_npz(
+				prepare_filepath(file_name),
+				self.__class__.__name__,
+				{
+						"intensity_array": self._intensity_array,
+						"time_list": numpy.asarray(self._time_list, dtype=numpy.float64),
+						},
+				{"kwargs": self._npz_kwargs()},
+				)
+
+	@classmethod
+	def from_npz(cls: Type[_IC], file_name: PathLike, mmap: bool = True) -> _IC:
+		"""
+		Read an ion chromatogram written by :meth:`~.IonChromatogram.write_npz`.
+
+		:param file_name: The file to read.
+		:param mmap: Whether the intensity array should be memory mapped rather than read into memory.
+			The array is mapped copy-on-write, so changes to the ion chromatogram are not written back to the file.
+
+		.. versionadded:: 2.8.0
+		"""
+
+		if not is_path(file_name):
+			raise TypeError("'file_name' must be a string or a PathLike object")
+
+		arrays, metadata = _read_npz(prepare_filepath(file_name, mkdirs=False), cls.__name__, 'c' if mmap else None)
+
+		return cls(arrays["intensity_array"], arrays["time_list"].tolist(), **metadata["kwargs"])
+
 
 class ExtractedIonChromatogram(IonChromatogram):
 	r"""
@@ -331,6 +410,9 @@ class ExtractedIonChromatogram(IonChromatogram):
 
 		return self._masses
 
+	def _npz_kwargs(self) -> Dict[str, Any]:
+		return {"masses": [float(mass) for mass in self._masses]}
+
 
 class BasePeakChromatogram(IonChromatogram):
 	r"""
@@ -359,6 +441,9 @@ class BasePeakChromatogram(IonChromatogram):
 
 		super().__init__(intensity_list, time_list, None)
 
+	def _npz_kwargs(self) -> Dict[str, Any]:
+		return {}
+
 	@staticmethod
 	def is_bpc() -> bool:
 		"""
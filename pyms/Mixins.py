@@ -24,8 +24,7 @@ Mixins for PyMassSpec Classes.
 ################################################################################
 
 # stdlib
-import math
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple, Union
 from warnings import warn
 
 # 3rd party
@@ -175,12 +174,24 @@ class IntensityArrayMixin:
 class GetIndexTimeMixin:
 	"""
 	Mixin class for retention time attributes and methods.
+
+	.. versionchanged:: 2.8.0
+
+		Times are looked up with a binary search of a sorted copy of the time list,
+		which is rebuilt whenever ``_time_list`` is replaced.
 	"""
 
 	_min_rt: float
 	_max_rt: float
 	_time_list: List[float]
 
+	def _get_time_index(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+		"""
+		Returns the sorted retention times, and the index in the time list of each sorted time.
+		"""
+
+		return _get_sorted_index(self, "_time_list")
+
 	def get_index_at_time(self, time: float) -> int:
 		"""
 		Returns the nearest index corresponding to the given time.
@@ -194,28 +205,41 @@ class GetIndexTimeMixin:
 		.. versionchanged:: 2.3.0
 
 			Now returns ``-1`` if no index is found.
+
+		.. versionchanged:: 2.8.0
+
+			The index is found with a binary search rather than by comparing every time.
 		"""
 
 		if not is_number(time):
 			raise TypeError("'time' must be a number")
 
-		if (time < self._min_rt) or (time > self._max_rt):
-			msg = f"time {time:.2f} is out of bounds (min: {self._min_rt:.2f}, max: {self._max_rt:.2f})"
-			raise IndexError(msg)
+		return int(self.get_indices_at_times([time])[0])
+
+	def get_indices_at_times(self, times: Union[Sequence[float], numpy.ndarray]) -> numpy.ndarray:
+		"""
+		Returns the nearest index corresponding to each of the given times.
+
+		Where two times are equally near the earlier index is returned.
+
+		:param times: Times in seconds
 
-		time_list = self._time_list
-		time_diff_min = self._max_rt
-		ix_match = -1
+		:return: Array of the nearest index corresponding to each time, or ``-1`` if no index is found.
 
-		for ix in range(len(time_list)):
+		.. versionadded:: 2.8.0
+		"""
 
-			time_diff = math.fabs(time - time_list[ix])
+		times = numpy.asarray(times, dtype=numpy.float64)
 
-			if time_diff < time_diff_min:
-				ix_match = ix
-				time_diff_min = time_diff
+		out_of_bounds = (times < self._min_rt) | (times > self._max_rt)
+		if out_of_bounds.any():
+			time = times[out_of_bounds].flat[0]
+			msg = f"time {time:.2f} is out of bounds (min: {self._min_rt:.2f}, max: {self._max_rt:.2f})"
+			raise IndexError(msg)
 
-		return ix_match
+		sorted_times, order = self._get_time_index()
+
+		return _nearest_indices(sorted_times, order, times, self._max_rt, -1)
 
 	def get_time_at_index(self, ix: int) -> float:
 		"""
@@ -233,3 +257,82 @@ class GetIndexTimeMixin:
 			raise IndexError("index out of bounds")
 
 		return self._time_list[ix]
+
+
+def _get_sorted_index(obj: object, attr_name: str) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Returns a sorted array of the values in the list ``obj.<attr_name>``,
+	and the index in the list of each sorted value.
+
+	Equal values are kept in the order they appear in the list.
+	The result is cached on ``obj``, and rebuilt whenever the list is replaced.
+
+	:param obj:
+	:param attr_name: The name of the attribute containing the list.
+	"""  # noqa: D400
+
+	values = getattr(obj, attr_name)
+	cache_name = f"{attr_name}_index_cache"
+	cache = obj.__dict__.get(cache_name)
+
+	if cache is None or cache[0] is not values:
+		cache = (values, *_sorted_index(values))
+		obj.__dict__[cache_name] = cache
+
+	return cache[1], cache[2]
+
+
+def _sorted_index(values: Union[Sequence[float], numpy.ndarray]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Returns ``values`` sorted, and the index in ``values`` of each sorted value.
+
+	Equal values are kept in the order they appear in ``values``.
+
+	:param values:
+	"""
+
+	value_array = numpy.asarray(values, dtype=numpy.float64)
+	order = numpy.argsort(value_array, kind="stable")
+	return value_array[order], order
+
+
+def _nearest_indices(
+		sorted_values: numpy.ndarray,
+		order: numpy.ndarray,
+		targets: numpy.ndarray,
+		max_diff: float,
+		default: int,
+		) -> numpy.ndarray:
+	"""
+	Returns the index of the value nearest to each target, using a binary search of the sorted values.
+
+	This gives the same result as comparing every value in turn, and keeping the first
+	whose difference from the target is smaller than any before it (starting from ``max_diff``).
+	Where two values are equally near the earlier index is returned, and if no value
+	is nearer than ``max_diff`` the index is ``default``.
+
+	:param sorted_values: The values in ascending order.
+	:param order: The original index of each sorted value.
+	:param targets:
+	:param max_diff:
+	:param default:
+	"""
+
+	targets = numpy.asarray(targets, dtype=numpy.float64)
+
+	# The first sorted value at or after each target, and the first occurrence of the value before it
+	right = numpy.minimum(numpy.searchsorted(sorted_values, targets, side="left"), len(sorted_values) - 1)
+	left = numpy.searchsorted(sorted_values, sorted_values[numpy.maximum(right - 1, 0)], side="left")
+
+	left_diff = numpy.abs(targets - sorted_values[left])
+	right_diff = numpy.abs(targets - sorted_values[right])
+
+	indices = numpy.where(
+			left_diff == right_diff,
+			numpy.minimum(order[left], order[right]),
+			numpy.where(left_diff < right_diff, order[left], order[right]),
+			)
+
+	indices[~(numpy.minimum(left_diff, right_diff) < max_diff)] = default
+
+	return indices
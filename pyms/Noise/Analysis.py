@@ -28,12 +28,17 @@ import math
 import random
 from typing import Union
 
+# 3rd party
+import numpy
+from numpy.lib.stride_tricks import as_strided
+
 # this package
+from pyms.IntensityMatrix import BaseIntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
-from pyms.Utils.Math import MAD
 from pyms.Utils.Time import window_sele_points
+from pyms.Utils.Utils import _iter_column_blocks
 
-__all__ = ["window_analyzer"]
+__all__ = ["window_analyzer", "window_analyzer_im"]
 
 _DEFAULT_WINDOW = 256
 _DEFAULT_N_WINDOWS = 1024
@@ -61,6 +66,10 @@ def window_analyzer(
 	:return: The noise estimate.
 
 	:author: Vladimir Likic
+
+	.. versionchanged:: 2.8.0
+
+		The median absolute deviations of all the windows are calculated at once.
 	"""  # noqa: D400
 
 	if not isinstance(ic, IonChromatogram):
@@ -74,32 +83,117 @@ def window_analyzer(
 
 	ia = ic.intensity_array  # fetch the intensitiess
 
+	window_pts = window_sele_points(ic, window)
+	positions = _window_positions(ia.size - window_pts, n_windows, rand_seed)
+
+	noise_level = math.fabs(ia.max() - ia.min())
+
+	if positions.size:
+		windows = _window_view(ia, window_pts)[positions]
+		noise_level = min(noise_level, float(_window_mad(windows).min()))
+
+	return noise_level
+
+
+def window_analyzer_im(
+		im: BaseIntensityMatrix,
+		window: Union[int, str] = _DEFAULT_WINDOW,
+		n_windows: int = _DEFAULT_N_WINDOWS,
+		rand_seed: Union[int, float, str, None] = None,
+		) -> numpy.ndarray:
+	"""
+	Estimates the signal noise of each ion chromatogram in an intensity matrix.
+
+	The same randomly placed windows are used for every ion chromatogram,
+	so the estimate for each ion is the same as :func:`~.window_analyzer` gives with the same ``rand_seed``.
+
+	:param im:
+	:param window: Window width selection.
+	:param n_windows: The number of windows to calculate.
+	:param rand_seed: Seed for random number generator.
+
+	:return: The noise estimate for each mass in the intensity matrix.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	if not isinstance(im, BaseIntensityMatrix):
+		raise TypeError("'im' must be an IntensityMatrix object")
+
+	if not isinstance(window, (int, str)):
+		raise TypeError("'window' must be a int or string")
+
+	if not isinstance(n_windows, int):
+		raise TypeError("'n_windows' must be an integer")
+
+	intensity_array = im._intensity_array
+	n_scan, n_mz = intensity_array.shape
+
+	window_pts = window_sele_points(im.get_ic_at_index(0, view=True), window)
+	positions = _window_positions(n_scan - window_pts, n_windows, rand_seed)
+
+	noise_levels = numpy.abs(intensity_array.max(axis=0) - intensity_array.min(axis=0)).astype(numpy.float64)
+
+	if positions.size:
+		for block_cols in _iter_column_blocks(n_mz, 8 * positions.size * window_pts):
+			# Each ion chromatogram in the block as a contiguous row
+			block = numpy.ascontiguousarray(intensity_array[:, block_cols].T)
+			windows = _window_view(block, window_pts)[:, positions]
+			mad = _window_mad(windows).min(axis=1)
+			numpy.minimum(noise_levels[block_cols], mad, out=noise_levels[block_cols])
+
+	return noise_levels
+
+
+def _window_positions(max_pos: int, n_windows: int, rand_seed: Union[int, float, str, None]) -> numpy.ndarray:
+	"""
+	Returns the distinct starting positions of ``n_windows`` randomly placed windows.
+
+	The positions are drawn in the same sequence as the original one-at-a-time implementation
+	of :func:`~.window_analyzer`, so results for a given ``rand_seed`` are unchanged.
+
+	:param max_pos: The last possible starting position.
+	:param n_windows: The number of windows to place.
+	:param rand_seed: Seed for random number generator.
+	"""
+
 	# create an instance of the Random class
 	if rand_seed:
 		generator = random.Random(rand_seed)
 	else:
 		generator = random.Random()
 
-	window_pts = window_sele_points(ic, window)
+	# generator.randrange(): last point not included in range
+	randrange = generator.randrange
+	positions = [randrange(0, max_pos + 1) for _ in range(n_windows)]
 
-	maxi = ia.size - window_pts
-	noise_level = math.fabs(ia.max() - ia.min())
-	# best_window_pos = None
-	seen_positions = []
-
-	cntr = 0
-
-	while cntr < n_windows:
-		# generator.randrange(): last point not included in range
-		try_pos = generator.randrange(0, maxi + 1)
-		# only process the window if not analyzed previously
-		if try_pos not in seen_positions:
-			end_slice = try_pos + window_pts
-			crnt_mad = MAD(ia[try_pos:end_slice])
-			if crnt_mad < noise_level:
-				noise_level = crnt_mad
-				# best_window_pos = try_pos
-		cntr = cntr + 1
-		seen_positions.append(try_pos)
+	return numpy.unique(numpy.asarray(positions, dtype=numpy.intp))
 
-	return noise_level
+
+def _window_view(array: numpy.ndarray, window_pts: int) -> numpy.ndarray:
+	"""
+	Returns a read-only view of every window of ``window_pts`` consecutive points along the last axis of ``array``.
+
+	The second to last axis of the view is indexed by the starting point of the window,
+	and the last axis by the points in the window.
+
+	:param array:
+	:param window_pts: The number of points in each window.
+	"""
+
+	shape = (*array.shape[:-1], array.shape[-1] - window_pts + 1, window_pts)
+	strides = (*array.strides, array.strides[-1])
+
+	return as_strided(array, shape=shape, strides=strides, writeable=False)
+
+
+def _window_mad(windows: numpy.ndarray) -> numpy.ndarray:
+	"""
+	Returns the median absolute deviation of each window,
+	as calculated by :func:`pyms.Utils.Math.MAD`.
+
+	:param windows: Array with the windows along the last axis.
+	"""  # noqa: D400
+
+	deviations = numpy.abs(windows - numpy.median(windows, axis=-1, keepdims=True))
+	return numpy.median(deviations, axis=-1) / 0.6745
@@ -25,15 +25,18 @@ Savitzky-Golay noise filter.
 
 # stdlib
 import copy
+import functools
 from typing import TypeVar, Union
 
 # 3rd party
 import numpy
+from scipy import ndimage  # type: ignore[import-untyped]
 
 # this package
 from pyms.GCMS.Function import ic_window_points
 from pyms.IntensityMatrix import BaseIntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
+from pyms.Utils.Utils import _iter_column_blocks
 
 __all__ = ["savitzky_golay", "savitzky_golay_im"]
 
@@ -92,21 +95,29 @@ def savitzky_golay_im(
 		im: _IM,
 		window: Union[int, str] = _DEFAULT_WINDOW,
 		degree: int = _DEFAULT_POLYNOMIAL_DEGREE,
+		inplace: bool = False,
 		) -> _IM:
 	"""
 	Applies Savitzky-Golay filter on Intensity Matrix.
 
-	Simply wraps around the Savitzky Golay function above.
+	All ion chromatograms are smoothed with the same filter as :func:`~.savitzky_golay`,
+	a block of columns at a time. The results agree with :func:`~.savitzky_golay` to within rounding error.
 
 	:param im:
 	:type im: :class:`~.BaseIntensityMatrix`
 	:param window: The window selection parameter.
 	:param degree: degree of the fitting polynomial for the Savitzky-Golay filter.
+	:param inplace: Whether to smooth the intensity matrix in place, rather than a copy of it.
 
 	:return: Smoothed IntensityMatrix.
 	:rtype: :class:`~.BaseIntensityMatrix`
 
 	:authors: Sean O'Callaghan, Vladimir Likic, Dominic Davis-Foster
+
+	.. versionchanged:: 2.8.0
+
+		The whole intensity matrix is smoothed at once rather than one ion chromatogram at a time.
+		Added the ``inplace`` argument.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -118,22 +129,35 @@ def savitzky_golay_im(
 	if not isinstance(degree, int):
 		raise TypeError("'degree' must be an integer")
 
+	if not isinstance(inplace, bool):
+		raise TypeError("'inplace' must be a boolean")
+
 	n_scan, n_mz = im.size
 
-	im_smooth = copy.deepcopy(im)
+	if inplace:
+		im_smooth = im
+	else:
+		im_smooth = copy.deepcopy(im)
+
+	if n_mz:
+		wing_length = ic_window_points(im_smooth.get_ic_at_index(0, view=True), window, half_window=True)
+		coeff = _calc_coeff(wing_length, degree)
 
-	for ii in range(n_mz):
-		ic = im_smooth.get_ic_at_index(ii)
-		ic_smooth = savitzky_golay(ic, window, degree)
-		im_smooth.set_ic_at_index(ii, ic_smooth)
+		intensity_array = im_smooth._intensity_array
+
+		for block in _iter_column_blocks(n_mz, 8 * n_scan):
+			intensity_array[:, block] = _smooth_columns(intensity_array[:, block], coeff)
 
 	return im_smooth
 
 
+@functools.lru_cache()
 def _calc_coeff(num_points: int, pol_degree: int, diff_order: int = 0) -> numpy.ndarray:
 	"""
 	Calculates filter coefficients for symmetric savitzky-golay filter.
 
+	The coefficients are cached, and returned as a read-only array.
+
 	.. seealso::
 
 		Section 14.8: Savitzky-Golay Smoothing Filters in
@@ -175,6 +199,8 @@ def _calc_coeff(num_points: int, pol_degree: int, diff_order: int = 0) -> numpy.
 			x += wvec[m] * pow(n, m)
 		coeff[n + num_points] = x
 
+	coeff.flags.writeable = False
+
 	return coeff
 
 
@@ -224,3 +250,16 @@ def _smooth(signal: numpy.ndarray, coeff: numpy.ndarray) -> numpy.ndarray:
 	size = numpy.size(coeff - 1) // 2
 	res = numpy.convolve(signal, coeff)
 	return res[size:-size]
+
+
+def _smooth_columns(intensity_array: numpy.ndarray, coeff: numpy.ndarray) -> numpy.ndarray:
+	"""
+	Applies coefficients calculated by :func:`~._calc_coeff()` to each column of ``intensity_array``.
+
+	The result is the same as applying :func:`~._smooth` to each column, to within rounding error.
+
+	:param intensity_array: Two-dimensional array of intensities, with scans as rows and ions as columns.
+	:param coeff:
+	"""
+
+	return ndimage.convolve1d(intensity_array, coeff, axis=0, output=numpy.float64, mode="constant", cval=0.0)
@@ -25,17 +25,19 @@ Moving window noise filter.
 
 # stdlib
 import copy
-from statistics import median
+from itertools import chain
 from typing import Union
 
 # 3rd party
 import numpy
+from scipy import ndimage  # type: ignore[import-untyped]
 
 # this package
 from pyms.GCMS.Function import ic_window_points
 from pyms.IntensityMatrix import BaseIntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
 from pyms.Noise.SavitzkyGolay import _IM
+from pyms.Utils.Utils import _iter_column_blocks
 
 __all__ = ["window_smooth", "window_smooth_im"]
 
@@ -60,6 +62,10 @@ def window_smooth(
 	:return: Smoothed ion chromatogram
 
 	:authors: Vladimir Likic, Dominic Davis-Foster (type assertions)
+
+	.. versionchanged:: 2.8.0
+
+		The smoothed intensities are no longer truncated to integers.
 	"""
 
 	if not isinstance(ic, IonChromatogram):
@@ -94,7 +100,7 @@ def window_smooth_im(
 	"""
 	Applies window smoothing on Intensity Matrix.
 
-	Simply wraps around the window smooth function above.
+	Each ion chromatogram in the intensity matrix is smoothed as with :func:`~.window_smooth`.
 
 	:param im:
 	:type im: :class:`~.BaseIntensityMatrix`
@@ -106,19 +112,38 @@ def window_smooth_im(
 	:rtype: :class:`~.BaseIntensityMatrix`
 
 	:authors: Sean O'Callaghan, Vladimir Likic
+
+	.. versionchanged:: 2.8.0
+
+		The whole intensity matrix is smoothed at once rather than one ion chromatogram at a time,
+		and the smoothed intensities are no longer truncated to integers.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
 		raise TypeError("'im' must be an IntensityMatrix object")
 
+	if not isinstance(window, (int, str)):
+		raise TypeError("'window' must be a int or string")
+
+	if not isinstance(use_median, bool):
+		raise TypeError("'median' must be a Boolean")
+
 	n_scan, n_mz = im.size
 
 	im_smooth = copy.deepcopy(im)
 
-	for ii in range(n_mz):
-		ic = im_smooth.get_ic_at_index(ii)
-		ic_smooth = window_smooth(ic, window, use_median)
-		im_smooth.set_ic_at_index(ii, ic_smooth)
+	if n_mz:
+		wing_length = ic_window_points(im_smooth.get_ic_at_index(0, view=True), window, half_window=True)
+
+		intensity_array = im_smooth._intensity_array
+		if not numpy.issubdtype(intensity_array.dtype, numpy.floating):
+			intensity_array = im_smooth._intensity_array = intensity_array.astype(numpy.float64)
+
+		for block in _iter_column_blocks(n_mz, 8 * n_scan):
+			if use_median:
+				intensity_array[:, block] = _median_window(intensity_array[:, block], wing_length)
+			else:
+				intensity_array[:, block] = _mean_window(intensity_array[:, block], wing_length)
 
 	return im_smooth
 
@@ -127,55 +152,74 @@ def _mean_window(ia: numpy.ndarray, wing_length: int) -> numpy.ndarray:
 	"""
 	Applies mean-window averaging on the array of intensities.
 
-	:param ia: Intensity array
+	The windows are truncated at each end of the array.
+
+	:param ia: Intensity array, or a two-dimensional array with the intensities for an ion in each column.
 	:param wing_length: The number of points on either side of a point
 		in the ion chromatogram.
 
 	:return: Smoothed intensity array
 
 	:author: Vladimir Likic
+
+	.. versionchanged:: 2.8.0
+
+		The means are calculated for all points at once with :func:`scipy.ndimage.convolve1d`,
+		and are no longer truncated to integers.
 	"""
 
-	ia_denoise = numpy.repeat([0], ia.size)
+	ia = numpy.asarray(ia, dtype=numpy.float64)
+	num_points = ia.shape[0]
 
-	index = 0
-	end = ia.size - 1
+	# Each window is summed directly, so rounding errors do not carry over from one window to the next
+	window_sums = ndimage.convolve1d(
+			ia,
+			numpy.ones(2 * wing_length + 1),
+			axis=0,
+			output=numpy.float64,
+			mode="constant",
+			cval=0.0,
+			)
 
-	while index <= end:
-		left = index - wing_length
-		right = index + wing_length + 1
-		if left < 0:
-			left = 0
-		ia_denoise[index] = ia[left:right].mean()
-		index = index + 1
+	index = numpy.arange(num_points)
+	left = numpy.maximum(index - wing_length, 0)
+	right = numpy.minimum(index + wing_length + 1, num_points)
+	counts = (right - left).reshape(-1, *([1] * (ia.ndim - 1)))
 
-	return ia_denoise
+	return window_sums / counts
 
 
 def _median_window(ia: numpy.ndarray, wing_length: int) -> numpy.ndarray:
 	"""
 	Applies median-window averaging on the array of intensities.
 
-	:param ia: Intensity array
+	The windows are truncated at each end of the array.
+
+	:param ia: Intensity array, or a two-dimensional array with the intensities for an ion in each column.
 	:param wing_length: An integer value representing the number of
 		points on either side of a point in the ion chromatogram
 
 	:return: Smoothed intensity array
 
 	:author: Vladimir Likic
+
+	.. versionchanged:: 2.8.0
+
+		The medians are calculated with :func:`scipy.ndimage.median_filter`,
+		and are no longer truncated to integers.
 	"""
 
-	ia_denoise = numpy.repeat([0], ia.size)
+	ia = numpy.asarray(ia, dtype=numpy.float64)
+	num_points = ia.shape[0]
 
-	index = 0
-	end = ia.size - 1
+	size = [1] * ia.ndim
+	size[0] = 2 * wing_length + 1
+	ia_denoise = ndimage.median_filter(ia, size=size, mode="nearest")
 
-	while index <= end:
-		left = index - wing_length
-		right = index + wing_length + 1
-		if left < 0:
-			left = 0
-		ia_denoise[index] = median(ia[left:right])
-		index = index + 1
+	# The windows of the points within 'wing_length' of either end are truncated
+	ends = chain(range(min(wing_length, num_points)), range(max(num_points - wing_length, wing_length), num_points))
+	for index in ends:
+		left = max(index - wing_length, 0)
+		ia_denoise[index] = numpy.median(ia[left:index + wing_length + 1], axis=0)
 
 	return ia_denoise
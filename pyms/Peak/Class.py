@@ -32,6 +32,7 @@ from warnings import warn
 # this package
 from pyms.Base import pymsBaseClass
 from pyms.IntensityMatrix import BaseIntensityMatrix
+from pyms.Mixins import _nearest_indices, _sorted_index
 from pyms.Spectrum import MassSpectrum
 from pyms.Utils.Utils import is_number, is_sequence
 
@@ -536,6 +537,10 @@ class Peak(AbstractPeak):
 		:param mass: Mass value to remove
 
 		:author: Andrew Isaac
+
+		.. versionchanged:: 2.8.0
+
+			The nearest mass is found with a binary search rather than by comparing every mass.
 		"""
 
 		if not self._mass_spectrum:
@@ -549,13 +554,7 @@ class Peak(AbstractPeak):
 		if mass < min(mass_list) or mass > max(mass_list):
 			raise IndexError("'mass' not in mass range:", min(mass_list), "to", max(mass_list))
 
-		best = max(mass_list)
-		ix = 0
-		for ii in range(len(mass_list)):
-			tmp = abs(mass_list[ii] - mass)
-			if tmp < best:
-				best = tmp
-				ix = ii
+		ix = int(_nearest_indices(*_sorted_index(mass_list), [mass], max(mass_list), 0)[0])
 
 		self._mass_spectrum.mass_spec[ix] = 0
 
@@ -27,10 +27,11 @@ Functions related to Peak modification.
 import copy
 from math import ceil
 from statistics import median
-from typing import Dict, List, Sequence, Tuple, Union, cast, overload
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Union, cast, overload
 
 # 3rd party
 import deprecation  # type: ignore[import-untyped]
+import numpy
 from numpy import percentile
 from typing_extensions import Literal
 
@@ -38,9 +39,11 @@ from typing_extensions import Literal
 from pyms import __version__
 from pyms.IntensityMatrix import BaseIntensityMatrix, IntensityMatrix
 from pyms.Peak import Peak
-from pyms.Utils.Utils import is_number, is_sequence
+from pyms.Utils.Utils import is_number, is_sequence, is_sequence_of
 
 __all__ = [
+		"PeakAreas",
+		"integrate_peaks",
 		"peak_sum_area",
 		"peak_pt_bounds",
 		"peak_top_ion_areas",
@@ -52,6 +55,218 @@ __all__ = [
 		]
 
 
+class PeakAreas(NamedTuple):
+	"""
+	The result of integrating a list of peaks with :func:`~.integrate_peaks`.
+
+	The per-ion arrays have one row per peak and one column per mass in the intensity matrix.
+	Ions that were not integrated (those with zero intensity in, or absent from, the peak's mass spectrum)
+	have an area and bounds of zero, and are :py:obj:`False` in ``mask``.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	#: The index of the apex scan of each peak.
+	apex: numpy.ndarray
+
+	#: Boolean array marking the ions that were integrated for each peak.
+	mask: numpy.ndarray
+
+	#: The area of each ion.
+	area: numpy.ndarray
+
+	#: The left boundary of each ion, as an offset in scans from the apex.
+	left: numpy.ndarray
+
+	#: The right boundary of each ion, as an offset in scans from the apex.
+	right: numpy.ndarray
+
+	#: Whether the ion is shared with the neighbouring peak on the left.
+	left_shared: numpy.ndarray
+
+	#: Whether the ion is shared with the neighbouring peak on the right.
+	right_shared: numpy.ndarray
+
+
+def integrate_peaks(
+		im: BaseIntensityMatrix,
+		peak_list: Sequence[Peak],
+		max_bound: int = 0,
+		tol: float = 0.5,
+		) -> PeakAreas:
+	"""
+	Calculate the apexes, bounds and areas of all ions in each peak in ``peak_list``.
+
+	Each ion with non-zero intensity in a peak's mass spectrum is integrated
+	in the same way as :func:`~.ion_area`, but all peaks and ions are processed
+	at once on arrays rather than one ion chromatogram at a time.
+
+	:param im: The originating IntensityMatrix object.
+	:param peak_list: The peaks to integrate. Their mass spectra must only
+		contain masses from the intensity matrix.
+	:param max_bound: Optional value to limit size of detected bound.
+	:param tol: Percentage tolerance of added area to current area.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	if not isinstance(im, BaseIntensityMatrix):
+		raise TypeError("'im' must be an IntensityMatrix object")
+
+	if not is_sequence_of(peak_list, Peak):
+		raise TypeError("'peak_list' must be a list of Peak objects")
+
+	if not isinstance(max_bound, int):
+		raise TypeError("'max_bound' must be an integer")
+
+	if not is_number(tol):
+		raise TypeError("'tol' must be a number")
+
+	im_masses = numpy.asarray(im.mass_list, dtype=float)
+	mask = numpy.zeros((len(peak_list), len(im_masses)), dtype=bool)
+
+	for peak_idx, peak in enumerate(peak_list):
+		ms = peak.mass_spectrum
+
+		if ms is None:
+			raise ValueError("The peak has no mass spectrum.")
+
+		# get peak masses with non-zero intensity, and their columns in the intensity matrix
+		masses = numpy.asarray(ms.mass_list, dtype=float)[numpy.asarray(ms.mass_spec) > 0]
+		mass_ii = numpy.minimum(numpy.searchsorted(im_masses, masses), len(im_masses) - 1)
+		if len(masses) and not numpy.array_equal(im_masses[mass_ii], masses):
+			raise ValueError("The mass spectrum of each peak must only contain masses from the intensity matrix.")
+
+		mask[peak_idx, mass_ii] = True
+
+	apexes = im.get_indices_at_times([peak.rt for peak in peak_list])
+
+	peak_ii, mass_ii = numpy.nonzero(mask)
+	area, left, right, l_share, r_share = _ion_areas(
+			im._intensity_array,
+			apexes[peak_ii],
+			mass_ii,
+			max_bound,
+			float(tol),
+			)
+
+	def to_matrix(values: numpy.ndarray) -> numpy.ndarray:
+		matrix = numpy.zeros(mask.shape, dtype=values.dtype)
+		matrix[mask] = values
+		return matrix
+
+	return PeakAreas(
+			apex=apexes,
+			mask=mask,
+			area=to_matrix(area),
+			left=to_matrix(left),
+			right=to_matrix(right),
+			left_shared=to_matrix(l_share),
+			right_shared=to_matrix(r_share),
+			)
+
+
+def _ion_areas(
+		intensity_array: numpy.ndarray,
+		apexes: numpy.ndarray,
+		columns: numpy.ndarray,
+		max_bound: int = 0,
+		tol: float = 0.5,
+		) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Equivalent to :func:`~.ion_area` for the ion chromatogram in each column of
+	``intensity_array`` in ``columns``, with the apex at the corresponding scan in ``apexes``.
+
+	:return: Arrays of the area, left and right boundary offset, shared left, shared right.
+	"""
+
+	intensity_array = numpy.asarray(intensity_array, dtype=float)
+	apexes = numpy.asarray(apexes, dtype=int)
+	columns = numpy.asarray(columns, dtype=int)
+
+	l_area, left, l_share = _half_areas(intensity_array, apexes, columns, -1, max_bound, tol)
+	r_area, right, r_share = _half_areas(intensity_array, apexes, columns, 1, max_bound, tol)
+	r_area -= intensity_array[apexes, columns]  # Counted apex twice for tolerance now ignore
+
+	return l_area + r_area, left, right, l_share, r_share
+
+
+def _half_areas(
+		intensity_array: numpy.ndarray,
+		apexes: numpy.ndarray,
+		columns: numpy.ndarray,
+		direction: int,
+		max_bound: int = 0,
+		tol: float = 0.5,
+		) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Equivalent to :func:`~.half_area` for many ion chromatograms at once,
+	walking from each apex towards the end (``direction=1``) or start (``direction=-1``) of the data.
+
+	All chromatograms take one step per iteration, and those that have
+	reached their bound are dropped, so the areas are accumulated in the
+	same order as :func:`~.half_area`.
+
+	:return: Arrays of the half peak area, boundary offset, shared (True if shared ion).
+	"""
+
+	num_scans, num_cols = intensity_array.shape
+	flat = intensity_array.ravel()
+
+	tol = tol / 200.0  # halve and convert from percent
+
+	# Default number of points to sum new area across, for smoothing
+	wide = 3
+
+	def values(idx: numpy.ndarray, offset: numpy.ndarray) -> numpy.ndarray:
+		# The intensities 'offset' scans from the apex, or zero beyond the data (bounds safe)
+		rows = apexes[idx] + direction * offset
+		inside = (rows >= 0) & (rows < num_scans)
+		out = numpy.zeros(len(idx))
+		out[inside] = flat[rows[inside] * num_cols + columns[idx][inside]]
+		return out
+
+	def edge_at(idx: numpy.ndarray, offset: numpy.ndarray) -> numpy.ndarray:
+		edge_sum = values(idx, offset)
+		for ii in range(1, wide):
+			edge_sum += values(idx, offset + ii)
+		return edge_sum / wide
+
+	if direction < 0:
+		length = apexes + 1
+	else:
+		length = num_scans - apexes
+
+	if max_bound < 1:
+		limit = length
+	else:
+		limit = numpy.minimum(max_bound + 1, length)
+
+	# initialise areas and bounds
+	all_idx = numpy.arange(len(apexes))
+	index = numpy.ones(len(apexes), dtype=int)
+	area = values(all_idx, numpy.zeros_like(index))
+	edge = edge_at(all_idx, numpy.zeros_like(index))
+	old_edge = 2 * edge  # bigger than expected edge
+
+	active = all_idx
+	while len(active):
+		keep = (area[active] * tol < edge[active]) & (edge[active] < old_edge[active]) & (index[active] < limit[active])
+		active = active[keep]
+		if not len(active):
+			break
+
+		old_edge[active] = edge[active]
+		area[active] += values(active, index[active])
+		edge[active] = edge_at(active, index[active])
+		index[active] += 1
+
+	shared = edge >= old_edge
+	index -= 1
+
+	return area, index, shared
+
+
 @overload
 def peak_sum_area(
 		im: BaseIntensityMatrix,
@@ -89,6 +304,10 @@ def peak_sum_area(
 	:authors: Andrew Isaac, Dominic Davis-Foster (type assertions)
 
 	.. TODO:: what's the point of single_ion?
+
+	.. versionchanged:: 2.8.0
+
+		The ion areas are calculated with :func:`~.integrate_peaks`' array-based engine.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -101,9 +320,6 @@ def peak_sum_area(
 		raise TypeError("'max_bound' must be an integer")
 
 	sum_area = 0.0
-	# Use internal values (not copy)
-	# mat = im.matrix_list
-	mat = im.intensity_array
 	ms = peak.mass_spectrum
 
 	if ms is None:
@@ -113,14 +329,12 @@ def peak_sum_area(
 	apex = im.get_index_at_time(rt)
 
 	# get peak masses with non-zero intensity
-	mass_ii = [ii for ii in range(len(ms.mass_list)) if ms.mass_spec[ii] > 0]
+	mass_ii = numpy.flatnonzero(numpy.asarray(ms.mass_spec) > 0)
+
+	areas, *_ = _ion_areas(im._intensity_array, numpy.full(len(mass_ii), apex), mass_ii, max_bound)
 
 	area_dict = {}
-	# get stats on boundaries
-	for ii in mass_ii:
-		# get ion chromatogram as list
-		ia = [mat[scan][ii] for scan in range(len(mat))]
-		area, left, right, l_share, r_share = ion_area(ia, apex, max_bound)
+	for ii, area in zip(mass_ii.tolist(), areas.tolist()):
 		# need actual mass for single ion areas
 		actual_mass = ms.mass_list[ii]
 		area_dict[actual_mass] = area
@@ -142,6 +356,10 @@ def peak_pt_bounds(im: BaseIntensityMatrix, peak: Peak) -> Tuple[int, int]:
 	:return: Sum of peak apex ions in detected bounds
 
 	:authors: Andrew Isaac, Sean O'Callaghan, Dominic Davis-Foster
+
+	.. versionchanged:: 2.8.0
+
+		The bounds are calculated with :func:`~.integrate_peaks`' array-based engine.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -150,9 +368,6 @@ def peak_pt_bounds(im: BaseIntensityMatrix, peak: Peak) -> Tuple[int, int]:
 	if not isinstance(peak, Peak):
 		raise TypeError("'peak' must be a Peak object")
 
-	# Use internal values (not copy)
-	# mat = im.matrix_list
-	mat = im.intensity_array
 	ms = peak.mass_spectrum
 
 	if ms is None:
@@ -162,21 +377,14 @@ def peak_pt_bounds(im: BaseIntensityMatrix, peak: Peak) -> Tuple[int, int]:
 	apex = im.get_index_at_time(rt)
 
 	# get peak masses with non-zero intensity
-	mass_ii = [ii for ii in range(len(ms.mass_list)) if ms.mass_spec[ii] > 0]
-
-	left_list = []
-	right_list = []
+	mass_ii = numpy.flatnonzero(numpy.asarray(ms.mass_spec) > 0)
 
 	# get stats on boundaries
-	for ii in mass_ii:
-		# get ion chromatogram as list
-		ia = [mat[scan][ii] for scan in range(len(mat))]
-		area, left, right, l_share, r_share = ion_area(ia, apex, 0)
-		left_list.append(left)
-		right_list.append(right)
-
-	left_list.sort()
-	right_list.sort()
+	area, left_list, right_list, l_share, r_share = _ion_areas(
+			im._intensity_array,
+			numpy.full(len(mass_ii), apex),
+			mass_ii,
+			)
 
 	return int(ceil(percentile(left_list, 95))), int(ceil(percentile(right_list, 95)))
 
@@ -198,6 +406,10 @@ def peak_top_ion_areas(
 	:return: Dictionary of ``ion : ion_area pairs``.
 
 	:authors: Sean O'Callaghan,  Dominic Davis-Foster (type assertions)
+
+	.. versionchanged:: 2.8.0
+
+		The ion areas are calculated with :func:`~.integrate_peaks`' array-based engine.
 	"""
 
 	if not isinstance(im, IntensityMatrix):
@@ -216,20 +428,18 @@ def peak_top_ion_areas(
 	rt = peak.rt
 	apex = im.get_index_at_time(rt)
 
-	ion_areas = {}  # Dictionary to store ion:ion_area pairs
-
 	top_ions = peak.top_ions(n_top_ions)
-	# print(top_ions)
 
 	for ion in top_ions:
-		ion_chrom = im.get_ic_at_mass(ion)
-		# need ia as a list not numpy array so use .tolist()
-		ia = ion_chrom.intensity_array.tolist()
-		area, left, right, l_share, r_share = ion_area(ia, apex, max_bound)
-		# need actual mass for single ion areas
-		ion_areas[ion] = area
+		if ion < im.min_mass or ion > im.max_mass:
+			raise IndexError("mass is out of range")
 
-	return ion_areas
+	ion_ii = im.get_indices_of_masses(top_ions)
+
+	areas, *_ = _ion_areas(im._intensity_array, numpy.full(len(ion_ii), apex), ion_ii, max_bound)
+
+	# Dictionary to store ion:ion_area pairs
+	return dict(zip(top_ions, areas.tolist()))
 
 
 @deprecation.deprecated(
@@ -424,6 +634,10 @@ def median_bounds(im: BaseIntensityMatrix, peak: Peak, shared: bool = True) -> T
 	:return: Median left and right boundary offset in points.
 
 	:authors: Andrew Isaac, Dominic Davis-Foster
+
+	.. versionchanged:: 2.8.0
+
+		The bounds are calculated with :func:`~.integrate_peaks`' array-based engine.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
@@ -433,7 +647,6 @@ def median_bounds(im: BaseIntensityMatrix, peak: Peak, shared: bool = True) -> T
 	if not isinstance(shared, bool):
 		raise TypeError("'shared' must be a boolean")
 
-	mat = im.intensity_array
 	ms = peak.mass_spectrum
 
 	rt = peak.rt
@@ -446,20 +659,21 @@ def median_bounds(im: BaseIntensityMatrix, peak: Peak, shared: bool = True) -> T
 			apex = bounds[1]
 
 	# get peak masses with non-zero intensity
-	mass_ii = [ii for ii in range(len(ms.mass_list)) if ms.mass_spec[ii] > 0]
+	mass_ii = numpy.flatnonzero(numpy.asarray(ms.mass_spec) > 0)
 
 	# get stats on boundaries
-	left_list = []
-	right_list = []
-
-	for ii in mass_ii:
-		# get ion chromatogram as list
-		ia = [mat[scan][ii] for scan in range(len(mat))]
-		area, left, right, l_share, r_share = ion_area(ia, apex)
-		if shared or not l_share:
-			left_list.append(left)
-		if shared or not r_share:
-			right_list.append(right)
+	area, left, right, l_share, r_share = _ion_areas(
+			im._intensity_array,
+			numpy.full(len(mass_ii), apex),
+			mass_ii,
+			)
+
+	if shared:
+		left_list = left.tolist()
+		right_list = right.tolist()
+	else:
+		left_list = left[~l_share].tolist()
+		right_list = right[~r_share].tolist()
 
 	# return medians
 	# NB if shared=True, lists maybe empty
@@ -0,0 +1,448 @@
+"""
+Declarative pipelines for preprocessing intensity matrices.
+
+.. versionadded:: 2.8.0
+"""
+
+################################################################################
+#                                                                              #
+#    PyMassSpec software for processing of mass-spectrometry data              #
+#    Copyright (C) 2026 Dominic Davis-Foster                                   #
+#                                                                              #
+#    This program is free software; you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License version 2 as         #
+#    published by the Free Software Foundation.                                #
+#                                                                              #
+#    This program is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the             #
+#    GNU General Public License for more details.                              #
+#                                                                              #
+#    You should have received a copy of the GNU General Public License         #
+#    along with this program; if not, write to the Free Software               #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.                 #
+#                                                                              #
+################################################################################
+
+# stdlib
+import copy
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Tuple, TypeVar, Union
+
+# 3rd party
+import numpy
+from scipy import ndimage  # type: ignore[import-untyped]
+
+# this package
+from pyms.GCMS.Function import ic_window_points
+from pyms.IntensityMatrix import BaseIntensityMatrix
+from pyms.IonChromatogram import IonChromatogram
+from pyms.Mixins import _nearest_indices, _sorted_index
+from pyms.Noise.SavitzkyGolay import _DEFAULT_POLYNOMIAL_DEGREE, _DEFAULT_WINDOW, _calc_coeff, _smooth_columns
+from pyms.TopHat import _struct_points
+from pyms.Utils.Utils import _iter_column_blocks, is_number
+
+__all__ = [
+		"Stage",
+		"MassStage",
+		"FilterStage",
+		"NullMassStage",
+		"CropMassStage",
+		"SavitzkyGolayStage",
+		"TopHatStage",
+		"PreprocessingPipeline",
+		]
+
+_IM = TypeVar("_IM", bound=BaseIntensityMatrix)
+
+
+class Stage(ABC):
+	"""
+	Base class for the stages of a :class:`~.PreprocessingPipeline`.
+
+	Stages are subclasses of either :class:`~.MassStage` or :class:`~.FilterStage`,
+	and must implement their abstract methods.
+	"""
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}()"
+
+
+class MassStage(Stage):
+	"""
+	Base class for pipeline stages which select or remove ions from the intensity matrix.
+
+	These stages only act on the list of masses, and are resolved before any intensities are processed.
+	"""
+
+	@abstractmethod
+	def select(self, masses: numpy.ndarray, nulled: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+		"""
+		Applies the stage to the masses remaining in the intensity matrix.
+
+		:param masses: The masses remaining in the intensity matrix.
+		:param nulled: Boolean array indicating which of ``masses`` have had their intensities set to zero.
+
+		:return: The indices of the elements of ``masses`` to keep, and the updated ``nulled`` array for those masses.
+		"""
+
+
+class FilterStage(Stage):
+	"""
+	Base class for pipeline stages which filter every ion chromatogram in the intensity matrix.
+	"""
+
+	@abstractmethod
+	def prepare(self, ic: IonChromatogram) -> object:
+		"""
+		Calculates the parameters of the filter for an intensity matrix.
+
+		:param ic: An ion chromatogram from the intensity matrix, which shares its time list.
+
+		:return: The parameters passed to :meth:`~.FilterStage.apply`.
+		"""
+
+	@abstractmethod
+	def apply(self, block: numpy.ndarray, params: object) -> numpy.ndarray:
+		"""
+		Applies the filter to a block of columns of the intensity matrix.
+
+		:param block: Two-dimensional array of intensities, with scans as rows and ions as columns.
+		:param params: The parameters returned by :meth:`~.FilterStage.prepare`.
+
+		:return: The filtered block.
+		"""
+
+
+class NullMassStage(MassStage):
+	"""
+	Sets the intensities of the ions nearest to the given masses to zero.
+
+	The equivalent of calling :meth:`IntensityMatrix.null_mass() <pyms.IntensityMatrix.BaseIntensityMatrix.null_mass>`
+	for each mass.
+
+	:param masses: The masses to remove.
+	"""
+
+	def __init__(self, masses: Iterable[float]):
+		masses = list(masses)
+
+		if not all(is_number(mass) for mass in masses):
+			raise TypeError("'masses' must be a sequence of numbers")
+
+		self.masses: List[float] = masses
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}({self.masses!r})"
+
+	def select(self, masses: numpy.ndarray, nulled: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+		"""
+		Applies the stage to the masses remaining in the intensity matrix.
+
+		:param masses: The masses remaining in the intensity matrix.
+		:param nulled: Boolean array indicating which of ``masses`` have had their intensities set to zero.
+
+		:return: The indices of the elements of ``masses`` to keep, and the updated ``nulled`` array for those masses.
+		"""
+
+		min_mass, max_mass = masses.min(), masses.max()
+		for mass in self.masses:
+			if mass < min_mass or mass > max_mass:
+				raise IndexError(f"'mass' not in mass range: {min_mass:.3f} to {max_mass:.3f}")
+
+		nulled = nulled.copy()
+		nulled[_nearest_indices(*_sorted_index(masses), self.masses, max_mass, 0)] = True
+
+		return numpy.arange(masses.size), nulled
+
+
+class CropMassStage(MassStage):
+	"""
+	Removes the ions outside of the given mass range.
+
+	The equivalent of calling :meth:`IntensityMatrix.crop_mass() <pyms.IntensityMatrix.BaseIntensityMatrix.crop_mass>`.
+
+	:param mass_min: Minimum mass value
+	:param mass_max: Maximum mass value
+	"""
+
+	def __init__(self, mass_min: float, mass_max: float):
+		if not is_number(mass_min) or not is_number(mass_max):
+			raise TypeError("'mass_min' and 'mass_max' must be numbers")
+		if mass_min >= mass_max:
+			raise ValueError("'mass_min' must be less than 'mass_max'")
+
+		self.mass_min: float = mass_min
+		self.mass_max: float = mass_max
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}({self.mass_min!r}, {self.mass_max!r})"
+
+	def select(self, masses: numpy.ndarray, nulled: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+		"""
+		Applies the stage to the masses remaining in the intensity matrix.
+
+		:param masses: The masses remaining in the intensity matrix.
+		:param nulled: Boolean array indicating which of ``masses`` have had their intensities set to zero.
+
+		:return: The indices of the elements of ``masses`` to keep, and the updated ``nulled`` array for those masses.
+		"""
+
+		if self.mass_min < masses.min():
+			raise ValueError(f"'mass_min' is less than the smallest mass: {masses.min():.3f}")
+		if self.mass_max > masses.max():
+			raise ValueError(f"'mass_max' is greater than the largest mass: {masses.max():.3f}")
+
+		keep = numpy.flatnonzero((masses >= self.mass_min) & (masses <= self.mass_max))
+
+		return keep, nulled[keep]
+
+
+class SavitzkyGolayStage(FilterStage):
+	"""
+	Smooths each ion chromatogram with a Savitzky-Golay filter.
+
+	The equivalent of calling :func:`~pyms.Noise.SavitzkyGolay.savitzky_golay_im` ``passes`` times.
+
+	:param window: The window selection parameter.
+	:param degree: degree of the fitting polynomial for the Savitzky-Golay filter.
+	:param passes: The number of times to apply the filter.
+	"""
+
+	def __init__(
+			self,
+			window: Union[int, str] = _DEFAULT_WINDOW,
+			degree: int = _DEFAULT_POLYNOMIAL_DEGREE,
+			passes: int = 1,
+			):
+		if not isinstance(window, (int, str)):
+			raise TypeError("'window' must be either an int or a string")
+
+		if not isinstance(degree, int):
+			raise TypeError("'degree' must be an integer")
+
+		if not isinstance(passes, int):
+			raise TypeError("'passes' must be an integer")
+		elif passes < 1:
+			raise ValueError("'passes' must be a positive integer")
+
+		self.window: Union[int, str] = window
+		self.degree: int = degree
+		self.passes: int = passes
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}(window={self.window!r}, degree={self.degree!r}, passes={self.passes!r})"
+
+	def prepare(self, ic: IonChromatogram) -> numpy.ndarray:
+		"""
+		Calculates the filter coefficients for an intensity matrix.
+
+		:param ic: An ion chromatogram from the intensity matrix, which shares its time list.
+		"""
+
+		wing_length = ic_window_points(ic, self.window, half_window=True)
+		return _calc_coeff(wing_length, self.degree)
+
+	def apply(self, block: numpy.ndarray, params: numpy.ndarray) -> numpy.ndarray:  # type: ignore[override]
+		"""
+		Applies the filter to a block of columns of the intensity matrix.
+
+		:param block: Two-dimensional array of intensities, with scans as rows and ions as columns.
+		:param params: The filter coefficients returned by :meth:`~.SavitzkyGolayStage.prepare`.
+		"""
+
+		for _ in range(self.passes):
+			block = _smooth_columns(block, params)
+
+		return block
+
+
+class TopHatStage(FilterStage):
+	"""
+	Applies top-hat baseline correction to each ion chromatogram.
+
+	The equivalent of calling :func:`~pyms.TopHat.tophat_im`.
+
+	:param struct: Top-hat structural element as time string.
+		The structural element needs to be larger than the features one
+		wants to retain in the spectrum after the top-hat transform.
+	"""
+
+	def __init__(self, struct: Union[int, str, None] = None):
+		if struct is not None and not isinstance(struct, (int, str)):
+			raise TypeError("'struct' must be either an int or a string")
+
+		self.struct: Union[int, str, None] = struct
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}({self.struct!r})"
+
+	def prepare(self, ic: IonChromatogram) -> numpy.ndarray:
+		"""
+		Calculates the structural element for an intensity matrix.
+
+		:param ic: An ion chromatogram from the intensity matrix, which shares its time list.
+		"""
+
+		return numpy.ones((_struct_points(ic, self.struct), 1), dtype=bool)
+
+	def apply(self, block: numpy.ndarray, params: numpy.ndarray) -> numpy.ndarray:  # type: ignore[override]
+		"""
+		Applies the filter to a block of columns of the intensity matrix.
+
+		:param block: Two-dimensional array of intensities, with scans as rows and ions as columns.
+		:param params: The structural element returned by :meth:`~.TopHatStage.prepare`.
+		"""
+
+		return ndimage.white_tophat(block, footprint=params)
+
+
+class PreprocessingPipeline:
+	"""
+	A sequence of preprocessing stages which are applied to intensity matrices together.
+
+	The stages which select ions (:class:`~.MassStage`) are resolved first, from the list of masses alone.
+	The intensities of the remaining ions are then copied into a single output array a block of columns at a time,
+	and each :class:`~.FilterStage` is applied to the block in turn.
+	This avoids copying the whole intensity matrix for each stage.
+
+	The pipeline does not keep any state between intensity matrices (other than :attr:`~.timings`),
+	so the same pipeline can be used to process a batch of samples.
+
+	:param stages: The stages of the pipeline, in the order they are to be applied.
+
+	.. code-block:: python
+
+		pipeline = PreprocessingPipeline([
+				NullMassStage([73, 147]),
+				CropMassStage(50, 540),
+				SavitzkyGolayStage(),
+				TopHatStage("1.5m"),
+				])
+
+		for im in intensity_matrices:
+			pipeline.process(im, inplace=True)
+	"""
+
+	#: The time, in seconds, spent in each of the stages in the most recent call to
+	#: :meth:`~.process` or :meth:`~.process_batch`.
+	timings: List[float]
+
+	def __init__(self, stages: Iterable[Stage]):
+		stages = list(stages)
+
+		if not all(isinstance(stage, Stage) for stage in stages):
+			raise TypeError("'stages' must be a sequence of Stage objects")
+
+		self.stages: List[Stage] = stages
+		self.timings = [0.0] * len(stages)
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}({self.stages!r})"
+
+	def process(self, im: _IM, inplace: bool = False) -> _IM:
+		"""
+		Applies the pipeline to an intensity matrix.
+
+		:param im:
+		:type im: :class:`~.BaseIntensityMatrix`
+		:param inplace: Whether to replace the data in the intensity matrix with the processed data,
+			rather than returning a copy of it.
+
+		:return: The processed intensity matrix.
+		:rtype: :class:`~.BaseIntensityMatrix`
+		"""
+
+		self.timings = [0.0] * len(self.stages)
+		return self._process(im, inplace)
+
+	def process_batch(self, ims: Iterable[_IM], inplace: bool = False) -> List[_IM]:
+		"""
+		Applies the pipeline to each of a sequence of intensity matrices.
+
+		:attr:`~.timings` records the total time spent in each stage for the whole batch.
+
+		:param ims:
+		:param inplace: Whether to replace the data in the intensity matrices with the processed data,
+			rather than returning copies of them.
+
+		:return: The processed intensity matrices.
+		"""
+
+		self.timings = [0.0] * len(self.stages)
+		return [self._process(im, inplace) for im in ims]
+
+	def timing_report(self) -> str:
+		"""
+		Returns a table of the time spent in each stage in the most recent call to
+		:meth:`~.process` or :meth:`~.process_batch`.
+		"""  # noqa: D400
+
+		names = [repr(stage) for stage in self.stages]
+		width = max((len(name) for name in names), default=0)
+
+		lines = [f"{name:<{width}}  {seconds:.4f} s" for name, seconds in zip(names, self.timings)]
+		lines.append(f"{'Total':<{width}}  {sum(self.timings):.4f} s")
+
+		return '\n'.join(lines)
+
+	def _process(self, im: _IM, inplace: bool) -> _IM:
+		if not isinstance(im, BaseIntensityMatrix):
+			raise TypeError("'im' must be an IntensityMatrix object")
+
+		if not isinstance(inplace, bool):
+			raise TypeError("'inplace' must be a boolean")
+
+		mass_array = numpy.asarray(im._mass_list, dtype=numpy.float64)
+		columns = numpy.arange(mass_array.size)
+		nulled = numpy.zeros(mass_array.size, dtype=bool)
+		filters: List[Tuple[int, FilterStage]] = []
+
+		for stage_idx, stage in enumerate(self.stages):
+			if isinstance(stage, MassStage):
+				start_time = time.perf_counter()
+				keep, nulled = stage.select(mass_array[columns], nulled)
+				columns = columns[keep]
+				self.timings[stage_idx] += time.perf_counter() - start_time
+			elif isinstance(stage, FilterStage):
+				filters.append((stage_idx, stage))
+
+		if not columns.size:
+			raise ValueError("The pipeline removed every mass from the intensity matrix")
+
+		intensity_array = im._intensity_array
+		n_scan = intensity_array.shape[0]
+		output = numpy.empty((n_scan, columns.size), dtype=numpy.float64)
+
+		ic = im.get_ic_at_index(0, view=True)
+		params: List[Optional[object]] = [None] * len(self.stages)
+		for stage_idx, stage in filters:
+			start_time = time.perf_counter()
+			params[stage_idx] = stage.prepare(ic)
+			self.timings[stage_idx] += time.perf_counter() - start_time
+
+		for block_cols in _iter_column_blocks(columns.size, 8 * n_scan):
+			block = intensity_array[:, columns[block_cols]].astype(numpy.float64)
+			block[:, nulled[block_cols]] = 0
+
+			for stage_idx, stage in filters:
+				start_time = time.perf_counter()
+				block = stage.apply(block, params[stage_idx])
+				self.timings[stage_idx] += time.perf_counter() - start_time
+
+			output[:, block_cols] = block
+
+		if inplace:
+			im_processed = im
+		else:
+			im_processed = copy.copy(im)
+			im_processed._time_list = list(im._time_list)
+
+		mass_list = [im._mass_list[column] for column in columns]
+		im_processed._mass_list = mass_list
+		im_processed._min_mass = min(mass_list)
+		im_processed._max_mass = max(mass_list)
+		im_processed._intensity_array = output
+
+		return im_processed
@@ -59,7 +59,7 @@ def add_gaussc_noise(im: BaseIntensityMatrix, scale: float) -> None:
 	n_scan, n_mz = im.size
 
 	for i in range(n_mz):
-		ic = im.get_ic_at_index(i)
+		ic = im.get_ic_at_index(i, view=True)
 		add_gaussc_noise_ic(ic, scale)
 		im.set_ic_at_index(i, ic)
 
@@ -102,7 +102,7 @@ def add_gaussv_noise(
 	n_scan, n_mz = im.size
 
 	for i in range(n_mz):
-		ic = im.get_ic_at_index(i)
+		ic = im.get_ic_at_index(i, view=True)
 		add_gaussv_noise_ic(ic, scale, cutoff, prop)
 		im.set_ic_at_index(i, ic)
 
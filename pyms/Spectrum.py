@@ -24,7 +24,6 @@ Classes to model Mass Spectra and Scans.
 ################################################################################
 
 # stdlib
-import re
 import warnings
 from collections import defaultdict
 from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Type, TypeVar, Union
@@ -38,7 +37,7 @@ from domdf_python_tools.typing import PathLike
 from pyms.Base import pymsBaseClass
 from pyms.Mixins import MassListMixin
 from pyms.Utils.IO import prepare_filepath
-from pyms.Utils.jcamp import xydata_tags
+from pyms.Utils.jcamp import iter_jcamp_records, xydata_tags, xydata_to_arrays
 from pyms.Utils.Utils import is_path, is_sequence
 
 _S = TypeVar("_S", bound="Scan")
@@ -398,6 +397,10 @@ class MassSpectrum(Scan):
 		:param file_name: Path of the file to read.
 
 		:authors: Qiao Wang, Andrew Isaac, Vladimir Likic, David Kainer, Dominic Davis-Foster
+
+		.. versionchanged:: 2.8.0
+
+			The XY data is converted in bulk, and the compressed ASDF forms are supported.
 		"""
 
 		if not is_path(file_name):
@@ -406,41 +409,24 @@ class MassSpectrum(Scan):
 		file_name = prepare_filepath(file_name, mkdirs=False)
 
 		print(f" -> Reading JCAMP file '{file_name}'")
-		xydata = []
-		last_tag = None
+		mass_arrays = []
+		intensity_arrays = []
+		labels: Dict[str, str] = {}
 
 		with file_name.open('r', encoding="UTF-8") as lines_list:
+			for label, value, data in iter_jcamp_records(lines_list):
+				if label.startswith("END"):
+					break
 
-			for line in lines_list:
-
-				if line.strip():
-					if line.startswith("##"):
-						# key word or information
-						fields = line[2:].split('=', 1)
-						current_tag = fields[0] = fields[0].upper()
-						last_tag = fields[0]
-
-						if current_tag.upper().startswith("END"):
-							break
+				labels[label] = value
 
-					else:
-						if last_tag in xydata_tags:
-							line_sub = re.split(r",| ", line.strip())
-							for item in line_sub:
-								if not len(item.strip()) == 0:
-									xydata.append(float(item.strip()))
+				if label in xydata_tags:
+					mass_array, intensity_array = xydata_to_arrays(data, value, labels)
+					mass_arrays.append(mass_array)
+					intensity_arrays.append(intensity_array)
 
-		# By this point we should have all of the xydata
-		if len(xydata) % 2 == 1:
-			# TODO: This means the data is not in x, y pairs
-			#  Make a better error message
-			raise ValueError("data not in pair !")
-
-		mass_list = []
-		intensity_list = []
-		for i in range(len(xydata) // 2):
-			mass_list.append(xydata[i * 2])
-			intensity_list.append(xydata[i * 2 + 1])
+		mass_list = numpy.concatenate(mass_arrays).tolist() if mass_arrays else []
+		intensity_list = numpy.concatenate(intensity_arrays).tolist() if intensity_arrays else []
 
 		return cls(mass_list, intensity_list)
 
@@ -25,7 +25,7 @@ Top-hat baseline corrector.
 
 # stdlib
 import copy
-from typing import Optional, Union
+from typing import TypeVar, Union
 
 # 3rd party
 import numpy
@@ -35,12 +35,15 @@ from scipy import ndimage  # type: ignore[import-untyped]
 from pyms.GCMS.Function import ic_window_points
 from pyms.IntensityMatrix import BaseIntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
+from pyms.Utils.Utils import _iter_column_blocks
 
 __all__ = ["tophat", "tophat_im"]
 
 # default structural element as a fraction of total number of points
 _STRUCT_ELM_FRAC = 0.2
 
+_IM = TypeVar("_IM", bound=BaseIntensityMatrix)
+
 
 def tophat(ic: IonChromatogram, struct: Union[int, str, None] = None) -> IonChromatogram:
 	"""
@@ -59,12 +62,9 @@ def tophat(ic: IonChromatogram, struct: Union[int, str, None] = None) -> IonChro
 	if not isinstance(ic, IonChromatogram):
 		raise TypeError("'ic' must be an IonChromatogram object")
 
-	ia = copy.deepcopy(ic.intensity_array)
+	ia = ic.intensity_array
 
-	if struct:
-		struct_pts = ic_window_points(ic, struct)
-	else:
-		struct_pts = int(round(ia.size * _STRUCT_ELM_FRAC))
+	struct_pts = _struct_points(ic, struct)
 
 	# print(f" -> Top-hat: structural element is {struct_pts:d} point(s)")
 
@@ -77,32 +77,68 @@ def tophat(ic: IonChromatogram, struct: Union[int, str, None] = None) -> IonChro
 	return ic_bc
 
 
-def tophat_im(im: BaseIntensityMatrix, struct: Optional[str] = None) -> BaseIntensityMatrix:
+def tophat_im(im: _IM, struct: Union[int, str, None] = None, inplace: bool = False) -> _IM:
 	"""
 	Top-hat baseline correction on Intensity Matrix.
 
-	Wraps around the TopHat function above.
+	All ion chromatograms are corrected with the same structural element as :func:`~.tophat`,
+	a block of columns at a time.
 
 	:param im: The input Intensity Matrix.
+	:type im: :class:`~.BaseIntensityMatrix`
 	:param struct: Top-hat structural element as time string.
 		The structural element needs to be larger than the features one
 		wants to retain in the spectrum after the top-hat transform.
+	:param inplace: Whether to correct the intensity matrix in place, rather than a copy of it.
+		Only one block of columns is copied at a time, so this can be used for
+		intensity matrices which do not fit in memory twice.
 
 	:return: Top-hat corrected IntensityMatrix Matrix
+	:rtype: :class:`~.BaseIntensityMatrix`
 
 	:author: Sean O'Callaghan
+
+	.. versionchanged:: 2.8.0
+
+		The whole intensity matrix is corrected at once rather than one ion chromatogram at a time.
+		Added the ``inplace`` argument.
 	"""
 
 	if not isinstance(im, BaseIntensityMatrix):
 		raise TypeError("'im' must be an IntensityMatrix object")
 
+	if not isinstance(inplace, bool):
+		raise TypeError("'inplace' must be a boolean")
+
 	n_scan, n_mz = im.size
 
-	im_smooth = copy.deepcopy(im)
+	if inplace:
+		im_bc = im
+	else:
+		im_bc = copy.deepcopy(im)
+
+	if n_mz:
+		struct_pts = _struct_points(im_bc.get_ic_at_index(0, view=True), struct)
+		footprint = numpy.ones((struct_pts, 1), dtype=bool)
+
+		intensity_array = im_bc._intensity_array
 
-	for ii in range(n_mz):
-		ic = im_smooth.get_ic_at_index(ii)
-		ic_smooth = tophat(ic, struct)
-		im_smooth.set_ic_at_index(ii, ic_smooth)
+		for block in _iter_column_blocks(n_mz, intensity_array.itemsize * n_scan):
+			intensity_array[:, block] = ndimage.white_tophat(intensity_array[:, block], footprint=footprint)
 
-	return im_smooth
+	return im_bc
+
+
+def _struct_points(ic: IonChromatogram, struct: Union[int, str, None]) -> int:
+	"""
+	Returns the number of points in the top-hat structural element for the ion chromatogram.
+
+	:param ic:
+	:param struct: Top-hat structural element as time string.
+		If :py:obj:`None` the structural element is a fifth of the length of the ion chromatogram.
+	"""
+
+	if struct:
+		return ic_window_points(ic, struct)
+	else:
+		return int(round(len(ic) * _STRUCT_ELM_FRAC))
@@ -25,11 +25,17 @@ General I/O functions.
 
 # stdlib
 import gzip
+import json
+import os
 import pathlib
 import pickle
-from typing import Any, List, Union, cast
+import struct
+import tempfile
+import zipfile
+from typing import IO, Any, Dict, List, Mapping, Optional, Tuple, Union, cast
 
 # 3rd party
+import numpy
 from domdf_python_tools.stringlist import StringList
 from domdf_python_tools.typing import PathLike
 
@@ -212,3 +218,139 @@ def save_data(
 			fp.write(str(buf))
 	else:
 		file_name.write_text(str(buf), encoding="UTF-8")
+
+
+#: Version of the layout of the ``.npz`` files written by the ``write_npz`` methods.
+_npz_format_version = 1
+
+
+def _write_npz(
+		file_name: pathlib.Path,
+		class_name: str,
+		arrays: Mapping[str, numpy.ndarray],
+		metadata: Mapping[str, Any],
+		) -> None:
+	"""
+	Write arrays and JSON metadata to an uncompressed ``.npz`` file.
+
+	The file is written to a temporary name and then moved into place,
+	so a partially written file is never seen by readers.
+
+	:param file_name:
+	:param class_name: The name of the class the data belongs to.
+	:param arrays: The arrays to store. The arrays are written uncompressed, so they can be memory mapped.
+	:param metadata: Additional JSON serialisable data to store.
+	"""
+
+	header = {"class": class_name, "format_version": _npz_format_version, **metadata}
+
+	# Each writer gets its own temporary file, so processes writing the same file at once don't interfere
+	with tempfile.NamedTemporaryFile(
+			dir=file_name.parent,
+			prefix=file_name.name + '.',
+			suffix=".tmp",
+			delete=False,
+			) as fp:
+		tmp_file_name = fp.name
+
+		try:
+			numpy.savez(fp, metadata=numpy.array(json.dumps(header)), **arrays)
+		except BaseException:
+			fp.close()
+			os.unlink(tmp_file_name)
+			raise
+
+	os.replace(tmp_file_name, file_name)
+
+
+def _read_npz_metadata(file_name: pathlib.Path) -> Dict[str, Any]:
+	"""
+	Read only the metadata from a ``.npz`` file written by :func:`~._write_npz`.
+
+	:param file_name:
+	"""
+
+	with zipfile.ZipFile(file_name) as zf:
+		with zf.open("metadata.npy") as fp:
+			return json.loads(str(numpy.lib.format.read_array(fp, allow_pickle=False)))
+
+
+def _read_npz(
+		file_name: pathlib.Path,
+		class_name: str,
+		mmap_mode: Optional[str] = 'r',
+		) -> Tuple[Dict[str, numpy.ndarray], Dict[str, Any]]:
+	"""
+	Read arrays and metadata from a ``.npz`` file written by :func:`~._write_npz`.
+
+	:param file_name:
+	:param class_name: The name of the class the data is expected to belong to.
+	:param mmap_mode: The mode to memory map the arrays with (see :class:`numpy.memmap`),
+		or :py:obj:`None` to read them into memory.
+
+	:return: The arrays, and the metadata.
+	"""
+
+	arrays: Dict[str, numpy.ndarray] = {}
+
+	with zipfile.ZipFile(file_name) as zf, file_name.open("rb") as raw_fp:
+		for info in zf.infolist():
+			name = info.filename[:-len(".npy")]
+			array = None
+
+			if mmap_mode is not None and info.compress_type == zipfile.ZIP_STORED:
+				array = _memmap_npz_member(file_name, raw_fp, info, mmap_mode)
+
+			if array is None:
+				with zf.open(info) as fp:
+					array = numpy.lib.format.read_array(fp, allow_pickle=False)
+
+			arrays[name] = array
+
+	metadata = json.loads(str(arrays.pop("metadata")))
+
+	if metadata.get("class") != class_name:
+		raise ValueError(f"{file_name.as_posix()!r} does not contain a {class_name} object")
+	if metadata.get("format_version") != _npz_format_version:
+		raise ValueError(f"Unsupported file format version {metadata.get('format_version')!r}")
+
+	return arrays, metadata
+
+
+def _memmap_npz_member(
+		file_name: pathlib.Path,
+		raw_fp: IO[bytes],
+		info: zipfile.ZipInfo,
+		mmap_mode: str,
+		) -> Optional[numpy.ndarray]:
+	"""
+	Memory map an array stored uncompressed in a ``.npz`` file.
+
+	:return: The array, or :py:obj:`None` if it cannot be memory mapped.
+	"""
+
+	# The data follows the 30 byte local file header, the file name, and the extra field.
+	raw_fp.seek(info.header_offset)
+	local_header = raw_fp.read(30)
+	name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+	raw_fp.seek(info.header_offset + 30 + name_length + extra_length)
+
+	version = numpy.lib.format.read_magic(raw_fp)
+	if version == (1, 0):
+		shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(raw_fp)
+	elif version == (2, 0):
+		shape, fortran_order, dtype = numpy.lib.format.read_array_header_2_0(raw_fp)
+	else:
+		return None
+
+	if dtype.hasobject or not shape or 0 in shape:
+		return None
+
+	return numpy.memmap(
+			file_name,
+			dtype=dtype,
+			mode=mmap_mode,
+			shape=shape,
+			order='F' if fortran_order else 'C',
+			offset=raw_fp.tell(),
+			)
@@ -27,7 +27,13 @@ General utility functions.
 import os
 import pathlib
 import pickle
-from typing import TYPE_CHECKING, Any, Sequence
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Sequence
+
+try:
+	from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # pragma: no cover (<py38)
+	resource_tracker = shared_memory = None  # type: ignore[assignment]
 
 # 3rd party
 import numpy
@@ -43,6 +49,10 @@ _list_types = (Sequence, numpy.ndarray)
 _path_types = (str, os.PathLike, pathlib.Path)
 _number_types = (int, float, signedinteger)
 
+# The approximate size, in bytes, of the working memory for each block of columns from _iter_column_blocks.
+# Filtering is faster when the working memory fits in the CPU cache.
+_BLOCK_SIZE = 2**20
+
 
 def is_path(obj: Any) -> bool:
 	"""
@@ -75,8 +85,17 @@ def is_sequence_of(obj: Any, of: Any) -> bool:
 
 	:param obj:
 	:param of:
+
+	.. versionchanged:: 2.8.0
+
+		The elements of non-object numpy arrays are checked using the array's data type.
 	"""  # noqa: D400
 
+	if isinstance(obj, numpy.ndarray) and obj.ndim and obj.dtype != object:
+		# Every element has the same type, so there is no need to check each one
+		element_type = obj.dtype.type if obj.ndim == 1 else numpy.ndarray
+		return not len(obj) or issubclass(element_type, of)
+
 	return isinstance(obj, _list_types) and not isinstance(obj, str) and all(isinstance(x, of) for x in obj)
 
 
@@ -98,3 +117,56 @@ def _pickle_load_path(filename: pathlib.Path, *args, **kwargs) -> object:
 def _pickle_dump_path(filename: pathlib.Path, data: Any, *args, **kwargs) -> None:
 	with filename.open("wb") as fp:
 		pickle.dump(data, fp, *args, **kwargs)
+
+
+def _iter_column_blocks(n_cols: int, column_bytes: int) -> Iterator[slice]:
+	"""
+	Split the columns of an intensity matrix into blocks which are processed together,
+	so that the working memory for each block is about ``_BLOCK_SIZE`` bytes.
+
+	All the ion chromatograms in an intensity matrix share the same time list,
+	so parameters which depend on it (such as a window size in points) can be calculated once,
+	from the first ion chromatogram, and used for every block.
+
+	:param n_cols: The number of columns.
+	:param column_bytes: The number of bytes of working memory needed for each column.
+
+	:return: An iterator of slices selecting each block of columns.
+	"""
+
+	block_cols = max(1, _BLOCK_SIZE // max(column_bytes, 1))
+
+	for start in range(0, n_cols, block_cols):
+		yield slice(start, min(start + block_cols, n_cols))
+
+
+_shares_resource_tracker: Dict[int, bool] = {}
+
+
+def _attach_shared_memory(name: str) -> "shared_memory.SharedMemory":
+	"""
+	Attach to an existing block of shared memory, which was created (and will be unlinked) by another process.
+
+	Before Python 3.13 attaching registers the memory with the resource tracker.
+	A worker process forked before the creating process started its resource tracker starts its own,
+	which would unlink the memory and warn that it was leaked when the worker exits.
+	The memory is therefore only left registered if the tracker is shared with the creating process.
+
+	:param name: The name of the shared memory.
+	"""
+
+	if sys.version_info >= (3, 13):  # pragma: no cover (<py313)
+		return shared_memory.SharedMemory(name=name, track=False)
+
+	# Whether a tracker was running when this process first attached, which it can only have inherited.
+	# Once the process starts its own tracker this can no longer be told, so the answer is kept.
+	pid = os.getpid()
+	if pid not in _shares_resource_tracker:
+		_shares_resource_tracker[pid] = resource_tracker._resource_tracker._fd is not None  # type: ignore[attr-defined]
+
+	shm = shared_memory.SharedMemory(name=name)
+
+	if not _shares_resource_tracker[pid]:
+		resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+
+	return shm
@@ -1,5 +1,5 @@
 """
-Constants required for reading JCAMP files.
+Constants and helper functions for reading JCAMP files.
 """
 
 ################################################################################
@@ -22,7 +22,14 @@ Constants required for reading JCAMP files.
 #                                                                              #
 ################################################################################
 
-__all__ = ["JcampTagWarning", "header_info_fields", "xydata_tags"]
+# stdlib
+import re
+from typing import IO, Iterator, List, Mapping, Optional, Tuple
+
+# 3rd party
+import numpy
+
+__all__ = ["JcampTagWarning", "header_info_fields", "xydata_tags", "iter_jcamp_records", "xydata_to_arrays"]
 
 header_info_fields = [
 		"TITLE",
@@ -79,3 +86,214 @@ class JcampTagWarning(UserWarning):
 
 	def __str__(self) -> str:
 		return f"Unrecognised tag {self.tag}."
+
+
+def iter_jcamp_records(fp: IO[str], block_size: int = 2**20) -> Iterator[Tuple[str, str, str]]:
+	"""
+	Split a JCAMP-DX file into labelled data records in a single pass.
+
+	The file is read in blocks of ``block_size`` characters, so the whole file is never held in memory.
+	Each record is returned as a ``(label, value, data)`` tuple, where ``label`` is
+	the upper-cased label without the leading ``##`` (e.g. ``'XYDATA'``), ``value`` is the
+	stripped text after the ``=``, and ``data`` is the text of the lines which follow
+	the label, with any ``$$`` comments removed.
+
+	:param fp: The open file.
+	:param block_size: The number of characters to read at a time.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	remainder = ''
+	preamble = True
+
+	while True:
+		block = fp.read(block_size)
+		records = (remainder + block).split("\n##")
+
+		if block:
+			# The last record may continue in the next block
+			remainder = records.pop()
+
+		if preamble and records:
+			# Discard anything before the first label
+			if records[0].startswith("##"):
+				records[0] = records[0][2:]
+			else:
+				del records[0]
+			preamble = False
+
+		for record in records:
+			label_line, _, data = record.partition('\n')
+			label, _, value = label_line.partition('=')
+
+			if "$$" in data:
+				data = _comment_re.sub('', data)
+
+			yield label.upper(), value.strip(), data
+
+		if not block:
+			break
+
+
+# ASDF (ASCII squeezed difference form) pseudo-digits. See McDonald & Wilks (1988), Appl. Spectrosc. 42, 151.
+_sqz_digits = {'@': 0, **{chr(65 + i): i + 1 for i in range(9)}, **{chr(97 + i): -(i + 1) for i in range(9)}}
+_dif_digits = {'%': 0, **{chr(74 + i): i + 1 for i in range(9)}, **{chr(106 + i): -(i + 1) for i in range(9)}}
+_dup_digits = {**{chr(83 + i): i + 1 for i in range(8)}, 's': 9}
+
+_comment_re = re.compile(r"\$\$[^\n]*")
+
+# 'E' and 'e' are also SQZ digits, but are left out here as they are indistinguishable from an exponent.
+_asdf_re = re.compile(r"[@%A-DF-Za-df-s?]")
+
+# After a number with a decimal point 'E' or 'e' starts an exponent, which need not be signed.
+# After an integer it is only an exponent if it is followed by a sign, and is otherwise an SQZ digit.
+_asdf_token_re = re.compile(
+		r"[+-]?(?:\d+\.\d*|\.\d+)(?:[Ee][+-]?\d+)?|[+-]?\d+(?:[Ee][+-]\d+)?|[@A-Ia-i%J-Rj-rS-Zs][\d.]*|\?"
+		)
+
+
+def _decode_asdf_line(line: str) -> Tuple[List[float], bool]:
+	"""
+	Decode one line of ASDF compressed data.
+
+	:param line:
+
+	:return: The decoded values, and whether the line ended in DIF form.
+	"""
+
+	values: List[float] = []
+	last_diff: Optional[float] = None
+
+	for token in _asdf_token_re.findall(line):
+		first = token[0]
+
+		if first in _dup_digits:
+			count = int(f"{_dup_digits[first]}{token[1:]}")
+			for _ in range(count - 1):
+				if last_diff is None:
+					values.append(values[-1])
+				else:
+					values.append(values[-1] + last_diff)
+			continue
+
+		if first in _dif_digits:
+			digit = _dif_digits[first]
+			diff = float(f"{'-' if digit < 0 else ''}{abs(digit)}{token[1:]}")
+			values.append(values[-1] + diff)
+			last_diff = diff
+			continue
+
+		last_diff = None
+		if first in _sqz_digits:
+			digit = _sqz_digits[first]
+			values.append(float(f"{'-' if digit < 0 else ''}{abs(digit)}{token[1:]}"))
+		elif first == '?':
+			values.append(numpy.nan)
+		else:
+			values.append(float(token))
+
+	return values, last_diff is not None
+
+
+def xydata_to_arrays(
+		data: str,
+		data_form: str = "(XY..XY)",
+		header: Optional[Mapping[str, str]] = None,
+		) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Convert the lines of a JCAMP-DX XY data block into arrays of x and y values.
+
+	Uncompressed (AFFN) data is converted in bulk with numpy.
+	Data in the compressed ASDF forms (SQZ, DIF and DUP) is also supported.
+
+	:param data: The text of the data block, as returned by :func:`~.iter_jcamp_records`.
+	:param data_form: The variable list of the data block, either ``'(XY..XY)'`` or ``'(X++(Y..Y))'``.
+	:param header: Mapping of labels to values for the current block.
+		``XFACTOR`` and ``YFACTOR`` are applied if present, and ``DELTAX``,
+		or ``FIRSTX``, ``LASTX`` and ``NPOINTS``, give the spacing of the
+		x values for data in the ``'(X++(Y..Y))'`` form.
+
+	:return: Arrays of the x and y values.
+
+	.. versionadded:: 2.8.0
+	"""
+
+	if header is None:
+		header = {}
+
+	xfactor = float(header.get("XFACTOR", 1))
+	yfactor = float(header.get("YFACTOR", 1))
+
+	if "++" in data_form:
+		if "DELTAX" in header:
+			deltax: Optional[float] = float(header["DELTAX"]) / xfactor
+		elif all(label in header for label in ("FIRSTX", "LASTX", "NPOINTS")) and int(header["NPOINTS"]) > 1:
+			deltax = (float(header["LASTX"]) - float(header["FIRSTX"])) / (int(header["NPOINTS"]) - 1) / xfactor
+		else:
+			deltax = None
+
+		x_values, y_values = _decode_x_plus_plus(data.splitlines(), deltax)
+
+	else:
+		if _asdf_re.search(data):
+			values = numpy.array(
+					[value for line in data.splitlines() for value in _decode_asdf_line(line)[0]],
+					dtype=numpy.float64,
+					)
+		else:
+			values = numpy.array(data.replace(',', ' ').replace(';', ' ').split(), dtype=numpy.float64)
+
+		if len(values) % 2:
+			raise ValueError(f"Expected an even number of values, got {len(values)}")
+
+		x_values, y_values = values[::2], values[1::2]
+
+	if xfactor != 1:
+		x_values = x_values * xfactor
+	if yfactor != 1:
+		y_values = y_values * yfactor
+
+	return x_values, y_values
+
+
+def _decode_x_plus_plus(data_lines: List[str], deltax: Optional[float]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+	"""
+	Decode a data block in the ``'(X++(Y..Y))'`` form.
+
+	:param data_lines:
+	:param deltax: The spacing of the x values, before scaling by ``XFACTOR``.
+		If :py:obj:`None` the spacing is calculated from the x values at the start of each line.
+	"""
+
+	line_x_values: List[float] = []
+	line_lengths: List[int] = []
+	y_values: List[float] = []
+	y_check = False
+
+	for line in data_lines:
+		values, ends_in_dif = _decode_asdf_line(line)
+		if not values:
+			continue
+
+		x_value, line_y_values = values[0], values[1:]
+		if y_check and line_y_values:
+			# The first ordinate repeats the last one of the previous line as a check value.
+			line_y_values = line_y_values[1:]
+
+		line_x_values.append(x_value)
+		line_lengths.append(len(line_y_values))
+		y_values.extend(line_y_values)
+		y_check = ends_in_dif
+
+	if not y_values:
+		return numpy.empty(0), numpy.empty(0)
+
+	if deltax is None:
+		if len(line_x_values) > 1 and line_lengths[0]:
+			deltax = (line_x_values[1] - line_x_values[0]) / line_lengths[0]
+		else:
+			deltax = 1.0
+
+	x_values = line_x_values[0] + numpy.arange(len(y_values)) * deltax
+	return x_values, numpy.array(y_values, dtype=numpy.float64)
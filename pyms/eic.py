@@ -31,6 +31,7 @@ import numpy
 # this package
 from pyms.IntensityMatrix import BaseIntensityMatrix, IntensityMatrix
 from pyms.IonChromatogram import BasePeakChromatogram, ExtractedIonChromatogram, IonChromatogram
+from pyms.Mixins import _get_sorted_index
 from pyms.Utils.Utils import is_number
 
 __all__ = ["ExtractedIntensityMatrix", "build_extracted_intensity_matrix"]
@@ -132,6 +133,10 @@ def build_extracted_intensity_matrix(
 	:param masses:
 	:param left_bound:
 	:param right_bound:
+
+	.. versionchanged:: 2.8.0
+
+		The masses within the bounds are found with a binary search of the intensity matrix's masses.
 	"""  # noqa: D400
 
 	flat_target_masses: List[float] = []
@@ -147,29 +152,19 @@ def build_extracted_intensity_matrix(
 			raise NotImplementedError(f"Unsupported type '{type(mass)}'")
 
 	# get indices of all those masses, taking bounds into account.
-	indices = set()
-
-	for idx, mass in enumerate(im.mass_list):
-		for target_mass in flat_target_masses:
-			if (target_mass - left_bound) <= mass <= (target_mass + right_bound):
-				indices.add(idx)
+	sorted_masses, order = _get_sorted_index(im, "_mass_list")
+	target_masses = numpy.asarray(flat_target_masses, dtype=numpy.float64)
+	starts = numpy.searchsorted(sorted_masses, target_masses - left_bound, side="left")
+	stops = numpy.searchsorted(sorted_masses, target_masses + right_bound, side="right")
+	indices = [order[start:stop] for start, stop in zip(starts, stops)]
+	target_indices = numpy.unique(numpy.concatenate(indices)) if indices else numpy.empty(0, dtype=int)
 
 	# construct array of rt vs (intensity for each mass)
-
-	intensity_array = []
-	target_indices = sorted(indices)
-
-	for intensities in im._intensity_array:
-		intensities_for_scan = []
-
-		for idx in target_indices:
-			intensities_for_scan.append(intensities[idx])
-
-		intensity_array.append(intensities_for_scan)
+	intensity_array = im._intensity_array[:, target_indices]
 
 	# Construct the extracted intensity matrix
 	return ExtractedIntensityMatrix(
 			time_list=im.time_list,
-			mass_list=[im._mass_list[idx] for idx in target_indices],
+			mass_list=[im._mass_list[idx] for idx in target_indices.tolist()],
 			intensity_array=intensity_array,
 			)
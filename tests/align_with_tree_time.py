@@ -0,0 +1,105 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# Compares the time and peak memory of aligning with the guide tree one node at a time,
+# after copying the input alignments, as align_with_tree previously did, with the node scheduler.
+# Usage: python align_with_tree_time.py [n_jobs]
+
+# stdlib
+import contextlib
+import copy
+import io
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+# this package
+from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
+from pyms.DPA.Alignment import Alignment, exprl2alignment
+from pyms.DPA.PairwiseAlignment import PairwiseAlignment, align, align_with_tree
+from pyms.Experiment import Experiment
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix_i
+from pyms.Noise.SavitzkyGolay import savitzky_golay_im
+from pyms.TopHat import tophat_im
+
+if len(sys.argv) > 1:
+	n_jobs = int(sys.argv[1])
+else:
+	n_jobs = 1
+
+D = 2.5
+gap = 0.3
+
+
+def load_experiment(code: str) -> Experiment:
+	im = build_intensity_matrix_i(JCAMP_reader(os.path.join("data", f"{code}.JDX")))
+	im = tophat_im(savitzky_golay_im(im), struct="1.5m")
+
+	peak_list = num_ions_threshold(rel_threshold(BillerBiemann(im, points=9, scans=2), 2), 3, 3000)
+	for peak in peak_list:
+		peak.crop_mass(50, 400)
+		peak.null_mass(73)
+		peak.null_mass(147)
+
+	expr = Experiment(code, peak_list)
+	expr.sele_rt_range(["6.5m", "21m"])
+
+	return expr
+
+
+codes = [f"{name}_{n}_SUBTRACT" for name in ("ELEY", "GECO") for n in range(1, 6)]
+F = exprl2alignment([load_experiment(code) for code in codes])
+
+with contextlib.redirect_stdout(io.StringIO()):
+	T = PairwiseAlignment(F, D, gap)
+
+
+def align_with_tree_loop(T: PairwiseAlignment) -> Alignment:
+	# The loop previously used by align_with_tree
+	As: List[Alignment] = copy.deepcopy(T.alignments) + [None for _ in range(len(T.alignments))]  # type: ignore[operator]
+
+	index = 0
+	for node in T.tree[:]:
+		index = index - 1
+		As[index] = align(As[node.left], As[node.right], T.D, T.gap, T.banded)
+
+	return As[index]
+
+
+def measure(function: Callable[[], Alignment]) -> str:
+	tracemalloc.start()
+	start = time.perf_counter()
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		alignment = function()
+
+	elapsed = time.perf_counter() - start
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+
+	return f"{elapsed:.4f} s, peak {peak / 2**20:.1f} MiB, {len(alignment)} positions"
+
+
+print(f"align_with_tree, {len(F)} alignments")
+print(f"  loop:      {measure(lambda: align_with_tree_loop(T))}")
+print(f"  scheduler: {measure(lambda: align_with_tree(T, n_jobs=n_jobs))}")
@@ -0,0 +1,66 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# Times BillerBiemann deconvolution with the maxima found in 1, 2, 4 and 8 blocks of ions,
+# on a 20000 x 1000 intensity matrix of rounded random data.
+# The process pool is created once, so the timings exclude the worker start-up cost.
+# Usage: python billerbiemann_parallel_time.py [points] [scans]
+
+# stdlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from timeit import timeit
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.BillerBiemann import BillerBiemann
+from pyms.IntensityMatrix import IntensityMatrix
+
+if __name__ == "__main__":
+	points = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+	scans = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+	rng = numpy.random.default_rng(1234)
+	intensity_array = numpy.round(rng.gamma(0.5, 20, size=(20000, 1000)))
+	im = IntensityMatrix(list(numpy.arange(20000) * 0.5), list(range(50, 1050)), intensity_array)
+
+	serial = BillerBiemann(im, points, scans)
+	serial_time = timeit(lambda: BillerBiemann(im, points, scans), number=3) / 3
+
+	print(f"BillerBiemann, 20000 x 1000, points={points}, scans={scans}, {os.cpu_count()} CPUs available")
+	print(f"  serial:    {serial_time:.4f} s")
+
+	for n_jobs in (1, 2, 4, 8):
+		with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+			parallel = BillerBiemann(im, points, scans, n_jobs=n_jobs, executor=executor)
+			assert [peak.bounds for peak in parallel] == [peak.bounds for peak in serial]
+			assert all(
+					peak.mass_spectrum.intensity_list == expected.mass_spectrum.intensity_list
+					for peak, expected in zip(parallel, serial)
+					)
+
+			elapsed = timeit(
+					lambda: BillerBiemann(im, points, scans, n_jobs=n_jobs, executor=executor),  # noqa: B023
+					number=3,
+					) / 3
+			print(f"  n_jobs={n_jobs}:  {elapsed:.4f} s  ({serial_time / elapsed:.2f}x)")
@@ -0,0 +1,106 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares the cell-by-cell dynamic programming loop previously used by dp
+# with the anti-diagonal dp, with and without the retention time band.
+# Usage: python dp_time.py
+
+# stdlib
+import os
+from timeit import timeit
+from typing import List
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
+from pyms.DPA.Alignment import exprl2alignment
+from pyms.DPA.PairwiseAlignment import align, dp, rt_band, score_matrix
+from pyms.Experiment import Experiment
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix_i
+from pyms.Noise.SavitzkyGolay import savitzky_golay_im
+from pyms.TopHat import tophat_im
+
+D = 2.5
+gap = 0.3
+
+
+def load_experiment(code: str) -> Experiment:
+	im = build_intensity_matrix_i(JCAMP_reader(os.path.join("data", f"{code}.JDX")))
+	im = tophat_im(savitzky_golay_im(im), struct="1.5m")
+
+	peak_list = num_ions_threshold(rel_threshold(BillerBiemann(im, points=9, scans=2), 2), 3, 3000)
+	for peak in peak_list:
+		peak.crop_mass(50, 400)
+		peak.null_mass(73)
+		peak.null_mass(147)
+
+	expr = Experiment(code, peak_list)
+	expr.sele_rt_range(["6.5m", "21m"])
+
+	return expr
+
+
+F = exprl2alignment([load_experiment(f"ELEY_{n}_SUBTRACT") for n in (1, 2, 3, 4)])
+a1 = align(F[0], F[1], D, gap)
+a2 = align(F[2], F[3], D, gap)
+S = score_matrix(a1, a2, D)
+band = rt_band(a1, a2, D)
+
+
+def dp_loop() -> List[int]:
+	# The cell-by-cell loop previously used by dp
+	row_length, col_length = S.shape
+	D = numpy.zeros((row_length + 1, col_length + 1))
+	D[:, 0] = gap * numpy.arange(row_length + 1)
+	D[0, :] = gap * numpy.arange(col_length + 1)
+	trace_matrix = numpy.zeros((row_length + 1, col_length + 1))
+	trace_matrix[:, 0] = 1
+	trace_matrix[0, :] = 2
+	trace_matrix[0, 0] = 3
+
+	for i in range(1, row_length + 1):
+		for j in range(1, col_length + 1):
+			darray = [D[i - 1, j - 1] + S[i - 1, j - 1], D[i - 1, j] + gap, D[i, j - 1] + gap]
+			D[i, j] = min(darray)
+			trace_matrix[i, j] = darray.index(D[i, j])
+
+	trace = []
+	i, j = row_length, col_length
+	while trace_matrix[i, j] != 3:
+		direction = int(trace_matrix[i, j])
+		trace.append(direction)
+		i, j = i - (direction != 2), j - (direction != 1)
+
+	return trace[::-1]
+
+
+assert dp_loop() == dp(S, gap)["trace"] == dp(S, gap, band)["trace"]
+
+n_cells = (S.shape[0] + 1) * (S.shape[1] + 1)
+band_cells = int((band[1] - band[0] + 1).sum())
+
+print(f"dp, {S.shape[0]} x {S.shape[1]} score matrix, band of {band_cells} of {n_cells} cells")
+print(f"  loop:          {timeit(dp_loop, number=3) / 3:.4f} s")
+print(f"  anti-diagonal: {timeit(lambda: dp(S, gap), number=10) / 10:.4f} s")
+print(f"  banded:        {timeit(lambda: dp(S, gap, band), number=10) / 10:.4f} s")
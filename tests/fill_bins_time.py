@@ -0,0 +1,95 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# Compares the vectorised binning engine with the previous per-point loop.
+# Usage: python fill_bins_time.py [path/to/andi_file.cdf]
+
+# stdlib
+import os
+import sys
+from timeit import timeit
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.GCMS.Class import GCMS_data
+from pyms.GCMS.IO.ANDI import ANDI_reader
+from pyms.IntensityMatrix import IntensityMatrix, build_intensity_matrix, build_intensity_matrix_i
+
+if len(sys.argv) > 1:
+	andi_file = sys.argv[1]
+else:
+	andi_file = os.path.join("data", "gc01_0812_066.cdf")
+
+data = ANDI_reader(andi_file)
+
+
+def fill_bins_loop(
+		data: GCMS_data,
+		min_mass: float,
+		max_mass: float,
+		bin_interval: float,
+		bin_left: float,
+		) -> IntensityMatrix:
+	# The per-scan, per-point loop previously used by pyms.IntensityMatrix._fill_bins
+	bl = abs(bin_left) - int(abs(bin_left))
+	num_bins = int(float(max_mass + bl - min_mass) / bin_interval) + 1
+	mass_list = [i * bin_interval + min_mass for i in range(num_bins)]
+
+	intensity_matrix = []
+	for scan in data.scan_list:
+		intensity_list = [0.0] * num_bins
+		masses = scan.mass_list
+		intensities = scan.intensity_list
+		for ii, mass in enumerate(masses):
+			mm = int((mass + bl - min_mass) / bin_interval)
+			intensity_list[mm] += intensities[ii]
+		intensity_matrix.append(intensity_list)
+
+	return IntensityMatrix(data.time_list, mass_list, intensity_matrix)
+
+
+def loop_im() -> IntensityMatrix:
+	return fill_bins_loop(data, data.min_mass, data.max_mass, 1, 0.5)  # type: ignore[arg-type]
+
+
+def loop_im_i() -> IntensityMatrix:
+	return fill_bins_loop(data, int(data.min_mass + 1 - 0.7), data.max_mass, 1, 0.3)  # type: ignore[arg-type,operator]
+
+
+def vectorised_im() -> IntensityMatrix:
+	return build_intensity_matrix(data)
+
+
+def vectorised_im_i() -> IntensityMatrix:
+	return build_intensity_matrix_i(data)
+
+
+assert numpy.array_equal(loop_im().intensity_array, vectorised_im().intensity_array)
+assert numpy.array_equal(loop_im_i().intensity_array, vectorised_im_i().intensity_array)
+
+print("build_intensity_matrix")
+print(f"  loop:       {timeit(loop_im, number=3) / 3:.4f} s")
+print(f"  vectorised: {timeit(vectorised_im, number=3) / 3:.4f} s")
+
+print("build_intensity_matrix_i")
+print(f"  loop:       {timeit(loop_im_i, number=3) / 3:.4f} s")
+print(f"  vectorised: {timeit(vectorised_im_i, number=3) / 3:.4f} s")
@@ -0,0 +1,77 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares reading and writing every ion chromatogram of an intensity matrix, and every
+# mass spectrum, using the previous per-scan loops and the column/row views.
+# Usage: python ic_access_time.py
+
+# stdlib
+import os
+from timeit import timeit
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import IntensityMatrix, build_intensity_matrix
+from pyms.IonChromatogram import IonChromatogram
+from pyms.Spectrum import MassSpectrum
+
+im = build_intensity_matrix(JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX")), 0.5, 0.25, 0.25)
+n_scan, n_mz = im.size
+
+
+def ic_loop(im: IntensityMatrix) -> None:
+	# The per-scan loops previously used by get_ic_at_index and set_ic_at_index
+	for ix in range(n_mz):
+		ia = numpy.array([intensities[ix] for intensities in im._intensity_array])
+		td_array = numpy.array([im._time_list[ii + 1] - im._time_list[ii] for ii in range(n_scan - 1)])
+		td_array.mean()
+		assert all(isinstance(x, float) for x in ia)
+		ic = IonChromatogram(ia, im._time_list[:], im.get_mass_at_index(ix))
+
+		for row_idx, intensity in enumerate(ic.intensity_array):
+			im._intensity_array[row_idx][ix] = intensity
+
+
+def ic_view(im: IntensityMatrix) -> None:
+	for ix in range(n_mz):
+		im.set_ic_at_index(ix, im.get_ic_at_index(ix, view=True))
+
+
+def ms_loop() -> None:
+	for ix in range(n_scan):
+		MassSpectrum(im.mass_list, im._intensity_array[ix].tolist())
+
+
+def ms_view() -> None:
+	for ix in range(n_scan):
+		im.get_ms_at_index(ix)
+
+
+print(f"{n_scan} scans x {n_mz} masses")
+print("get_ic_at_index + set_ic_at_index, every column")
+print(f"  loop:  {timeit(lambda: ic_loop(im), number=1):.4f} s")
+print(f"  view:  {timeit(lambda: ic_view(im), number=3) / 3:.4f} s")
+print("get_ms_at_index, every row")
+print(f"  list:  {timeit(ms_loop, number=3) / 3:.4f} s")
+print(f"  view:  {timeit(ms_view, number=3) / 3:.4f} s")
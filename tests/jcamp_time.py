@@ -0,0 +1,96 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# Compares the bulk JCAMP-DX XY data parser with the previous per-value loop,
+# using a NIST-style library made by repeating the entries of nist08_test.jca.
+# Usage: python jcamp_time.py [path/to/library.jca] [repeats]
+
+# stdlib
+import os
+import re
+import sys
+from io import StringIO
+from timeit import timeit
+from typing import List, Tuple
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.Utils.jcamp import iter_jcamp_records, xydata_tags, xydata_to_arrays
+
+if len(sys.argv) > 1:
+	jcamp_file = sys.argv[1]
+else:
+	jcamp_file = os.path.join("..", "pyms-data", "nist08_test.jca")
+
+repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+with open(jcamp_file, encoding="UTF-8") as fp:
+	library = fp.read() * repeats
+
+
+def parse_loop() -> List[Tuple[List[float], List[float]]]:
+	# The per-line, per-value loop previously used by MassSpectrum.from_jcamp
+	spectra = []
+	xydata: List[float] = []
+	last_tag = None
+
+	for line in StringIO(library):
+		if line.strip():
+			if line.startswith("##"):
+				if xydata:
+					spectra.append((xydata[::2], xydata[1::2]))
+					xydata = []
+				last_tag = line[2:].split('=', 1)[0].upper()
+
+			elif last_tag in xydata_tags:
+				for item in re.split(r",| ", line.strip()):
+					if not len(item.strip()) == 0:
+						xydata.append(float(item.strip()))
+
+	if xydata:
+		spectra.append((xydata[::2], xydata[1::2]))
+
+	return spectra
+
+
+def parse_bulk() -> List[Tuple[numpy.ndarray, numpy.ndarray]]:
+	labels = {}
+	spectra = []
+
+	for label, value, data in iter_jcamp_records(StringIO(library)):
+		labels[label] = value
+		if label in xydata_tags:
+			spectra.append(xydata_to_arrays(data, value, labels))
+
+	return spectra
+
+
+loop_spectra = parse_loop()
+bulk_spectra = parse_bulk()
+assert len(loop_spectra) == len(bulk_spectra)
+for (loop_x, loop_y), (bulk_x, bulk_y) in zip(loop_spectra, bulk_spectra):
+	assert loop_x == bulk_x.tolist()
+	assert loop_y == bulk_y.tolist()
+
+print(f"{len(bulk_spectra)} spectra")
+print(f"  loop: {timeit(parse_loop, number=3) / 3:.4f} s")
+print(f"  bulk: {timeit(parse_bulk, number=3) / 3:.4f} s")
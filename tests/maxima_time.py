@@ -0,0 +1,127 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# Compares the vectorised local maxima detection and scan consolidation with the previous
+# per-scan loops, on a 6000 x 600 intensity matrix of rounded random data (so plateaus are common).
+# Usage: python maxima_time.py [points] [scans]
+
+# stdlib
+import sys
+from timeit import timeit
+from typing import List
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.BillerBiemann import _consolidate_scans, _get_maxima_mask
+
+points = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+scans = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+rng = numpy.random.default_rng(1234)
+intensity_array = numpy.round(rng.gamma(0.5, 20, size=(6000, 600)))
+
+
+def get_maxima_indices_loop(ion_intensities: numpy.ndarray, points: int = 3) -> List[int]:
+	# The per-scan loop previously used by pyms.BillerBiemann.get_maxima_indices
+	peak_point = []
+	edge = -1
+	half = int(points / 2)
+	points = 2 * half + 1
+
+	for index in range(len(ion_intensities) - points + 1):
+		left = ion_intensities[index:index + half]
+		mid = ion_intensities[index + half]
+		right = ion_intensities[index + half + 1:index + points]
+
+		if mid > max(left) and mid > max(right):
+			peak_point.append(index + half)
+			edge = -1
+		elif mid > max(left) and mid == max(right):
+			edge = index + half
+		elif mid == max(left) and mid > max(right):
+			if edge > -1:
+				peak_point.append(int((edge + index + half) / 2))
+			edge = -1
+
+	return peak_point
+
+
+def maxima_loop() -> numpy.ndarray:
+	maxima_im = numpy.zeros(intensity_array.shape)
+	for col in range(intensity_array.shape[1]):
+		for row in get_maxima_indices_loop(intensity_array[:, col].tolist(), points):
+			maxima_im[row, col] = intensity_array[row, col]
+	return maxima_im
+
+
+def maxima_vectorised() -> numpy.ndarray:
+	maxima_im = numpy.zeros(intensity_array.shape)
+	maxima = _get_maxima_mask(intensity_array, points)
+	maxima_im[maxima] = intensity_array[maxima]
+	return maxima_im
+
+
+assert numpy.array_equal(maxima_loop(), maxima_vectorised())
+
+print(f"get_maxima_matrix, {intensity_array.shape[0]} x {intensity_array.shape[1]}, points={points}")
+print(f"  loop:       {timeit(maxima_loop, number=1):.4f} s")
+print(f"  vectorised: {timeit(maxima_vectorised, number=3) / 3:.4f} s")
+
+
+def consolidate_loop(maxima_im: numpy.ndarray) -> numpy.ndarray:
+	# The per-row, per-window, per-column loop previously used by pyms.BillerBiemann.get_maxima_matrix
+	numrows, numcols = maxima_im.shape
+	half = int(scans / 2)
+
+	for row_idx in range(numrows):
+		best = 0
+		loc = 0
+
+		for ii in range(scans):
+			if 0 <= row_idx - half + ii < numrows:
+				tic = maxima_im[row_idx - half + ii].sum()
+				if tic > best:
+					best = tic
+					loc = ii
+
+		for ii in range(scans):
+			source_idx = row_idx - half + ii
+			dest_idx = row_idx - half + loc
+			if 0 <= source_idx < numrows and ii != loc:
+				for col in range(numcols):
+					maxima_im[dest_idx, col] += maxima_im[source_idx, col]
+					maxima_im[source_idx, col] = 0
+
+	return maxima_im
+
+
+def consolidate_vectorised(maxima_im: numpy.ndarray) -> numpy.ndarray:
+	_consolidate_scans(maxima_im, scans)
+	return maxima_im
+
+
+maxima_im = maxima_vectorised()
+assert numpy.array_equal(consolidate_loop(maxima_im.copy()), consolidate_vectorised(maxima_im.copy()))
+
+print(f"scan consolidation, scans={scans}")
+print(f"  loop:       {timeit(lambda: consolidate_loop(maxima_im.copy()), number=1):.4f} s")
+print(f"  vectorised: {timeit(lambda: consolidate_vectorised(maxima_im.copy()), number=3) / 3:.4f} s")
@@ -0,0 +1,122 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# Compares merging alignments and building dataframes from nested lists of peaks,
+# as was previously done, with the array-backed alignments.
+# Usage: python merge_alignments_time.py
+
+# stdlib
+import contextlib
+import functools
+import io
+import os
+from timeit import timeit
+from typing import List, Optional
+
+# 3rd party
+import numpy
+import pandas  # type: ignore[import-untyped]
+
+# this package
+from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
+from pyms.DPA.Alignment import Alignment, exprl2alignment
+from pyms.DPA.PairwiseAlignment import (
+		PairwiseAlignment,
+		align_with_tree,
+		alignment_compare,
+		dp,
+		merge_alignments,
+		score_matrix
+		)
+from pyms.Experiment import Experiment
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix_i
+from pyms.Noise.SavitzkyGolay import savitzky_golay_im
+from pyms.Peak import Peak
+from pyms.TopHat import tophat_im
+
+D = 2.5
+gap = 0.3
+
+
+def load_experiment(code: str) -> Experiment:
+	im = build_intensity_matrix_i(JCAMP_reader(os.path.join("data", f"{code}.JDX")))
+	im = tophat_im(savitzky_golay_im(im), struct="1.5m")
+
+	peak_list = num_ions_threshold(rel_threshold(BillerBiemann(im, points=9, scans=2), 2), 3, 3000)
+	for peak in peak_list:
+		peak.crop_mass(50, 400)
+		peak.null_mass(73)
+		peak.null_mass(147)
+
+	expr = Experiment(code, peak_list)
+	expr.sele_rt_range(["6.5m", "21m"])
+
+	return expr
+
+
+F = exprl2alignment([load_experiment(f"{name}_{n}_SUBTRACT") for name in ("ELEY", "GECO") for n in range(1, 6)])
+
+with contextlib.redirect_stdout(io.StringIO()):
+	a1 = align_with_tree(PairwiseAlignment(F[:5], D, gap))
+	a2 = align_with_tree(PairwiseAlignment(F[5:], D, gap))
+
+traces = dp(score_matrix(a1, a2, D), gap)["trace"]
+
+
+def merge_lists(A1: Alignment, A2: Alignment, traces: List[int]) -> List[List[Optional[Peak]]]:
+	# The nested lists previously built by merge_alignments
+	merged: List[List[Peak]] = [[] for _ in range(len(A1.peakpos) + len(A2.peakpos))]
+	idx1 = idx2 = 0
+
+	for trace in traces:
+		for i, peaks in enumerate(A1.peakpos):
+			merged[i].append(peaks[idx1] if trace in {0, 1} else None)  # type: ignore[arg-type]
+		if trace in {0, 1}:
+			idx1 += 1
+
+		for j, peaks in enumerate(A2.peakpos):
+			merged[len(A1.peakpos) + j].append(peaks[idx2] if trace in {0, 2} else None)  # type: ignore[arg-type]
+		if trace in {0, 2}:
+			idx2 += 1
+
+	peakalgt = list(numpy.transpose(merged))
+	peakalgt.sort(key=functools.cmp_to_key(alignment_compare))
+
+	return peakalgt
+
+
+def area_alignment_lists(peakalgt: List[List[Optional[Peak]]], expr_code: List[str]) -> pandas.DataFrame:
+	# The loop previously used by Alignment.get_area_alignment
+	areas = [[None if peak is None else peak.area for peak in pos] for pos in peakalgt]
+	return pandas.DataFrame(areas, columns=expr_code)
+
+
+merged = merge_alignments(a1, a2, traces)
+peakalgt = merge_lists(a1, a2, traces)
+assert [list(pos) for pos in peakalgt] == merged.peakalgt
+
+print(f"merge_alignments, {len(a1)} and {len(a2)} positions")
+print(f"  lists:  {timeit(lambda: merge_lists(a1, a2, traces), number=10) / 10:.4f} s")
+print(f"  arrays: {timeit(lambda: merge_alignments(a1, a2, traces), number=10) / 10:.4f} s")
+
+print(f"get_area_alignment, {len(merged)} positions")
+print(f"  lists:  {timeit(lambda: area_alignment_lists(peakalgt, merged.expr_code), number=10) / 10:.4f} s")
+print(f"  arrays: {timeit(lambda: merged.get_area_alignment(require_all_expr=False), number=10) / 10:.4f} s")
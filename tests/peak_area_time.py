@@ -0,0 +1,78 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares the batch peak integration engine with the previous per-peak, per-ion loop
+# over Python lists, for the peaks found by BillerBiemann in the ELEY_1_SUBTRACT data.
+# Usage: python peak_area_time.py [max_bound]
+
+# stdlib
+import os
+import sys
+from timeit import timeit
+from typing import List
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix_i
+from pyms.Peak.Function import integrate_peaks, ion_area
+
+max_bound = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+
+im = build_intensity_matrix_i(JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX")))
+peak_list = num_ions_threshold(rel_threshold(BillerBiemann(im, 9, 2), 2), 3, 3000)
+
+
+def areas_loop() -> List[List[float]]:
+	# The per-ion loop previously used by pyms.Peak.Function.peak_sum_area
+	mat = im.intensity_array
+	all_areas = []
+
+	for peak in peak_list:
+		apex = im.get_index_at_time(peak.rt)
+		ms = peak.mass_spectrum
+		mass_ii = [ii for ii in range(len(ms.mass_list)) if ms.mass_spec[ii] > 0]
+		areas = []
+
+		for ii in mass_ii:
+			ia = [mat[scan][ii] for scan in range(len(mat))]
+			area, left, right, l_share, r_share = ion_area(ia, apex, max_bound)
+			areas.append(area)
+
+		all_areas.append(areas)
+
+	return all_areas
+
+
+def areas_batch() -> List[List[float]]:
+	result = integrate_peaks(im, peak_list, max_bound)
+	return [row[mask].tolist() for row, mask in zip(result.area, result.mask)]
+
+
+assert areas_loop() == areas_batch()
+
+n_ions = sum(numpy.count_nonzero(peak.mass_spectrum.mass_spec) for peak in peak_list)
+print(f"{len(peak_list)} peaks, {n_ions} ions, max_bound={max_bound}")
+print(f"  loop:  {timeit(areas_loop, number=1):.4f} s")
+print(f"  batch: {timeit(areas_batch, number=3) / 3:.4f} s")
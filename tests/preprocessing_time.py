@@ -0,0 +1,77 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares the per-ion chromatogram preprocessing loop previously used by
+# pyms.Gapfill.Function.missing_peak_finder with the fused PreprocessingPipeline.
+# Usage: python preprocessing_time.py
+
+# stdlib
+import copy
+import os
+from timeit import timeit
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import IntensityMatrix, build_intensity_matrix_i
+from pyms.Noise.SavitzkyGolay import savitzky_golay
+from pyms.Preprocessing import CropMassStage, NullMassStage, PreprocessingPipeline, SavitzkyGolayStage, TopHatStage
+from pyms.TopHat import tophat
+
+im = build_intensity_matrix_i(JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX")))
+
+pipeline = PreprocessingPipeline([
+		NullMassStage([73, 147]),
+		CropMassStage(50, 450),
+		SavitzkyGolayStage(3, passes=2),
+		TopHatStage("1.5m"),
+		])
+
+
+def preprocessing_loop() -> IntensityMatrix:
+	im_processed = copy.deepcopy(im)
+
+	for null_ion in (73, 147):
+		im_processed.null_mass(null_ion)
+
+	im_processed.crop_mass(50, 450)
+
+	for ii in range(im_processed.size[1]):
+		ic = im_processed.get_ic_at_index(ii)
+		ic_smooth = savitzky_golay(savitzky_golay(ic, 3), 3)
+		im_processed.set_ic_at_index(ii, tophat(ic_smooth, struct="1.5m"))
+
+	return im_processed
+
+
+def preprocessing_pipeline() -> IntensityMatrix:
+	return pipeline.process(im)
+
+
+assert numpy.allclose(preprocessing_loop().intensity_array, preprocessing_pipeline().intensity_array)
+
+print(f"Preprocessing, {im.size[0]} x {im.size[1]}")
+print(f"  loop:     {timeit(preprocessing_loop, number=3) / 3:.4f} s")
+print(f"  pipeline: {timeit(preprocessing_pipeline, number=3) / 3:.4f} s")
+print()
+print(pipeline.timing_report())
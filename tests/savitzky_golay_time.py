@@ -0,0 +1,71 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares smoothing every ion chromatogram of an intensity matrix with savitzky_golay,
+# one at a time, and the whole-matrix savitzky_golay_im.
+# Usage: python savitzky_golay_time.py [window] [degree]
+
+# stdlib
+import copy
+import os
+import sys
+from timeit import timeit
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import IntensityMatrix, build_intensity_matrix
+from pyms.Noise.SavitzkyGolay import savitzky_golay, savitzky_golay_im
+
+window = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+degree = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+im = build_intensity_matrix(JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX")), 0.5, 0.25, 0.25)
+
+
+def sg_loop() -> IntensityMatrix:
+	# The per-ion chromatogram loop previously used by savitzky_golay_im
+	im_smooth = copy.deepcopy(im)
+
+	for ii in range(im.size[1]):
+		ic = im_smooth.get_ic_at_index(ii)
+		im_smooth.set_ic_at_index(ii, savitzky_golay(ic, window, degree))
+
+	return im_smooth
+
+
+def sg_matrix() -> IntensityMatrix:
+	return savitzky_golay_im(im, window, degree)
+
+
+def sg_matrix_inplace() -> None:
+	savitzky_golay_im(im_copy, window, degree, inplace=True)
+
+
+assert numpy.allclose(sg_loop().intensity_array, sg_matrix().intensity_array)
+im_copy = copy.deepcopy(im)
+
+print(f"savitzky_golay_im, {im.size[0]} x {im.size[1]}, window={window}, degree={degree}")
+print(f"  loop:            {timeit(sg_loop, number=3) / 3:.4f} s")
+print(f"  matrix:          {timeit(sg_matrix, number=3) / 3:.4f} s")
+print(f"  matrix, inplace: {timeit(sg_matrix_inplace, number=3) / 3:.4f} s")
@@ -0,0 +1,86 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares the pairwise position_similarity loop previously used by score_matrix
+# with the vectorised score_matrix.
+# Usage: python score_matrix_time.py
+
+# stdlib
+import os
+from timeit import timeit
+from typing import List
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
+from pyms.DPA.Alignment import Alignment, exprl2alignment
+from pyms.DPA.PairwiseAlignment import align, position_similarity, score_matrix
+from pyms.Experiment import Experiment
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix_i
+from pyms.Noise.SavitzkyGolay import savitzky_golay_im
+from pyms.TopHat import tophat_im
+
+D = 2.5
+gap = 0.3
+
+
+def load_experiment(code: str) -> Experiment:
+	im = build_intensity_matrix_i(JCAMP_reader(os.path.join("data", f"{code}.JDX")))
+	im = tophat_im(savitzky_golay_im(im), struct="1.5m")
+
+	peak_list = num_ions_threshold(rel_threshold(BillerBiemann(im, points=9, scans=2), 2), 3, 3000)
+	for peak in peak_list:
+		peak.crop_mass(50, 400)
+		peak.null_mass(73)
+		peak.null_mass(147)
+
+	expr = Experiment(code, peak_list)
+	expr.sele_rt_range(["6.5m", "21m"])
+
+	return expr
+
+
+F = exprl2alignment([load_experiment(f"ELEY_{n}_SUBTRACT") for n in (1, 2, 3)])
+merged = align(F[0], F[1], D, gap)
+
+
+def score_matrix_loop(a1: Alignment, a2: Alignment) -> numpy.ndarray:
+	# The pairwise loop previously used by score_matrix
+	scores = numpy.zeros((len(a1.peakalgt), len(a2.peakalgt)))
+
+	for i, algt1pos in enumerate(a1.peakalgt):
+		for j, algt2pos in enumerate(a2.peakalgt):
+			scores[i][j] = position_similarity(algt1pos, algt2pos, D)
+
+	return scores
+
+
+pairs: List = [("2 experiments", F[0], F[1]), ("3 experiments", merged, F[2])]
+
+for name, a1, a2 in pairs:
+	assert numpy.allclose(score_matrix_loop(a1, a2), score_matrix(a1, a2, D), rtol=1e-12, atol=1e-12)
+
+	print(f"score_matrix, {name}, {len(a1)} x {len(a2)} positions")
+	print(f"  loop:       {timeit(lambda: score_matrix_loop(a1, a2), number=1):.4f} s")
+	print(f"  vectorised: {timeit(lambda: score_matrix(a1, a2, D), number=10) / 10:.4f} s")
@@ -0,0 +1,97 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# Compares calculating the similarity matrix of PairwiseAlignment by merging each pair of alignments,
+# as was previously done, with calculating only the similarities, serially and in parallel.
+# Usage: python sim_matrix_time.py [n_jobs]
+
+# stdlib
+import contextlib
+import io
+import os
+import sys
+from timeit import timeit
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
+from pyms.DPA.Alignment import exprl2alignment
+from pyms.DPA.PairwiseAlignment import PairwiseAlignment, align
+from pyms.Experiment import Experiment
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix_i
+from pyms.Noise.SavitzkyGolay import savitzky_golay_im
+from pyms.TopHat import tophat_im
+
+if len(sys.argv) > 1:
+	n_jobs = int(sys.argv[1])
+else:
+	n_jobs = os.cpu_count() or 1
+
+D = 2.5
+gap = 0.3
+
+
+def load_experiment(code: str) -> Experiment:
+	im = build_intensity_matrix_i(JCAMP_reader(os.path.join("data", f"{code}.JDX")))
+	im = tophat_im(savitzky_golay_im(im), struct="1.5m")
+
+	peak_list = num_ions_threshold(rel_threshold(BillerBiemann(im, points=9, scans=2), 2), 3, 3000)
+	for peak in peak_list:
+		peak.crop_mass(50, 400)
+		peak.null_mass(73)
+		peak.null_mass(147)
+
+	expr = Experiment(code, peak_list)
+	expr.sele_rt_range(["6.5m", "21m"])
+
+	return expr
+
+
+codes = [f"{name}_{n}_SUBTRACT" for name in ("ELEY", "GECO") for n in range(1, 6)]
+F = exprl2alignment([load_experiment(code) for code in codes])
+
+
+def sim_matrix_merging() -> numpy.ndarray:
+	# The loop previously used by PairwiseAlignment._sim_matrix
+	n = len(F)
+	sim_matrix = numpy.zeros((n, n), dtype='f')
+
+	for i in range(n - 1):
+		for j in range(i + 1, n):
+			sim_matrix[i, j] = sim_matrix[j, i] = align(F[i], F[j], D, gap).similarity
+
+	return sim_matrix
+
+
+def sim_matrix(n_jobs: int) -> numpy.ndarray:
+	with contextlib.redirect_stdout(io.StringIO()):
+		return PairwiseAlignment(F, D, gap, n_jobs=n_jobs, progress=lambda done, total: None).sim_matrix
+
+
+assert numpy.array_equal(sim_matrix_merging(), sim_matrix(1))
+assert numpy.array_equal(sim_matrix(1), sim_matrix(n_jobs))
+
+print(f"PairwiseAlignment, {len(F)} alignments")
+print(f"  merging:         {timeit(sim_matrix_merging, number=1):.4f} s")
+print(f"  serial:          {timeit(lambda: sim_matrix(1), number=3) / 3:.4f} s")
+print(f"  {n_jobs} worker(s):     {timeit(lambda: sim_matrix(n_jobs), number=3) / 3:.4f} s")
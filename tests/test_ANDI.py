@@ -40,7 +40,8 @@ except TypeError:
 	pytest.importorskip("pyms.GCMS.IO.ANDI")
 
 # this package
-from pyms.GCMS.IO.ANDI import ANDI_reader
+from pyms.GCMS.IO.ANDI import ANDI_reader, LazyGCMS_data
+from pyms.IntensityMatrix import build_intensity_matrix, build_intensity_matrix_i
 
 
 @pytest.fixture(scope="module")
@@ -49,6 +50,14 @@ def andi(pyms_datadir: PathPlus) -> GCMS_data:
 	return ANDI_reader(pyms_datadir / "gc01_0812_066.cdf")
 
 
+@pytest.fixture()
+def lazy_andi(pyms_datadir: PathPlus) -> LazyGCMS_data:
+	lazy_data = ANDI_reader(pyms_datadir / "gc01_0812_066.cdf", lazy=True)
+	assert isinstance(lazy_data, LazyGCMS_data)
+	lazy_data.chunk_size = 250
+	return lazy_data
+
+
 # @pytest.fixture(scope="module")
 # def im_andi(data):
 # 	# build an intensity matrix object from the data
@@ -418,6 +427,104 @@ def test_get_time_at_index(andi: GCMS_data):
 		andi.get_time_at_index(1000000)
 
 
+# LazyGCMS_data
+
+
+def test_lazy_andi(andi: GCMS_data, lazy_andi: LazyGCMS_data):
+	assert len(lazy_andi) == len(andi)
+	assert lazy_andi.time_list == andi.time_list
+	assert lazy_andi.min_mass == andi.min_mass
+	assert lazy_andi.max_mass == andi.max_mass
+	assert lazy_andi.tic == andi.tic
+	assert lazy_andi.get_scan_at_index(400) == andi.scan_list[400]
+	assert lazy_andi.scan_list == andi.scan_list
+	assert lazy_andi == andi
+
+	with pytest.raises(TypeError, match="'chunk_size' must be an integer"):
+		LazyGCMS_data(lazy_andi.file_name, chunk_size=test_float)  # type: ignore[arg-type]
+	with pytest.raises(ValueError, match="'chunk_size' must be greater than zero"):
+		LazyGCMS_data(lazy_andi.file_name, chunk_size=0)
+
+
+def test_lazy_andi_trim(andi: GCMS_data, lazy_andi: LazyGCMS_data):
+	trimmed = deepcopy(andi)
+	trimmed.trim(1000, 2000)
+	lazy_andi.trim(1000, 2000)
+
+	assert lazy_andi.time_list == trimmed.time_list
+	assert lazy_andi.tic == trimmed.tic
+	assert lazy_andi.get_scan_at_index(0) == trimmed.scan_list[0]
+	assert lazy_andi == trimmed
+
+
+def test_lazy_andi_rt_range(andi: GCMS_data, lazy_andi: LazyGCMS_data):
+	rt_range = lazy_andi.get_scans_in_rt_range(400.0, 500.0)
+	assert isinstance(rt_range, GCMS_data)
+	assert rt_range.min_rt >= 400.0
+	assert rt_range.max_rt <= 500.0
+	assert rt_range.scan_list[0] == andi.scan_list[andi.time_list.index(rt_range.min_rt)]
+
+	with pytest.raises(ValueError, match="'min_rt' must be less than 'max_rt'"):
+		lazy_andi.get_scans_in_rt_range(500.0, 400.0)
+
+
+def test_lazy_andi_intensity_matrix(andi: GCMS_data, lazy_andi: LazyGCMS_data):
+	assert build_intensity_matrix(lazy_andi) == build_intensity_matrix(andi)
+	assert build_intensity_matrix_i(lazy_andi) == build_intensity_matrix_i(andi)
+
+
+def test_lazy_andi_blocks(
+		andi: GCMS_data,
+		lazy_andi: LazyGCMS_data,
+		tmp_pathplus: PathPlus,
+		monkeypatch,
+		):
+
+	def read_everything(self):  # noqa: MAN001,MAN002
+		raise AssertionError("The whole file was read at once")
+
+	# Comparing and writing read the file block by block
+	monkeypatch.setattr(LazyGCMS_data, "_mass_values", property(read_everything))
+	monkeypatch.setattr(LazyGCMS_data, "_intensity_values", property(read_everything))
+
+	assert lazy_andi == andi
+	assert andi == lazy_andi
+
+	lazy_andi.write(tmp_pathplus / "lazy")
+	andi.write(tmp_pathplus / "eager")
+	assert (tmp_pathplus / "lazy.I.csv").read_text() == (tmp_pathplus / "eager.I.csv").read_text()
+	assert (tmp_pathplus / "lazy.mz.csv").read_text() == (tmp_pathplus / "eager.mz.csv").read_text()
+
+	lazy_andi.write_intensities_stream(tmp_pathplus / "lazy_stream.csv")
+	andi.write_intensities_stream(tmp_pathplus / "eager_stream.csv")
+	assert (tmp_pathplus / "lazy_stream.csv").read_text() == (tmp_pathplus / "eager_stream.csv").read_text()
+
+
+def test_lazy_andi_unsorted_scans(tmp_pathplus: PathPlus):
+	# 3rd party
+	from netCDF4 import Dataset
+
+	filename = tmp_pathplus / "unsorted.cdf"
+
+	with Dataset(filename, 'w', format="NETCDF3_CLASSIC") as rootgrp:
+		rootgrp.createDimension("scan_number", 3)
+		rootgrp.createDimension("point_number", 7)
+		rootgrp.createVariable("scan_acquisition_time", "f8", ("scan_number", ))[:] = [1.0, 2.0, 3.0]
+		rootgrp.createVariable("point_count", "i4", ("scan_number", ))[:] = [2, 3, 2]
+		rootgrp.createVariable("mass_values", "f8", ("point_number", ))[:] = [50, 51, 53, 52, 51, 50, 51]
+		rootgrp.createVariable("intensity_values", "f8", ("point_number", ))[:] = [1, 2, 3, 4, 5, 6, 7]
+
+	eager_data = ANDI_reader(filename)
+	lazy_data = ANDI_reader(filename, lazy=True)
+	lazy_data.chunk_size = 2
+
+	assert eager_data.get_scan_at_index(1).mass_list == [51.0, 52.0, 53.0]
+	assert lazy_data.get_scan_at_index(1) == eager_data.get_scan_at_index(1)
+	assert lazy_data.scan_list == eager_data.scan_list
+	assert lazy_data == eager_data
+	assert build_intensity_matrix(lazy_data) == build_intensity_matrix(eager_data)
+
+
 # Test GCMS.Function
 
 # def test_diff(data):
@@ -20,6 +20,9 @@
 
 # stdlib
 import copy
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Any, List
 
 # 3rd party
@@ -181,6 +184,14 @@ class Test_sum_maxima:
 		assert isinstance(new_tic, IonChromatogram)
 		assert new_tic.is_tic()
 
+	def test_sum_maxima_scans(self, im: IntensityMatrix):
+		row_sums = get_maxima_matrix(im).sum(axis=1)
+		new_tic = sum_maxima(im, scans=3)
+
+		assert new_tic.intensity_array[0] == row_sums[0] + row_sums[1]
+		assert new_tic.intensity_array[10] == row_sums[9] + row_sums[10] + row_sums[11]
+		assert new_tic.intensity_array[-1] == row_sums[-2] + row_sums[-1]
+
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, *test_sequences, test_dict])
 	def test_im_errors(self, obj: Any):
 		with pytest.raises(TypeError):
@@ -199,10 +210,40 @@ class Test_sum_maxima:
 
 class Test_get_maxima_indices:
 
-	@pytest.mark.skip(reason="TODO")
-	def test_get_maxima_indices(self):
-		# TODO: main test
-		pass
+	@pytest.mark.parametrize(
+			"data, points, expected",
+			[
+					([1, 2, 3, 4, 5, 4, 3, 2, 1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1], 3, [4, 13]),
+					([1, 2, 3, 4, 5, 4, 3, 2, 1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1], 10, [13]),
+					# Plateaus: the apex is the midpoint
+					([0, 1, 5, 5, 5, 5, 1, 0], 3, [3]),
+					([0, 1, 5, 5, 5, 1, 0], 3, [3]),
+					# A plateau which is interrupted by a further rise is not a peak
+					([0, 1, 5, 5, 6, 6, 2, 0], 3, [4]),
+					# A fall onto a plateau, then a further fall, is not a peak
+					([0, 6, 3, 3, 1, 0], 3, [1]),
+					# Peaks at the edges are not detected
+					([5, 1, 0, 1, 5], 3, []),
+					([1, 2], 3, []),
+					([], 3, []),
+					],
+			)
+	def test_get_maxima_indices(self, data: List[float], points: int, expected: List[int]):
+		assert get_maxima_indices(data, points) == expected
+		assert get_maxima_indices(numpy.array(data, dtype=float), points) == expected
+
+		with pytest.raises(ValueError, match="'points' must be at least 2"):
+			get_maxima_indices(data, 1)
+
+	def test_get_maxima_matrix_columns(self, im: IntensityMatrix):
+		maxima_im = get_maxima_matrix(im, points=5)
+		intensity_array = im.intensity_array
+
+		for col in range(0, im.size[1], 25):
+			rows = get_maxima_indices(intensity_array[:, col], points=5)
+			assert numpy.flatnonzero(maxima_im[:, col]).tolist() == [
+					row for row in rows if intensity_array[row, col]
+					]
 
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, test_list_strs, test_dict])
 	def test_ion_intensities_errors(self, obj: Any):
@@ -276,6 +317,30 @@ class Test_get_maxima_matrix:
 		assert isinstance(maxima_matrix, numpy.ndarray)
 		# TODO: value check
 
+	@pytest.mark.parametrize("scans", [2, 3, 5, 11])
+	def test_consolidate_scans(self, im: IntensityMatrix, scans: int):
+		maxima_matrix = get_maxima_matrix(im, scans=1)
+		consolidated = get_maxima_matrix(im, scans=scans)
+
+		# Each column's intensities are moved between scans, but not changed
+		assert numpy.allclose(consolidated.sum(axis=0), maxima_matrix.sum(axis=0))
+		assert numpy.count_nonzero(consolidated.any(axis=1)) < numpy.count_nonzero(maxima_matrix.any(axis=1))
+
+		# No two scans with data are within half a window of each other
+		rows_with_data = numpy.flatnonzero(consolidated.any(axis=1))
+		assert numpy.diff(rows_with_data).min() > scans // 2
+
+	def test_consolidate_scans_simple(self):
+		# Two peaks for each ion, with the apexes for ion 51 one scan later
+		intensity_array = numpy.array([[0, 0], [5, 0], [0, 4], [0, 0], [0, 0], [2, 0], [0, 1], [0, 0]], dtype=float)
+		im = IntensityMatrix(list(range(1, 9)), [50, 51], intensity_array)
+
+		assert numpy.array_equal(get_maxima_matrix(im, scans=1), intensity_array)
+		assert numpy.array_equal(
+				get_maxima_matrix(im, scans=3),
+				[[0, 0], [5, 4], [0, 0], [0, 0], [0, 0], [2, 1], [0, 0], [0, 0]],
+				)
+
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, *test_sequences, test_dict])
 	def test_im_errors(self, obj: Any):
 		with pytest.raises(TypeError):
@@ -290,3 +355,54 @@ class Test_get_maxima_matrix:
 	def test_scans_errors(self, obj: Any, im: IntensityMatrix):
 		with pytest.raises(TypeError):
 			get_maxima_matrix(im, scans=obj)
+
+
+@pytest.mark.parametrize("executor_type", [None, ThreadPoolExecutor, ProcessPoolExecutor])
+@pytest.mark.parametrize("n_jobs", [2, 3, -1])
+def test_get_maxima_matrix_n_jobs(im_i: IntensityMatrix, n_jobs: int, executor_type: Any):
+	expected = get_maxima_matrix(im_i, points=5, scans=3)
+
+	if executor_type is None:
+		actual = get_maxima_matrix(im_i, points=5, scans=3, n_jobs=n_jobs)
+	else:
+		with executor_type(max_workers=2) as executor:
+			actual = get_maxima_matrix(im_i, points=5, scans=3, n_jobs=n_jobs, executor=executor)
+
+	assert numpy.array_equal(actual, expected)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Needs the 'fork' start method")
+def test_get_maxima_matrix_forked_workers():
+	# Workers forked before the resource tracker started must not unlink the shared memory when they exit
+	script = "\n".join([
+			"import multiprocessing",
+			"from concurrent.futures import ProcessPoolExecutor",
+			"import numpy",
+			"from pyms.BillerBiemann import _get_maxima_mask, _get_maxima_mask_parallel",
+			"array = numpy.random.default_rng(1).integers(0, 100, size=(200, 40)).astype(float)",
+			"with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('fork')) as executor:",
+			"	list(executor.map(abs, range(4)))",
+			"	for _ in range(3):",
+			"		assert (_get_maxima_mask_parallel(array, 3, 4, executor) == _get_maxima_mask(array, 3)).all()",
+			])
+
+	result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=False)
+	assert result.returncode == 0, result.stderr
+	assert "resource_tracker" not in result.stderr
+
+
+def test_BillerBiemann_n_jobs(im_i: IntensityMatrix):
+	expected = BillerBiemann(im_i, points=9, scans=2)
+	actual = BillerBiemann(im_i, points=9, scans=2, n_jobs=2)
+
+	assert len(actual) == len(expected)
+	for peak, expected_peak in zip(actual, expected):
+		assert peak.rt == expected_peak.rt
+		assert peak.bounds == expected_peak.bounds
+		assert peak.mass_spectrum == expected_peak.mass_spectrum
+
+	with pytest.raises(TypeError, match="'n_jobs' must be an integer"):
+		BillerBiemann(im_i, n_jobs=2.0)  # type: ignore[arg-type]
+
+	with pytest.raises(ValueError, match="'n_jobs' must be a positive integer or -1"):
+		BillerBiemann(im_i, n_jobs=0)
@@ -23,8 +23,10 @@ import csv
 import math
 import operator
 import pathlib
+import pickle
 import tempfile
-from typing import Any, Iterator, List
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Iterator, List, Tuple
 
 # 3rd party
 import numpy
@@ -35,14 +37,27 @@ from domdf_python_tools.paths import PathPlus
 # this package
 from pyms.BillerBiemann import BillerBiemann, num_ions_threshold, rel_threshold
 from pyms.DPA.Alignment import Alignment, exprl2alignment
-from pyms.DPA.PairwiseAlignment import PairwiseAlignment, align_with_tree
+from pyms.DPA.Backend import ExecutorBackend, ProcessPoolBackend, SerialBackend, get_backend
+from pyms.DPA.PairwiseAlignment import (
+		PairwiseAlignment,
+		_banded_dp,
+		align,
+		align_with_tree,
+		dp,
+		position_similarity,
+		rt_band,
+		score_matrix,
+		score_matrix_mpi
+		)
 from pyms.Experiment import Experiment, load_expr
 from pyms.GCMS.IO.JCAMP import JCAMP_reader
 from pyms.IntensityMatrix import build_intensity_matrix_i
 from pyms.Noise.SavitzkyGolay import savitzky_golay
+from pyms.Peak.Class import Peak
 from pyms.Peak.Function import peak_sum_area, peak_top_ion_areas
 from pyms.Peak.List.Function import composite_peak
 from pyms.Peak.List.IO import store_peaks
+from pyms.Spectrum import MassSpectrum
 from pyms.TopHat import tophat
 from pyms.Utils.Utils import is_number
 
@@ -142,6 +157,184 @@ def F1(expr_list: List[Experiment]) -> List[Alignment]:
 	return F1
 
 
+def test_alignment_index(F1: List[Alignment]):
+	assert F1[0]._index.dtype == numpy.int32
+	assert numpy.array_equal(F1[0]._index, [numpy.arange(len(F1[0]))])
+
+	merged = align(F1[0], F1[1], Dw, Gw)
+	assert merged.expr_code == F1[0].expr_code + F1[1].expr_code
+	assert merged._index.shape == (2, len(merged))
+	assert merged._tables[0] is F1[0]._tables[0]
+	assert merged._tables[1] is F1[1]._tables[0]
+
+	# Each peak appears once, in order of retention time
+	for table, rows in zip(merged._tables, merged._index):
+		assert rows[rows >= 0].tolist() == list(range(len(table)))
+
+	for position, peaks in enumerate(merged.peakalgt):
+		for expr_idx, peak in enumerate(peaks):
+			assert peak is merged.peakpos[expr_idx][position]
+
+			row = merged._index[expr_idx, position]
+			if row < 0:
+				assert peak is None
+			else:
+				assert peak is merged._tables[expr_idx].peaks[row]
+
+	# Positions are replaced by setting peakalgt
+	copied = Alignment(None)
+	copied.expr_code = merged.expr_code
+	copied.peakalgt = merged.peakalgt
+	assert numpy.array_equal(copied._index, merged._index)
+	assert copied.peakpos == merged.peakpos
+
+	# Pickling doesn't include the cached arrays
+	unpickled = pickle.loads(pickle.dumps(merged))
+	assert numpy.array_equal(unpickled._index, merged._index)
+	assert "_peakpos_cache" not in unpickled.__dict__
+	assert numpy.array_equal(unpickled._peak_arrays().spectra, merged._peak_arrays().spectra)
+
+	# Alignments pickled before the index was introduced stored the lists of peaks
+	legacy = object.__new__(Alignment)
+	legacy.__dict__.update(
+			peakpos=merged.peakpos,
+			peakalgt=merged.peakalgt,
+			expr_code=merged.expr_code,
+			similarity=merged.similarity,
+			)
+	unpickled = pickle.loads(pickle.dumps(legacy))
+	assert len(unpickled) == len(merged)
+	assert numpy.array_equal(unpickled._index, merged._index)
+	assert unpickled.expr_code == merged.expr_code
+	assert [[peak.UID if peak else None for peak in peaks] for peaks in unpickled.peakpos] == [
+			[peak.UID if peak else None for peak in peaks] for peaks in merged.peakpos
+			]
+
+
+def test_filter_min_peaks(F1: List[Alignment]):
+	merged = align(align(F1[0], F1[1], Dw, Gw), F1[2], Dw, Gw)
+	expected = [pos for pos in merged.peakalgt if len(list(filter(None, pos))) >= 2]
+
+	merged.filter_min_peaks(2)
+	assert merged.peakalgt == expected
+	assert merged._peak_arrays().counts.min() == 2
+
+
+def test_alignment_dataframes(F1: List[Alignment]):
+	merged = align(align(F1[0], F1[1], Dw, Gw), F1[2], Dw, Gw)
+
+	for require_all_expr in (True, False):
+		rows = [
+				pos for pos in merged.peakalgt
+				if not require_all_expr or all(peak is not None for peak in pos)
+				]
+
+		rts = merged.get_peak_alignment(require_all_expr=require_all_expr)
+		assert list(rts.columns) == sorted(merged.expr_code)
+		assert len(rts) == len(rows)
+		rts = rts[merged.expr_code].to_numpy()
+		expected_rts = [[numpy.nan if peak is None else peak.rt / 60 for peak in pos] for pos in rows]
+		assert numpy.array_equal(rts, numpy.array(expected_rts, dtype=float).reshape(rts.shape), equal_nan=True)
+
+		seconds = merged.get_peak_alignment(minutes=False, require_all_expr=require_all_expr)
+		assert numpy.allclose(seconds[merged.expr_code].to_numpy(), rts * 60, equal_nan=True)
+
+		areas = merged.get_area_alignment(require_all_expr=require_all_expr)[merged.expr_code].to_numpy()
+		expected_areas = [[numpy.nan if peak is None else peak.area for peak in pos] for pos in rows]
+		assert numpy.array_equal(areas, numpy.array(expected_areas, dtype=float).reshape(areas.shape), equal_nan=True)
+
+		peaks = merged.get_peaks_alignment(require_all_expr=require_all_expr)[merged.expr_code]
+		assert peaks.to_numpy().tolist() == rows
+
+		spectra = merged.get_ms_alignment(require_all_expr=require_all_expr)[merged.expr_code]
+		assert spectra.to_numpy().tolist() == [[peak and peak.mass_spectrum for peak in pos] for pos in rows]
+
+
+def test_score_matrix(F1: List[Alignment]):
+	merged = align(F1[0], F1[1], Dw, Gw)
+
+	for a1, a2 in [(F1[0], F1[1]), (merged, F1[2]), (F1[2], merged)]:
+		scores = score_matrix(a1, a2, Dw)
+		assert scores.shape == (len(a1), len(a2))
+
+		for i in range(0, len(a1), 15):
+			for j in range(len(a2)):
+				expected = position_similarity(a1.peakalgt[i], a2.peakalgt[j], Dw)
+				assert scores[i, j] == pytest.approx(expected, rel=1e-12, abs=1e-12)
+
+	# The cached arrays are rebuilt when the alignment positions change
+	merged.filter_min_peaks(2)
+	assert score_matrix(merged, F1[2], Dw).shape == (len(merged), len(F1[2]))
+
+
+class _InlineExecutor(Executor):
+	# An executor which is not a process or thread pool, such as a remote cluster would be.
+
+	def submit(self, fn, *args, **kwargs):  # noqa: MAN001,MAN002
+		future: Future = Future()
+		future.set_result(fn(*args, **kwargs))
+		return future
+
+
+def test_backends():
+	backend = SerialBackend()
+	assert backend.n_workers == 1
+	assert not backend.parallel
+	assert backend.submit(operator.add, 1, 2).result() == 3
+	with pytest.raises(ZeroDivisionError):
+		backend.submit(operator.truediv, 1, 0).result()
+
+	assert isinstance(get_backend(), SerialBackend)
+	assert get_backend(executor=backend) is backend
+
+	with ThreadPoolExecutor(max_workers=3) as executor:
+		backend = get_backend(executor=executor)
+		assert isinstance(backend, ExecutorBackend)
+		assert backend.n_workers == 3
+		assert backend.local
+		assert backend.submit(operator.add, 1, 2).result() == 3
+
+		assert get_backend(2, executor).n_workers == 2
+
+	backend = get_backend(executor=_InlineExecutor())
+	assert not backend.local
+
+	with ProcessPoolBackend(2) as backend:
+		assert backend.parallel
+		assert backend.local
+		assert backend.submit(operator.add, 1, 2).result() == 3
+
+	backend = get_backend(2)
+	assert isinstance(backend, ProcessPoolBackend)
+	backend.shutdown()
+
+
+def test_backends_errors():
+	with pytest.raises(TypeError, match="'n_jobs' must be an integer"):
+		get_backend(2.0)  # type: ignore[arg-type]
+	with pytest.raises(ValueError, match="'n_jobs' must be a positive integer or -1"):
+		get_backend(0)
+	with pytest.raises(TypeError, match="'executor' must be a concurrent.futures.Executor"):
+		ExecutorBackend(test_string)  # type: ignore[arg-type]
+	with pytest.raises(ValueError, match="'n_workers' must be a positive integer"):
+		ExecutorBackend(_InlineExecutor(), 0)
+
+
+def test_score_matrix_n_jobs(F1: List[Alignment]):
+	merged = align(F1[0], F1[1], Dw, Gw)
+
+	for a1, a2 in [(F1[0], F1[1]), (merged, F1[2])]:
+		expected = score_matrix(a1, a2, Dw)
+
+		assert numpy.array_equal(score_matrix(a1, a2, Dw, n_jobs=2), expected)
+		assert numpy.array_equal(score_matrix(a1, a2, Dw, executor=ExecutorBackend(_InlineExecutor(), 7)), expected)
+
+		with ThreadPoolExecutor(max_workers=3) as executor:
+			assert numpy.array_equal(score_matrix(a1, a2, Dw, executor=executor), expected)
+
+		assert numpy.array_equal(score_matrix_mpi(a1, a2, Dw), expected)
+
+
 @pytest.fixture(scope="module")
 def T1(F1: List[Alignment]) -> PairwiseAlignment:
 	T1 = PairwiseAlignment(F1, Dw, Gw)
@@ -150,6 +343,52 @@ def T1(F1: List[Alignment]) -> PairwiseAlignment:
 	return T1
 
 
+def test_sim_matrix(F1: List[Alignment], T1: PairwiseAlignment, capsys):
+	n = len(F1)
+	assert T1.sim_matrix.shape == (n, n)
+	assert (T1.sim_matrix == T1.sim_matrix.T).all()
+	assert T1.sim_matrix[0, 1] == numpy.float32(align(F1[0], F1[1], Dw, Gw).similarity)
+
+	calls: List[Tuple[int, int]] = []
+	T_parallel = PairwiseAlignment(F1, Dw, Gw, n_jobs=2, progress=lambda done, total: calls.append((done, total)))
+	assert numpy.array_equal(T_parallel.sim_matrix, T1.sim_matrix)
+	assert calls[-1] == (n * (n - 1) // 2, n * (n - 1) // 2)
+	assert [done for done, total in calls] == sorted(done for done, total in calls)
+
+	with ThreadPoolExecutor(max_workers=2) as executor:
+		T_executor = PairwiseAlignment(F1, Dw, Gw, executor=executor)
+	assert numpy.array_equal(T_executor.sim_matrix, T1.sim_matrix)
+
+	# Without shared memory
+	T_remote = PairwiseAlignment(F1, Dw, Gw, executor=ExecutorBackend(_InlineExecutor(), 2))
+	assert numpy.array_equal(T_remote.sim_matrix, T1.sim_matrix)
+
+	# By default progress is only printed after each tenth of the pairs
+	capsys.readouterr()
+	PairwiseAlignment(F1 * 3, Dw, Gw)
+	remaining = [line for line in capsys.readouterr().out.splitlines() if "pairs remaining" in line]
+	assert len(remaining) == 10
+	assert remaining[-1] == " -> 0 pairs remaining"
+
+
+@pytest.mark.parametrize("n_workers", [2, 3])
+def test_align_with_tree_executor(T1: PairwiseAlignment, n_workers: int):
+	inputs = [alignment.peakalgt for alignment in T1.alignments]
+	expected = align_with_tree(T1, min_peaks=2)
+
+	with ThreadPoolExecutor(max_workers=n_workers) as executor:
+		actual = align_with_tree(T1, min_peaks=2, executor=executor)
+
+	assert actual.expr_code == expected.expr_code
+	assert len(actual) == len(expected) == 232
+
+	for actual_pos, expected_pos in zip(actual.peakalgt, expected.peakalgt):
+		assert [peak and peak.rt for peak in actual_pos] == [peak and peak.rt for peak in expected_pos]
+
+	# The input alignments are not changed
+	assert [alignment.peakalgt for alignment in T1.alignments] == inputs
+
+
 @pytest.fixture(scope="module")
 def A1(T1: PairwiseAlignment) -> Alignment:
 	A1 = align_with_tree(T1, min_peaks=2)
@@ -172,6 +411,21 @@ class Test_alignment_Errors:
 		with pytest.raises(TypeError):
 			PairwiseAlignment(F1, Dw, obj)
 
+	@pytest.mark.parametrize("obj", [test_string, test_int, *test_sequences, test_dict])
+	def test_banded_errors(self, F1: List[Alignment], obj: Any):
+		with pytest.raises(TypeError):
+			PairwiseAlignment(F1, Dw, Gw, banded=obj)
+
+	@pytest.mark.parametrize("obj", [test_float, test_string, *test_sequences, test_dict])
+	def test_n_jobs_errors(self, F1: List[Alignment], obj: Any):
+		with pytest.raises(TypeError, match="'n_jobs' must be an integer"):
+			PairwiseAlignment(F1, Dw, Gw, n_jobs=obj)
+
+	@pytest.mark.parametrize("n_jobs", [0, -2])
+	def test_n_jobs_values(self, F1: List[Alignment], n_jobs: int):
+		with pytest.raises(ValueError, match="'n_jobs' must be a positive integer or -1"):
+			PairwiseAlignment(F1, Dw, Gw, n_jobs=n_jobs)
+
 	@pytest.mark.parametrize("obj", [*test_numbers, test_string, *test_sequences, test_dict])
 	def test_expr_errors(self, obj: Any):
 		with pytest.raises(TypeError):
@@ -431,5 +685,122 @@ def test_align_2_alignments(A1: Alignment, pyms_datadir: PathPlus, tmp_pathplus:
 # def test_alignment_compare():
 # todo
 
-# def test_dp()
-# todo
+
+def _dp_loop(S: numpy.ndarray, gap: float) -> List[int]:
+	# The trace back of a cell-by-cell Needleman-Wunsch alignment
+	D = numpy.zeros((S.shape[0] + 1, S.shape[1] + 1))
+	D[:, 0] = gap * numpy.arange(S.shape[0] + 1)
+	D[0, :] = gap * numpy.arange(S.shape[1] + 1)
+	phi = numpy.zeros_like(D, dtype=int)
+	phi[:, 0] = 1
+	phi[0, :] = 2
+	phi[0, 0] = 3
+
+	for i in range(1, S.shape[0] + 1):
+		for j in range(1, S.shape[1] + 1):
+			darray = [D[i - 1, j - 1] + S[i - 1, j - 1], D[i - 1, j] + gap, D[i, j - 1] + gap]
+			D[i, j] = min(darray)
+			phi[i, j] = darray.index(D[i, j])
+
+	trace = []
+	i, j = S.shape
+	while phi[i, j] != 3:
+		trace.append(int(phi[i, j]))
+		i, j = i - (phi[i, j] != 2), j - (phi[i, j] != 1)
+
+	return trace[::-1]
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (1, 4), (5, 1), (7, 9), (20, 13)])
+@pytest.mark.parametrize("gap", [0.3, 0.5])
+def test_dp(shape: Tuple[int, int], gap: float):
+	rng = numpy.random.default_rng(1)
+
+	# Half-integer scores, so that there are ties
+	for S in (rng.random(shape), rng.integers(0, 3, shape) / 2):
+		result = dp(S, gap)
+		assert result["trace"] == _dp_loop(S, gap)
+		assert result["phi"].dtype == numpy.int8
+		assert result["D"][-1, -1] == pytest.approx(
+				sum(S[i, j] for i, j in result["matches"]) + gap * (sum(shape) - 2 * len(result["matches"]))
+				)
+
+		# A band covering the whole matrix
+		band = (numpy.zeros(shape[0] + 1, dtype=int), numpy.full(shape[0] + 1, shape[1]))
+		assert dp(S, gap, band)["trace"] == result["trace"]
+
+
+def test_dp_band():
+	S = numpy.array([[0.1, 1.0, 1.0], [1.0, 0.1, 1.0], [1.0, 1.0, 0.1]])
+
+	# Only the diagonal, plus the first row so the path can start
+	band = (numpy.array([0, 1, 2, 3]), numpy.array([1, 1, 2, 3]))
+	result = dp(S, 0.3, band)
+	assert result["trace"] == [0, 0, 0]
+	assert numpy.isinf(result['D'][3, 0])
+
+	with pytest.raises(ValueError, match="The band does not connect"):
+		dp(S, 0.3, (numpy.array([0, 3, 3, 3]), numpy.array([0, 3, 3, 3])))
+	with pytest.raises(ValueError, match="The band must have limits for each row"):
+		dp(S, 0.3, (numpy.array([0, 1, 2]), numpy.array([1, 2, 3])))
+	with pytest.raises(ValueError, match="The band must include the first and last cells"):
+		dp(S, 0.3, (numpy.array([1, 1, 2, 3]), numpy.array([1, 1, 2, 3])))
+
+
+def test_rt_band(F1: List[Alignment]):
+	merged = align(F1[0], F1[1], Dw, Gw)
+
+	for a1, a2 in [(F1[0], F1[1]), (merged, F1[2]), (F1[3], merged)]:
+		lower, upper = rt_band(a1, a2, Dw)
+		assert lower.shape == upper.shape == (len(a1) + 1, )
+		assert lower[0] == 0
+		assert upper[-1] == len(a2)
+		assert (numpy.diff(lower) >= 0).all()
+		assert (lower <= upper).all()
+
+		# Fewer cells are evaluated, but the result is the same
+		assert (upper - lower + 1).sum() < (len(a1) + 1) * (len(a2) + 1)
+
+		S = score_matrix(a1, a2, Dw)
+		assert dp(S, Gw, (lower, upper))["trace"] == dp(S, Gw)["trace"]
+
+		banded = align(a1, a2, Dw, Gw, banded=True)
+		unbanded = align(a1, a2, Dw, Gw)
+		assert banded.similarity == unbanded.similarity
+		assert [list(pos) for pos in banded.peakalgt] == [list(pos) for pos in unbanded.peakalgt]
+
+
+def _random_experiment(rng: numpy.random.Generator, expr_code: str, compounds: List[Tuple[float, numpy.ndarray]]) -> Experiment:
+	# Most of the compounds, plus runs of peaks which are only in this experiment
+	peaks = [(rt + rng.normal(0, 1.5), spectrum * rng.uniform(0.8, 1.2, spectrum.size))
+				for rt, spectrum in compounds
+				if rng.random() < 0.8]
+
+	for _ in range(rng.integers(1, 4)):
+		for rt in rng.uniform(0, 1500) + numpy.cumsum(rng.uniform(5, 40, rng.integers(5, 25))):
+			peaks.append((rt, rng.random(20) * (rng.random(20) < 0.3) + 0.01))
+
+	peaks.sort(key=operator.itemgetter(0))
+	mass_list = list(range(50, 70))
+
+	return Experiment(expr_code, [Peak(float(rt), MassSpectrum(mass_list, list(spectrum))) for rt, spectrum in peaks])
+
+
+@pytest.mark.parametrize("gap", [0.1, 0.3, 0.49, 0.5, 0.6])
+def test_banded_random(gap: float):
+	rng = numpy.random.default_rng(1)
+
+	for _ in range(10):
+		rts = numpy.cumsum(rng.uniform(2, 20, rng.integers(20, 80)))
+		compounds = [(rt, rng.random(20) * (rng.random(20) < 0.4) + 0.01) for rt in rts]
+		F = exprl2alignment([_random_experiment(rng, f"expr{i}", compounds) for i in range(4)])
+		a1, a2 = align(F[0], F[1], Dw, Gw), align(F[2], F[3], Dw, Gw)
+
+		# The gaps between matched positions are in the same order as without the band
+		S = score_matrix(a1, a2, Dw)
+		assert _banded_dp(S, a1._peak_arrays(), a2._peak_arrays(), Dw, gap) == dp(S, gap)["trace"]
+
+		banded = align(a1, a2, Dw, gap, banded=True)
+		unbanded = align(a1, a2, Dw, gap)
+		assert banded.similarity == unbanded.similarity
+		assert numpy.array_equal(banded._index, unbanded._index)
@@ -31,13 +31,15 @@ from coincidence.regressions import AdvancedFileRegressionFixture
 from domdf_python_tools.paths import PathPlus
 
 # this package
+from pyms.eic import ExtractedIntensityMatrix, build_extracted_intensity_matrix
 from pyms.GCMS.Class import GCMS_data
 from pyms.IntensityMatrix import (
 		ASCII_CSV,
 		IntensityMatrix,
+		_bin_flat_arrays,
 		build_intensity_matrix,
 		build_intensity_matrix_i,
-		import_leco_csv
+		import_leco_csv,
 		)
 from pyms.IonChromatogram import IonChromatogram
 from pyms.Spectrum import MassSpectrum
@@ -198,6 +200,16 @@ class TestIntensityMatrix:
 		with pytest.raises(expects):
 			im.get_index_at_time(obj)
 
+	def test_get_indices_at_times(self, im: IntensityMatrix):
+		times = [test_int, test_float, im.time_list[0], im.time_list[-1], 1500.0]
+		indices = im.get_indices_at_times(times)
+		assert isinstance(indices, numpy.ndarray)
+		assert indices.tolist() == [im.get_index_at_time(time) for time in times]
+		assert indices.tolist() == [1168, 11, 0, len(im.time_list) - 1, 1419]
+
+		with pytest.raises(IndexError, match="time 1000000.00 is out of bounds"):
+			im.get_indices_at_times([test_int, 1000000])
+
 	def test_get_time_at_index(self, im: IntensityMatrix):
 		assert im.get_time_at_index(test_int) == 1304.15599823
 
@@ -276,6 +288,32 @@ class TestIntensityMatrix:
 		with pytest.raises(IndexError):
 			im.get_ic_at_index(test_int)
 
+	def test_get_ic_at_index_view(self, im: IntensityMatrix):
+		im = copy.deepcopy(im)
+		column = im.intensity_array[:, 123]
+
+		ic = im.get_ic_at_index(123)
+		assert numpy.array_equal(ic.intensity_array, column)
+		assert ic.mass == im.get_mass_at_index(123)
+		assert ic.time_list == im.time_list
+
+		# Copies are independent of the intensity matrix
+		ic._intensity_array[:] = 0
+		assert numpy.array_equal(im.intensity_array[:, 123], column)
+
+		# Views share the column
+		ic = im.get_ic_at_index(123, view=True)
+		assert numpy.shares_memory(ic._intensity_array, im._intensity_array)
+		assert numpy.array_equal(ic.intensity_array, column)
+		ic._intensity_array[:] = 0
+		assert not im.intensity_array[:, 123].any()
+
+		# Writing a view back into its own column is a no-op
+		im.set_ic_at_index(124, im.get_ic_at_index(123, view=True))
+		im.set_ic_at_index(123, im.get_ic_at_index(123, view=True))
+		assert not im.intensity_array[:, 123].any()
+		assert not im.intensity_array[:, 124].any()
+
 	def test_get_ic_at_mass(self, im: IntensityMatrix):
 		# TODO: im.get_ic_at_mass() # Broken
 		ic = im.get_ic_at_mass(123)
@@ -315,6 +353,11 @@ class TestIntensityMatrix:
 			with pytest.raises(TypeError):
 				im.get_ms_at_index(obj)  # type: ignore[arg-type]
 
+		with pytest.raises(IndexError):
+			im.get_ms_at_index(-1)
+		with pytest.raises(IndexError):
+			im.get_ms_at_index(len(im))
+
 	def test_get_scan_at_index(self, im: IntensityMatrix):
 		scan = im.get_scan_at_index(test_int)
 
@@ -361,6 +404,20 @@ class TestIntensityMatrix:
 		with pytest.raises(IndexError):
 			im.get_mass_at_index(1000000)
 
+	def test_get_indices_of_masses(self, im: IntensityMatrix):
+		masses = [73.3, im.mass_list[0], im.mass_list[-1], 0, 1000000]
+		indices = im.get_indices_of_masses(masses)
+		assert isinstance(indices, numpy.ndarray)
+		assert indices.tolist() == [im.get_index_of_mass(mass) for mass in masses]
+		# As with get_index_of_mass, masses further than the largest mass from every mass give index 0
+		assert indices.tolist() == [23, 0, len(im.mass_list) - 1, 0, 0]
+
+		# The sorted masses are rebuilt after cropping
+		im = copy.deepcopy(im)
+		im.crop_mass(60, 400)
+		assert im.get_indices_of_masses([73.3]).tolist() == [13]
+		assert im.get_mass_at_index(13) == 73.2516
+
 	def test_crop_mass(self, im: IntensityMatrix):
 		im = copy.deepcopy(im)
 
@@ -512,6 +569,30 @@ def test_IntensityMatrix_custom(data: GCMS_data):
 	assert masses[0] == 50.2516
 
 
+def test_build_intensity_matrix_min_mass(data: GCMS_data, im: IntensityMatrix):
+	# masses below the first bin are not binned,
+	# except those within one bin interval, which truncate into the first bin
+	im_60 = build_intensity_matrix(data, min_mass=60.2516)
+	assert im_60.size == (2103, 440)
+	assert im_60.min_mass == 60.2516
+	assert (im_60.intensity_array[:, 1:] == im.intensity_array[:, 11:]).all()
+	assert (im_60.intensity_array[:, 0] == im.intensity_array[:, 9] + im.intensity_array[:, 10]).all()
+
+
+def test_bin_flat_arrays_edges():
+	# bins centred on 50, 51 and 52, each from -0.3 to +0.7
+	masses = [48.6, 48.8, 50.0, 52.6, 48.7, 51.0]
+	intensities = [1.0, 2.0, 4.0, 8.0, 16.0, 32.0]
+	binned = _bin_flat_arrays(masses, intensities, [4, 2], 50, 0.3, 1, 3)
+
+	# As with ``int()``, positions between -1 and 0 truncate into the first bin.
+	# 48.8 is therefore binned, but 48.6 and 48.7 are not.
+	assert binned.tolist() == [[6.0, 0.0, 8.0], [0.0, 32.0, 0.0]]
+
+	with pytest.raises(ValueError, match="mass values must not be above the last bin"):
+		_bin_flat_arrays([50.0, 52.7], [1.0, 1.0], [2], 50, 0.3, 1, 3)
+
+
 @pytest.mark.parametrize("obj", [test_dict, *test_lists, test_string, *test_numbers])
 def test_build_intensity_matrix_errors_data(obj: Any):
 	with pytest.raises(TypeError, match="'data' must be a GCMS_data object"):
@@ -581,3 +662,37 @@ def test_build_intensity_matrix_i(data: GCMS_data, im_i: IntensityMatrix):
 # mat = im.matrix_list
 # print("saving intensity matrix intensity values...")
 # save_data("output/im.dat", mat)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_npz(im: IntensityMatrix, tmp_pathplus: PathPlus, mmap: bool):
+	im.write_npz(tmp_pathplus / "im.npz")
+
+	for obj in [*test_sequences, test_dict, *test_numbers]:
+		with pytest.raises(TypeError):
+			im.write_npz(obj)  # type: ignore[arg-type]
+
+	loaded_im = IntensityMatrix.from_npz(tmp_pathplus / "im.npz", mmap=mmap)
+	assert loaded_im == im
+	assert loaded_im.mass_list == im.mass_list
+	assert isinstance(loaded_im._intensity_array, numpy.memmap) is mmap
+
+	# Changes are not written back to the file
+	loaded_im.null_mass(loaded_im.mass_list[0])
+	assert IntensityMatrix.from_npz(tmp_pathplus / "im.npz", mmap=mmap) == im
+
+
+def test_build_extracted_intensity_matrix(im: IntensityMatrix):
+	eim = build_extracted_intensity_matrix(im, [73, (147, 148), 147.1])
+	assert isinstance(eim, ExtractedIntensityMatrix)
+
+	expected_indices = [
+			idx for idx, mass in enumerate(im.mass_list) if 72.5 <= mass <= 73.5 or 146.5 <= mass <= 148.5
+			]
+	assert eim.mass_list == [im.mass_list[idx] for idx in expected_indices]
+	assert numpy.array_equal(eim.intensity_array, im.intensity_array[:, expected_indices])
+	assert eim.time_list == im.time_list
+
+	# Zero width bounds only include the exact masses
+	eim = build_extracted_intensity_matrix(im, [im.mass_list[10], im.mass_list[5]], 0, 0)
+	assert eim.mass_list == [im.mass_list[5], im.mass_list[10]]
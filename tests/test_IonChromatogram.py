@@ -29,7 +29,7 @@ from domdf_python_tools.paths import PathPlus
 
 # this package
 from pyms.IntensityMatrix import IntensityMatrix
-from pyms.IonChromatogram import IonChromatogram
+from pyms.IonChromatogram import ExtractedIonChromatogram, IonChromatogram
 from pyms.Utils.Utils import _pickle_load_path, is_number
 
 # this package
@@ -247,6 +247,22 @@ def test_get_index_at_time(tic: IonChromatogram):
 		tic.get_index_at_time(1000000)
 
 
+def test_get_indices_at_times(tic: IonChromatogram):
+	indices = tic.get_indices_at_times(numpy.array([12, 1304.15599823, tic.time_list[-1]]))
+	assert indices.tolist() == [10, test_int, len(tic) - 1]
+
+	with pytest.raises(IndexError):
+		tic.get_indices_at_times([12, -1])
+
+
+def test_get_index_at_time_unsorted():
+	# Equally near times give the earlier index, and repeated times the first occurrence
+	ic = IonChromatogram(numpy.arange(6, dtype=float), [3.0, 1.0, 2.0, 1.0, 5.0, 4.0])
+	assert ic.get_indices_at_times([1.0, 1.5, 2.4, 3.5, 4.6, 5.0]).tolist() == [1, 1, 2, 0, 4, 4]
+	assert ic.get_index_at_time(1.5) == 1
+	assert ic.get_index_at_time(4.5) == 4
+
+
 def test_get_time_at_index(tic: IonChromatogram):
 	assert isinstance(tic.get_time_at_index(test_int), float)
 	assert tic.get_time_at_index(test_int) == 1304.15599823
@@ -266,3 +282,31 @@ def test_get_time_at_index(tic: IonChromatogram):
 		tic.get_time_at_index(-1)
 	with pytest.raises(IndexError):
 		tic.get_time_at_index(10000000)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_npz(im: IntensityMatrix, tic: IonChromatogram, tmp_pathplus: PathPlus, mmap: bool):
+	ic = im.get_ic_at_index(0)
+	ic.write_npz(tmp_pathplus / "ic.npz")
+	tic.write_npz(tmp_pathplus / "tic.npz")
+
+	for obj in [*test_sequences, test_dict, *test_numbers]:
+		with pytest.raises(TypeError):
+			ic.write_npz(obj)  # type: ignore[arg-type]
+
+	loaded_ic = IonChromatogram.from_npz(tmp_pathplus / "ic.npz", mmap=mmap)
+	assert loaded_ic == ic
+	assert loaded_ic.mass == ic.mass
+	loaded_tic = IonChromatogram.from_npz(tmp_pathplus / "tic.npz", mmap=mmap)
+	assert loaded_tic.is_tic()
+	assert loaded_tic.time_list == tic.time_list
+	assert numpy.array_equal(loaded_tic.intensity_array, tic.intensity_array)
+
+	eic = ExtractedIonChromatogram(ic.intensity_array, ic.time_list, [73, 147])
+	eic.write_npz(tmp_pathplus / "eic.npz")
+	loaded_eic = ExtractedIonChromatogram.from_npz(tmp_pathplus / "eic.npz", mmap=mmap)
+	assert loaded_eic == eic
+	assert loaded_eic.masses == (73, 147)
+
+	with pytest.raises(ValueError, match="does not contain a IonChromatogram object"):
+		IonChromatogram.from_npz(tmp_pathplus / "eic.npz")
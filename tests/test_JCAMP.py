@@ -19,9 +19,10 @@
 #############################################################################
 
 # stdlib
+import json
 import os
 from copy import deepcopy
-from typing import cast
+from typing import List, cast
 
 # 3rd party
 import numpy
@@ -32,9 +33,13 @@ from pytest_regressions.data_regression import RegressionYamlDumper
 
 # this package
 from pyms.GCMS.Class import GCMS_data
+from pyms.GCMS.IO import Cache
+from pyms.GCMS.IO.Cache import _read_cache_key, get_cache_path
 from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import IntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
-from pyms.Spectrum import Scan
+from pyms.Spectrum import MassSpectrum, Scan
+from pyms.Utils.jcamp import xydata_to_arrays
 from pyms.Utils.Utils import _pickle_load_path
 
 # this package
@@ -126,6 +131,49 @@ def test_scan_list(data: GCMS_data):
 	assert scans[0].max_mass == 477.6667
 
 
+def test_get_scan_at_index(data: GCMS_data):
+	scan = data.get_scan_at_index(0)
+	assert isinstance(scan, Scan)
+	assert scan == data.scan_list[0]
+	assert data.get_scan_at_index(2102) == data.scan_list[-1]
+	assert list(data.iter_scans()) == data.scan_list
+
+	with pytest.raises(TypeError):
+		data.get_scan_at_index(test_float)  # type: ignore[arg-type]
+	with pytest.raises(IndexError):
+		data.get_scan_at_index(-1)
+	with pytest.raises(IndexError):
+		data.get_scan_at_index(2103)
+
+
+def test_from_arrays(data: GCMS_data):
+	scans = data.scan_list
+	mass_values = numpy.concatenate([scan.mass_list for scan in scans])
+	intensity_values = numpy.concatenate([scan.intensity_list for scan in scans])
+	point_counts = data.point_counts
+
+	assert len(point_counts) == 2103
+	assert point_counts[0] == 101
+	assert GCMS_data.from_arrays(data.time_list, mass_values, intensity_values, point_counts) == data
+
+	# Scans in descending order are reversed
+	descending = GCMS_data.from_arrays([1.0, 2.0, 3.0], [3, 2, 1, 4, 5], [30, 20, 10, 40, 50], [3, 2, 0])
+	assert descending.get_scan_at_index(0).mass_list == [1, 2, 3]
+	assert descending.get_scan_at_index(0).intensity_list == [10, 20, 30]
+	assert descending.get_scan_at_index(1).mass_list == [4, 5]
+	assert len(descending.get_scan_at_index(2)) == 0
+	assert descending.tic.intensity_array.tolist() == [60, 90, 0]
+
+	with pytest.raises(ValueError, match="The lengths of the mass and intensity lists differ!"):
+		GCMS_data.from_arrays(data.time_list, mass_values, intensity_values[1:], point_counts)
+
+	with pytest.raises(ValueError, match="number of time points does not equal the number of scans"):
+		GCMS_data.from_arrays(data.time_list[1:], mass_values, intensity_values, point_counts)
+
+	with pytest.raises(ValueError, match="The sum of 'point_counts' does not equal the number of data points"):
+		GCMS_data.from_arrays(data.time_list, mass_values[1:], intensity_values[1:], point_counts)
+
+
 def test_tic(data: GCMS_data):
 	tic = data.tic
 	assert isinstance(tic, IonChromatogram)
@@ -261,9 +309,73 @@ def test_dump(data: GCMS_data, tmp_pathplus: PathPlus):
 	assert len(loaded_data) == len(data)
 
 
+@pytest.mark.parametrize("mmap", [True, False])
+def test_npz(data: GCMS_data, tmp_pathplus: PathPlus, mmap: bool):
+	data.write_npz(tmp_pathplus / "JCAMP.npz")
+
+	for obj in [*test_sequences, test_dict, *test_numbers]:
+		with pytest.raises(TypeError):
+			data.write_npz(obj)  # type: ignore[arg-type]
+
+	loaded_data = GCMS_data.from_npz(tmp_pathplus / "JCAMP.npz", mmap=mmap)
+	assert loaded_data == data
+	assert numpy.array_equal(loaded_data.tic.intensity_array, data.tic.intensity_array)
+	assert loaded_data.min_mass == data.min_mass
+	assert loaded_data.max_mass == data.max_mass
+	assert isinstance(loaded_data._mass_values.base, numpy.memmap) is mmap
+
+	with pytest.raises(ValueError, match="does not contain a IntensityMatrix object"):
+		IntensityMatrix.from_npz(tmp_pathplus / "JCAMP.npz")
+
+
+def test_jcamp_reader_cache(pyms_datadir: PathPlus, tmp_pathplus: PathPlus, capsys, monkeypatch):
+	jcamp_file = tmp_pathplus / "ELEY_1_SUBTRACT.JDX"
+	jcamp_file.write_bytes((pyms_datadir / "ELEY_1_SUBTRACT.JDX").read_bytes())
+	cache_file = get_cache_path(jcamp_file)
+	assert cache_file == tmp_pathplus / "ELEY_1_SUBTRACT.JDX.pyms.npz"
+
+	data = JCAMP_reader(jcamp_file, cache=True)
+	assert cache_file.is_file()
+	assert "Reading JCAMP file" in capsys.readouterr().out
+
+	cached_data = JCAMP_reader(jcamp_file, cache=True)
+	assert "Reading cached data" in capsys.readouterr().out
+	assert cached_data == data
+
+	# Touching the file changes the mtime but not the hash
+	os.utime(jcamp_file, ns=(0, 0))
+	assert JCAMP_reader(jcamp_file, cache=True) == data
+	assert "Reading cached data" in capsys.readouterr().out
+
+	# The new mtime is recorded alongside the cache, which is not rewritten, so the file is not hashed again
+	assert _read_cache_key(cache_file)["mtime_ns"] != 0  # type: ignore[index]
+	assert json.loads(cache_file.with_suffix(".json").read_text())["mtime_ns"] == 0
+	with monkeypatch.context() as m:
+		m.setattr(Cache, "_file_hash", None)
+		assert JCAMP_reader(jcamp_file, cache=True) == data
+		assert "Reading cached data" in capsys.readouterr().out
+
+	# Changing the contents invalidates the cache
+	jcamp_file.write_text(jcamp_file.read_text().replace("1.05200003833", "1.0"))
+	modified_data = JCAMP_reader(jcamp_file, cache=True)
+	assert "Reading JCAMP file" in capsys.readouterr().out
+	assert modified_data.time_list[0] == 1.0
+	assert JCAMP_reader(jcamp_file, cache=True) == modified_data
+
+
 # Inherited Methods from TimeListMixin
 
 
+def test_get_indices_at_times(data: GCMS_data):
+	assert data.get_indices_at_times([400.0, 1500.0]).tolist() == [378, data.get_index_at_time(1500.0)]
+
+	# The sorted times are rebuilt after trimming
+	trimmed = deepcopy(data)
+	assert trimmed.get_indices_at_times([1500.0]).tolist() == [1419]
+	trimmed.trim(1000, 2000)
+	assert trimmed.get_indices_at_times([1500.0]).tolist() == [420]
+
+
 def test_time_list(data: GCMS_data):
 	time = data.time_list
 	assert isinstance(time, list)
@@ -353,3 +465,75 @@ def test_jcamp_reader_empty_scan(advanced_data_regression: AdvancedDataRegressio
 	assert data.min_mass is not None
 	assert data.max_mass is not None
 	advanced_data_regression.check({"time_list": data.time_list, "scan_list": data.scan_list})
+
+
+@pytest.mark.parametrize(
+		"data, data_form, expected_x, expected_y",
+		[
+				("52.0, 10.0 53.0, 20.0\n 54, 30\n", "(XY..XY)", [52, 53, 54], [10, 20, 30]),
+				("52 10\n53 1.5E+02\n", "(XY..XY)", [52, 53], [10, 150]),
+				("52A0 53B0\n", "(XY..XY)", [52, 53], [10, 20]),
+				("10 1.0E5 11@\n", "(XY..XY)", [10, 11], [100000, 0]),
+				("10 1.5e2 11 2E+2 12@ 13E5\n", "(XY..XY)", [10, 11, 12, 13], [150, 200, 0, 55]),
+				("1 10 20 30 40\n", "(X++(Y..Y))", [1, 2, 3, 4], [10, 20, 30, 40]),
+				("1A0B0C0D0\n", "(X++(Y..Y))", [1, 2, 3, 4], [10, 20, 30, 40]),
+				("1A0J0J0J0\n", "(X++(Y..Y))", [1, 2, 3, 4], [10, 20, 30, 40]),
+				("1A0J0U\n", "(X++(Y..Y))", [1, 2, 3, 4], [10, 20, 30, 40]),
+				("1A0j0%\n", "(X++(Y..Y))", [1, 2, 3], [10, 0, 0]),
+				("1A0J0J0\n4C0J0\n", "(X++(Y..Y))", [1, 2, 3, 4], [10, 20, 30, 40]),
+				("1a0T\n", "(X++(Y..Y))", [1, 2], [-10, -10]),
+				],
+		)
+def test_xydata_to_arrays(data: str, data_form: str, expected_x: List[float], expected_y: List[float]):
+	x_values, y_values = xydata_to_arrays(data, data_form)
+	assert x_values.tolist() == expected_x
+	assert y_values.tolist() == expected_y
+
+
+def test_xydata_to_arrays_factors():
+	header = {"XFACTOR": "0.5", "YFACTOR": "10", "FIRSTX": "50", "LASTX": "51.5", "NPOINTS": "4"}
+	x_values, y_values = xydata_to_arrays("100 1 2\n104 3 4\n", "(X++(Y..Y))", header)
+	assert x_values.tolist() == [50, 50.5, 51, 51.5]
+	assert y_values.tolist() == [10, 20, 30, 40]
+
+	with pytest.raises(ValueError, match="Expected an even number of values, got 3"):
+		xydata_to_arrays("52, 10, 53\n")
+
+
+def test_jcamp_reader_asdf(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "asdf.jdx").write_lines([
+			"##TITLE=ASDF test",
+			"##DATA TYPE=MASS SPECTRUM",
+			"##XFACTOR=1",
+			"##YFACTOR=1",
+			"$$ Compressed data",
+			"##PAGE=T=1.0",
+			"##NPOINTS=4",
+			"##XYDATA=(X++(Y..Y))",
+			"50A0J0J0",
+			"53C0J0",
+			"##PAGE=T=2.0",
+			"##NPOINTS=3",
+			"##XYDATA=(X++(Y..Y))",
+			"50E0 $$ SQZ form",
+			"51E0T",
+			"##PAGE=T=3.0",
+			"##NPOINTS=2",
+			"##XYDATA=(XY..XY)",
+			"60, 100.0",
+			"61, 200.0",
+			"##END=",
+			])
+
+	data = JCAMP_reader(tmp_pathplus / "asdf.jdx")
+	assert data.time_list == [1.0, 2.0, 3.0]
+	assert data.scan_list[0].mass_list == [50, 51, 52, 53]
+	assert data.scan_list[0].intensity_list == [10, 20, 30, 40]
+	assert data.scan_list[1].mass_list == [50, 51, 52]
+	assert data.scan_list[1].intensity_list == [50, 50, 50]
+	assert data.scan_list[2].mass_list == [60, 61]
+	assert data.scan_list[2].intensity_list == [100, 200]
+
+	with pytest.warns(UserWarning, match="Unknown sort order for mass list"):
+		ms = MassSpectrum.from_jcamp(tmp_pathplus / "asdf.jdx")
+	assert ms.mass_list == [50, 51, 52, 53, 50, 51, 52, 60, 61]
@@ -0,0 +1,163 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+# stdlib
+import copy
+
+# 3rd party
+import numpy
+import pytest
+
+# this package
+from pyms.IntensityMatrix import IntensityMatrix
+from pyms.Noise.SavitzkyGolay import savitzky_golay_im
+from pyms.Preprocessing import (
+		CropMassStage,
+		FilterStage,
+		NullMassStage,
+		PreprocessingPipeline,
+		SavitzkyGolayStage,
+		Stage,
+		TopHatStage
+		)
+from pyms.TopHat import tophat_im
+from pyms.Utils import Utils
+
+# this package
+from .constants import *
+
+
+def _stepwise(im: IntensityMatrix) -> IntensityMatrix:
+	im = copy.deepcopy(im)
+	im.null_mass(73)
+	im.null_mass(147)
+	im.crop_mass(60, 400)
+	im = savitzky_golay_im(im, 5)
+	im = savitzky_golay_im(im, 5)
+	return tophat_im(im, "1.5m")
+
+
+@pytest.fixture()
+def pipeline() -> PreprocessingPipeline:
+	return PreprocessingPipeline([
+			NullMassStage([73, 147]),
+			CropMassStage(60, 400),
+			SavitzkyGolayStage(5, passes=2),
+			TopHatStage("1.5m"),
+			])
+
+
+def test_process(im: IntensityMatrix, pipeline: PreprocessingPipeline, monkeypatch):
+	expected = _stepwise(im)
+
+	im_processed = pipeline.process(im)
+	assert isinstance(im_processed, IntensityMatrix)
+	assert im_processed is not im
+	assert im_processed.mass_list == expected.mass_list
+	assert im_processed.min_mass == expected.min_mass
+	assert im_processed.max_mass == expected.max_mass
+	assert im_processed.time_list == expected.time_list
+	assert numpy.allclose(im_processed.intensity_array, expected.intensity_array)
+
+	# The input is unchanged
+	assert im.size[1] > im_processed.size[1]
+
+	# Process in several blocks of columns
+	monkeypatch.setattr(Utils, "_BLOCK_SIZE", 8 * len(im) * 7)
+
+	im_copy = copy.deepcopy(im)
+	assert pipeline.process(im_copy, inplace=True) is im_copy
+	assert im_copy.mass_list == expected.mass_list
+	assert numpy.array_equal(im_copy.intensity_array, im_processed.intensity_array)
+
+
+def test_process_order(im: IntensityMatrix):
+	# Mass stages can be given after filter stages
+	im_processed = PreprocessingPipeline([TopHatStage("1.5m"), CropMassStage(60, 400)]).process(im)
+
+	expected = copy.deepcopy(im)
+	expected.crop_mass(60, 400)
+	expected = tophat_im(expected, "1.5m")
+
+	assert im_processed.mass_list == expected.mass_list
+	assert numpy.array_equal(im_processed.intensity_array, expected.intensity_array)
+
+
+def test_process_batch(im: IntensityMatrix, pipeline: PreprocessingPipeline):
+	im_processed = pipeline.process(im)
+	single_timings = pipeline.timings
+
+	batch = pipeline.process_batch([im, im])
+	assert len(batch) == 2
+	for im_batch in batch:
+		assert numpy.array_equal(im_batch.intensity_array, im_processed.intensity_array)
+
+	assert len(pipeline.timings) == 4
+	assert all(seconds >= 0 for seconds in pipeline.timings)
+	assert pipeline.timings is not single_timings
+
+	report = pipeline.timing_report().splitlines()
+	assert len(report) == 5
+	assert report[0].startswith("NullMassStage([73, 147])")
+	assert report[-1].startswith("Total")
+
+
+def test_stages_errors(im: IntensityMatrix):
+	for obj in [test_string, *test_numbers, test_dict]:
+		with pytest.raises(TypeError):
+			PreprocessingPipeline(obj)  # type: ignore[arg-type]
+
+	with pytest.raises(TypeError):
+		PreprocessingPipeline([Stage(), test_string])  # type: ignore[list-item]
+
+	class IncompleteStage(FilterStage):
+
+		def prepare(self, ic):  # noqa: MAN001,MAN002
+			return None
+
+	# Stages which do not implement every method cannot be created
+	with pytest.raises(TypeError, match="abstract method"):
+		IncompleteStage()  # type: ignore[abstract]
+
+	with pytest.raises(TypeError, match="'masses' must be a sequence of numbers"):
+		NullMassStage([test_string])  # type: ignore[list-item]
+	with pytest.raises(TypeError):
+		CropMassStage(test_string, 400)  # type: ignore[arg-type]
+	with pytest.raises(ValueError, match="'mass_min' must be less than 'mass_max'"):
+		CropMassStage(400, 60)
+	with pytest.raises(TypeError):
+		SavitzkyGolayStage(test_float)  # type: ignore[arg-type]
+	with pytest.raises(TypeError):
+		SavitzkyGolayStage(degree=test_float)  # type: ignore[arg-type]
+	with pytest.raises(ValueError, match="'passes' must be a positive integer"):
+		SavitzkyGolayStage(passes=0)
+	with pytest.raises(TypeError):
+		TopHatStage(test_float)  # type: ignore[arg-type]
+
+	with pytest.raises(IndexError):
+		PreprocessingPipeline([NullMassStage([1000])]).process(im)
+	with pytest.raises(ValueError):
+		PreprocessingPipeline([CropMassStage(1, 400)]).process(im)
+
+	for obj in [test_string, *test_numbers, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			PreprocessingPipeline([]).process(obj)  # type: ignore[type-var]
+		with pytest.raises(TypeError):
+			PreprocessingPipeline([]).process(im, inplace=obj)  # type: ignore[arg-type]
@@ -19,15 +19,18 @@
 #############################################################################
 
 # stdlib
-from typing import Any, Type
+import copy
+from typing import Any, Type, Union
 
 # 3rd party
+import numpy
 import pytest
 
 # this package
 from pyms.IntensityMatrix import IntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
 from pyms.TopHat import tophat, tophat_im
+from pyms.Utils import Utils
 
 # this package
 from .constants import *
@@ -61,6 +64,31 @@ def test_tophat_im(im: IntensityMatrix):
 	assert isinstance(ic_base_corr, IonChromatogram)
 
 
+@pytest.mark.parametrize("struct", ["1.5m", None, 7])
+def test_tophat_im_columns(im: IntensityMatrix, struct: Union[int, str, None]):
+	im_base_corr = tophat_im(im, struct)
+	assert im_base_corr is not im
+
+	for ii in (0, 73, len(im.mass_list) - 1):
+		ic_base_corr = tophat(im.get_ic_at_index(ii), struct)
+		assert numpy.array_equal(im_base_corr.get_ic_at_index(ii).intensity_array, ic_base_corr.intensity_array)
+
+
+def test_tophat_im_inplace(im: IntensityMatrix, monkeypatch):
+	expected = tophat_im(im, "1.5m")
+
+	# Correct in several blocks of columns
+	monkeypatch.setattr(Utils, "_BLOCK_SIZE", 8 * len(im) * 7)
+
+	im_copy = copy.deepcopy(im)
+	assert tophat_im(im_copy, "1.5m", inplace=True) is im_copy
+	assert numpy.array_equal(im_copy.intensity_array, expected.intensity_array)
+
+	for obj in [test_string, *test_numbers, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			tophat_im(im, "1.5m", inplace=obj)  # type: ignore[arg-type]
+
+
 class TestErrors:
 
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, *test_sequences])
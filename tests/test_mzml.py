@@ -8,7 +8,7 @@ from coincidence.regressions import AdvancedDataRegressionFixture
 
 # this package
 from pyms.GCMS.Class import GCMS_data
-from pyms.GCMS.IO.MZML import mzML_reader
+from pyms.GCMS.IO.MZML import iter_mzML_scans, mzML_reader
 from pyms.IonChromatogram import IonChromatogram
 from pyms.Spectrum import Scan
 
@@ -129,3 +129,40 @@ def test_scans(mzml_data: GCMS_data):
 	# maximum mass found in 1st scan
 	assert isinstance(scans[0].max_mass, float)
 	assert numpy.isclose(scans[0].min_mass, 70.065781)
+
+
+def test_filters(pyms_datadir: Path, mzml_data: GCMS_data):
+	mzml_file = pyms_datadir / "example.mzML"
+
+	rt_range_data = mzML_reader(mzml_file, rt_range=(1.0, 3.0))
+	assert len(rt_range_data) == 7
+	assert rt_range_data.time_list == mzml_data.time_list[4:]
+	assert rt_range_data.scan_list == mzml_data.scan_list[4:]
+
+	stride_data = mzML_reader(mzml_file, scan_stride=2)
+	assert len(stride_data) == 6
+	assert stride_data.time_list == mzml_data.time_list[::2]
+	assert stride_data.scan_list == mzml_data.scan_list[::2]
+
+	assert mzML_reader(mzml_file, ms_level=1) == mzml_data
+
+	with pytest.raises(ValueError, match="No spectra in the file matched the given filters"):
+		mzML_reader(mzml_file, ms_level=2)
+
+	with pytest.raises(TypeError, match="'rt_range' must be a"):
+		mzML_reader(mzml_file, rt_range=(1.0, ))  # type: ignore[arg-type]
+
+	with pytest.raises(ValueError, match="The minimum of 'rt_range' must not be greater than the maximum"):
+		mzML_reader(mzml_file, rt_range=(3.0, 1.0))
+
+	with pytest.raises(ValueError, match="'scan_stride' must be greater than zero"):
+		mzML_reader(mzml_file, scan_stride=0)
+
+
+def test_iter_mzML_scans(pyms_datadir: Path, mzml_data: GCMS_data):
+	scans = iter_mzML_scans(pyms_datadir / "example.mzML")
+	time, scan = next(scans)
+	assert time == mzml_data.time_list[0]
+	assert scan == mzml_data.scan_list[0]
+
+	assert [time for time, scan in scans] == mzml_data.time_list[1:]
@@ -18,12 +18,19 @@
 #                                                                           #
 #############################################################################
 
+# stdlib
+import random
+
 # 3rd party
+import numpy
 import pytest
 
 # this package
+from pyms.IntensityMatrix import IntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
-from pyms.Noise.Analysis import window_analyzer
+from pyms.Noise.Analysis import window_analyzer, window_analyzer_im
+from pyms.Utils import Utils
+from pyms.Utils.Math import MAD
 from tests.constants import *
 
 
@@ -49,3 +56,38 @@ def test_window_anlyzer(tic: IonChromatogram):
 	for obj in [test_string, test_float, *test_lists, test_dict]:
 		with pytest.raises(TypeError):
 			window_analyzer(tic, n_windows=obj)  # type: ignore[arg-type]
+
+
+def test_window_analyzer_windows(tic: IonChromatogram):
+	# The minimum MAD of the windows, placed as by the original one-at-a-time implementation
+	generator = random.Random(test_int)
+	ia = tic.intensity_array
+	positions = {generator.randrange(0, ia.size - 100 + 1) for _ in range(50)}
+	expected = min([abs(ia.max() - ia.min()), *(MAD(ia[pos:pos + 100]) for pos in positions)])
+
+	assert window_analyzer(tic, window=100, n_windows=50, rand_seed=test_int) == expected
+	assert window_analyzer(tic, n_windows=0) == abs(ia.max() - ia.min())
+
+
+def test_window_analyzer_im(im: IntensityMatrix, monkeypatch):
+	noise_levels = window_analyzer_im(im, window=64, n_windows=128, rand_seed=test_int)
+	assert isinstance(noise_levels, numpy.ndarray)
+	assert noise_levels.shape == (len(im.mass_list), )
+
+	for ii in (0, 73, len(im.mass_list) - 1):
+		ic = im.get_ic_at_index(ii)
+		assert noise_levels[ii] == window_analyzer(ic, window=64, n_windows=128, rand_seed=test_int)
+
+	# Analyse in several blocks of columns
+	monkeypatch.setattr(Utils, "_BLOCK_SIZE", 8 * 128 * 64 * 7)
+	assert numpy.array_equal(window_analyzer_im(im, window=64, n_windows=128, rand_seed=test_int), noise_levels)
+
+	for obj in [test_string, *test_numbers, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			window_analyzer_im(obj)  # type: ignore[arg-type]
+	for obj in [test_float, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			window_analyzer_im(im, window=obj)  # type: ignore[arg-type]
+	for obj in [test_string, test_float, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			window_analyzer_im(im, n_windows=obj)  # type: ignore[arg-type]
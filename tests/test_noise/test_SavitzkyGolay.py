@@ -18,6 +18,10 @@
 #                                                                           #
 #############################################################################
 
+# stdlib
+import copy
+from typing import Union
+
 # 3rd party
 import numpy
 import pytest
@@ -26,6 +30,7 @@ import pytest
 from pyms.IntensityMatrix import IntensityMatrix
 from pyms.IonChromatogram import IonChromatogram
 from pyms.Noise.SavitzkyGolay import savitzky_golay, savitzky_golay_im
+from pyms.Utils import Utils
 from tests.constants import *
 
 
@@ -98,3 +103,28 @@ def test_savitzky_golay_intensity_matrix(im: IntensityMatrix):
 	for obj in [test_float, *test_lists, test_dict]:
 		with pytest.raises(TypeError):
 			savitzky_golay_im(im, window=obj)  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize("window, degree", [(7, 2), (5, 3), ("5s", 2)])
+def test_savitzky_golay_im_columns(im: IntensityMatrix, window: Union[int, str], degree: int):
+	im_smooth = savitzky_golay_im(im, window, degree)
+	assert im_smooth is not im
+
+	for ii in (0, 73, len(im.mass_list) - 1):
+		ic_smooth = savitzky_golay(im.get_ic_at_index(ii), window, degree)
+		assert numpy.allclose(im_smooth.get_ic_at_index(ii).intensity_array, ic_smooth.intensity_array)
+
+
+def test_savitzky_golay_im_inplace(im: IntensityMatrix, monkeypatch):
+	expected = savitzky_golay_im(im)
+
+	# Smooth in several blocks of columns
+	monkeypatch.setattr(Utils, "_BLOCK_SIZE", 8 * len(im) * 7)
+
+	im_copy = copy.deepcopy(im)
+	assert savitzky_golay_im(im_copy, inplace=True) is im_copy
+	assert numpy.array_equal(im_copy.intensity_array, expected.intensity_array)
+
+	for obj in [test_string, *test_numbers, *test_lists, test_dict]:
+		with pytest.raises(TypeError):
+			savitzky_golay_im(im, inplace=obj)  # type: ignore[arg-type]
@@ -18,11 +18,17 @@
 #                                                                           #
 #############################################################################
 
+# stdlib
+from statistics import median
+from typing import Union
+
 # 3rd party
+import numpy
 import pytest
 
 # this package
 from pyms.GCMS.Class import GCMS_data
+from pyms.GCMS.Function import ic_window_points
 from pyms.IntensityMatrix import IntensityMatrix, build_intensity_matrix_i
 from pyms.IonChromatogram import IonChromatogram
 from pyms.Noise.SavitzkyGolay import savitzky_golay
@@ -86,6 +92,58 @@ def test_window_smooth_im(im: IntensityMatrix):
 			window_smooth_im(im, use_median=obj)  # type: ignore[arg-type]
 
 
+def _window_loop(ia: numpy.ndarray, wing_length: int, use_median: bool) -> numpy.ndarray:
+	# The per-point loop previously used by window_smooth, without truncating to integers
+	ia_denoise = numpy.zeros(ia.size)
+
+	for index in range(ia.size):
+		window = ia[max(index - wing_length, 0):index + wing_length + 1]
+		ia_denoise[index] = median(window) if use_median else window.mean()
+
+	return ia_denoise
+
+
+@pytest.mark.parametrize("window", [3, 5, 101, "7s"])
+@pytest.mark.parametrize("use_median", [False, True])
+def test_window_smooth_values(tic: IonChromatogram, window: Union[int, str], use_median: bool):
+	wing_length = ic_window_points(tic, window, half_window=True)
+	expected = _window_loop(tic.intensity_array, wing_length, use_median)
+
+	ia_denoise = window_smooth(tic, window=window, use_median=use_median).intensity_array
+	assert ia_denoise.dtype == numpy.float64
+	assert numpy.allclose(ia_denoise, expected, rtol=1e-12)
+
+	# Shorter than the window
+	short_ic = IonChromatogram(tic.intensity_array[:4], tic.time_list[:4])
+	expected = _window_loop(short_ic.intensity_array, wing_length, use_median)
+	assert numpy.allclose(window_smooth(short_ic, window=window, use_median=use_median).intensity_array, expected)
+
+
+def test_window_smooth_zeros():
+	# Regions of zeros after large, non-integer peaks are still exactly zero
+	ia = numpy.zeros(200)
+	ia[10:20] = numpy.linspace(1e7 / 3, 1e9 / 7, 10)
+	ia[50:53] = [0.1, 123456.789, 0.3]
+	ic = IonChromatogram(ia, list(numpy.arange(200.0)))
+
+	ia_denoise = window_smooth(ic, window=5).intensity_array
+	assert (ia_denoise[25:45] == 0).all()
+	assert (ia_denoise[60:] == 0).all()
+	assert (ia_denoise >= 0).all()
+	assert numpy.allclose(ia_denoise, _window_loop(ia, 2, False), rtol=1e-15)
+
+
+@pytest.mark.parametrize("use_median", [False, True])
+def test_window_smooth_im_columns(im: IntensityMatrix, use_median: bool):
+	im_smooth = window_smooth_im(im, window=7, use_median=use_median)
+	assert im_smooth is not im
+	assert im_smooth.intensity_array.dtype == numpy.float64
+
+	for ii in (0, 73, len(im.mass_list) - 1):
+		ic_smooth = window_smooth(im.get_ic_at_index(ii), window=7, use_median=use_median)
+		assert numpy.allclose(im_smooth.get_ic_at_index(ii).intensity_array, ic_smooth.intensity_array)
+
+
 def test_smooth_im(data: GCMS_data):
 	# Build intensity matrix with defaults, float masses with interval
 	# (bin size) of one from min mass
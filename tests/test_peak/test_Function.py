@@ -19,17 +19,20 @@
 #############################################################################
 
 # stdlib
-from typing import Any
+from typing import Any, List
 
 # 3rd party
 import deprecation  # type: ignore[import-untyped]
+import numpy
 import pytest
 
 # this package
 from pyms.IntensityMatrix import IntensityMatrix
 from pyms.Peak import Peak
 from pyms.Peak.Function import (
+		PeakAreas,
 		half_area,
+		integrate_peaks,
 		ion_area,
 		median_bounds,
 		peak_pt_bounds,
@@ -38,9 +41,75 @@ from pyms.Peak.Function import (
 		top_ions_v1,
 		top_ions_v2
 		)
+from pyms.Spectrum import MassSpectrum
 from tests.constants import *
 
 
+class Test_integrate_peaks:
+
+	def test_main(self, filtered_peak_list: List[Peak], im_i: IntensityMatrix):
+		result = integrate_peaks(im_i, filtered_peak_list, max_bound=5)
+		assert isinstance(result, PeakAreas)
+
+		shape = (len(filtered_peak_list), len(im_i.mass_list))
+		assert result.apex.shape == (len(filtered_peak_list), )
+		for array in (result.mask, result.area, result.left, result.right, result.left_shared, result.right_shared):
+			assert array.shape == shape
+
+		assert not result.area[~result.mask].any()
+		mat = im_i.intensity_array
+
+		for peak_idx, peak in enumerate(filtered_peak_list):
+			apex = im_i.get_index_at_time(peak.rt)
+			assert result.apex[peak_idx] == apex
+
+			ms = peak.mass_spectrum
+			masses = [mass for mass, intensity in zip(ms.mass_list, ms.intensity_list) if intensity > 0]
+			assert [im_i.mass_list[idx] for idx in numpy.flatnonzero(result.mask[peak_idx])] == masses
+
+			for mass_idx in numpy.flatnonzero(result.mask[peak_idx]):
+				area, left, right, l_share, r_share = ion_area(mat[:, mass_idx].tolist(), apex, 5)
+				assert result.area[peak_idx, mass_idx] == area
+				assert result.left[peak_idx, mass_idx] == left
+				assert result.right[peak_idx, mass_idx] == right
+				assert result.left_shared[peak_idx, mass_idx] == l_share
+				assert result.right_shared[peak_idx, mass_idx] == r_share
+
+	def test_single_peak(self, peak: Peak, im_i: IntensityMatrix):
+		area_sum, area_dict = peak_sum_area(im_i, peak, single_ion=True, max_bound=5)
+		result = integrate_peaks(im_i, [peak], max_bound=5)
+
+		assert result.area[0, im_i.get_index_of_mass(51)] == area_dict[51]
+		assert result.area.sum() == area_sum
+
+	def test_empty(self, im_i: IntensityMatrix):
+		result = integrate_peaks(im_i, [])
+		assert result.area.shape == (0, len(im_i.mass_list))
+		assert result.apex.shape == (0, )
+
+	@pytest.mark.parametrize("obj", [*test_numbers, test_string, test_dict, *test_sequences])
+	def test_im_errors(self, filtered_peak_list: List[Peak], obj: Any):
+		with pytest.raises(TypeError, match="'im' must be an IntensityMatrix object"):
+			integrate_peaks(obj, filtered_peak_list)
+
+	@pytest.mark.parametrize("obj", [*test_numbers, test_string, test_dict, test_list_ints, test_list_strs])
+	def test_peak_list_errors(self, im_i: IntensityMatrix, obj: Any):
+		with pytest.raises(TypeError, match="'peak_list' must be a list of Peak objects"):
+			integrate_peaks(im_i, obj)
+
+	@pytest.mark.parametrize("obj", [test_float, test_string, test_dict, *test_sequences])
+	def test_max_bound_errors(self, im_i: IntensityMatrix, filtered_peak_list: List[Peak], obj: Any):
+		with pytest.raises(TypeError, match="'max_bound' must be an integer"):
+			integrate_peaks(im_i, filtered_peak_list, max_bound=obj)
+
+	def test_mass_spectrum_errors(self, im_i: IntensityMatrix):
+		ms = im_i.get_ms_at_index(0)
+		ms.mass_list = [mass + 0.5 for mass in ms.mass_list]
+
+		with pytest.raises(ValueError, match="The mass spectrum of each peak must only contain masses from the"):
+			integrate_peaks(im_i, [Peak(12.34, ms)])
+
+
 class Test_peak_sum_area:
 
 	def test_main(self, peak: Peak, im_i: IntensityMatrix):
@@ -102,6 +171,13 @@ class Test_peak_top_ion_areas:
 		assert areas[100] == 4534.0
 		assert isinstance(areas[100], float)
 
+	def test_mass_range(self, peak: Peak, im_i: IntensityMatrix):
+		# Top ions which are not in the intensity matrix
+		for mass in (im_i.min_mass - 1, im_i.max_mass + 1):
+			ms = MassSpectrum([im_i.min_mass, mass], [1.0, 2.0])
+			with pytest.raises(IndexError, match="mass is out of range"):
+				peak_top_ion_areas(im_i, Peak(peak.rt, ms), 2)
+
 	@pytest.mark.parametrize("obj", [test_string, *test_numbers, test_dict, *test_lists])
 	def test_im_errors(self, peak: Peak, obj: Any):
 		with pytest.raises(TypeError):
@@ -0,0 +1,70 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares top-hat baseline correction of every ion chromatogram of an intensity matrix
+# with tophat, one at a time, and the whole-matrix tophat_im.
+# Usage: python tophat_time.py [struct]
+
+# stdlib
+import copy
+import os
+import sys
+from timeit import timeit
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import IntensityMatrix, build_intensity_matrix
+from pyms.TopHat import tophat, tophat_im
+
+struct = sys.argv[1] if len(sys.argv) > 1 else "1.5m"
+
+im = build_intensity_matrix(JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX")), 0.5, 0.25, 0.25)
+
+
+def tophat_loop() -> IntensityMatrix:
+	# The per-ion chromatogram loop previously used by tophat_im
+	im_bc = copy.deepcopy(im)
+
+	for ii in range(im.size[1]):
+		ic = im_bc.get_ic_at_index(ii)
+		im_bc.set_ic_at_index(ii, tophat(ic, struct))
+
+	return im_bc
+
+
+def tophat_matrix() -> IntensityMatrix:
+	return tophat_im(im, struct)
+
+
+def tophat_matrix_inplace() -> None:
+	tophat_im(im_copy, struct, inplace=True)
+
+
+assert numpy.array_equal(tophat_loop().intensity_array, tophat_matrix().intensity_array)
+im_copy = copy.deepcopy(im)
+
+print(f"tophat_im, {im.size[0]} x {im.size[1]}, struct={struct}")
+print(f"  loop:            {timeit(tophat_loop, number=3) / 3:.4f} s")
+print(f"  matrix:          {timeit(tophat_matrix, number=3) / 3:.4f} s")
+print(f"  matrix, inplace: {timeit(tophat_matrix_inplace, number=3) / 3:.4f} s")
@@ -0,0 +1,94 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares the one-window-at-a-time noise estimator previously used by window_analyzer
+# with the vectorised window_analyzer and window_analyzer_im.
+# Usage: python window_analyzer_time.py [window] [n_windows]
+
+# stdlib
+import math
+import os
+import random
+import sys
+from timeit import timeit
+from typing import List
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import build_intensity_matrix
+from pyms.IonChromatogram import IonChromatogram
+from pyms.Noise.Analysis import window_analyzer, window_analyzer_im
+from pyms.Utils.Math import MAD
+from pyms.Utils.Time import window_sele_points
+
+window = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+n_windows = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+
+data = JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX"))
+im = build_intensity_matrix(data)
+tic = data.tic
+
+
+def window_analyzer_loop(ic: IonChromatogram) -> float:
+	# The one-window-at-a-time loop previously used by window_analyzer
+	ia = ic.intensity_array
+	generator = random.Random(1)
+	window_pts = window_sele_points(ic, window)
+
+	maxi = ia.size - window_pts
+	noise_level = math.fabs(ia.max() - ia.min())
+	seen_positions: List[int] = []
+
+	for _ in range(n_windows):
+		try_pos = generator.randrange(0, maxi + 1)
+		if try_pos not in seen_positions:
+			noise_level = min(noise_level, MAD(ia[try_pos:try_pos + window_pts]))
+		seen_positions.append(try_pos)
+
+	return noise_level
+
+
+def loop_im() -> List[float]:
+	return [window_analyzer_loop(im.get_ic_at_index(ii)) for ii in range(im.size[1])]
+
+
+def vectorised_im() -> List[float]:
+	return [window_analyzer(im.get_ic_at_index(ii), window, n_windows, 1) for ii in range(im.size[1])]
+
+
+def matrix_im() -> numpy.ndarray:
+	return window_analyzer_im(im, window, n_windows, 1)
+
+
+assert window_analyzer_loop(tic) == window_analyzer(tic, window, n_windows, 1)
+assert numpy.array_equal(vectorised_im(), matrix_im())
+
+print(f"window_analyzer, TIC of {len(tic)} scans, window={window}, n_windows={n_windows}")
+print(f"  loop:       {timeit(lambda: window_analyzer_loop(tic), number=3) / 3:.4f} s")
+print(f"  vectorised: {timeit(lambda: window_analyzer(tic, window, n_windows, 1), number=3) / 3:.4f} s")
+
+print(f"Every ion of a {im.size[0]} x {im.size[1]} intensity matrix")
+print(f"  loop:               {timeit(loop_im, number=1):.4f} s")
+print(f"  window_analyzer:    {timeit(vectorised_im, number=1):.4f} s")
+print(f"  window_analyzer_im: {timeit(matrix_im, number=1):.4f} s")
@@ -0,0 +1,77 @@
+#############################################################################
+#                                                                           #
+#    PyMassSpec software for processing of mass-spectrometry data           #
+#    Copyright (C) 2019-2020 Dominic Davis-Foster                           #
+#                                                                           #
+#    This program is free software; you can redistribute it and/or modify   #
+#    it under the terms of the GNU General Public License version 2 as      #
+#    published by the Free Software Foundation.                             #
+#                                                                           #
+#    This program is distributed in the hope that it will be useful,        #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of         #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the          #
+#    GNU General Public License for more details.                           #
+#                                                                           #
+#    You should have received a copy of the GNU General Public License      #
+#    along with this program; if not, write to the Free Software            #
+#    Foundation, Inc., 675 Mass Ave, Cambridge, MA 02139, USA.              #
+#                                                                           #
+#############################################################################
+
+
+# Compares the per-point window smoothing loop previously used by window_smooth_im
+# with the box-filter mean and the median filter over the whole intensity matrix.
+# Usage: python window_smooth_time.py [window ...]
+
+# stdlib
+import copy
+import os
+import sys
+from statistics import median
+from timeit import timeit
+
+# 3rd party
+import numpy
+
+# this package
+from pyms.GCMS.Function import ic_window_points
+from pyms.GCMS.IO.JCAMP import JCAMP_reader
+from pyms.IntensityMatrix import IntensityMatrix, build_intensity_matrix
+from pyms.Noise.Window import window_smooth_im
+
+windows = [int(arg) for arg in sys.argv[1:]] or [5, 21, 51, 101]
+
+im = build_intensity_matrix(JCAMP_reader(os.path.join("data", "ELEY_1_SUBTRACT.JDX")), 0.5, 0.25, 0.25)
+
+
+def window_loop(window: int, use_median: bool) -> IntensityMatrix:
+	# The per-ion chromatogram, per-point loop previously used by window_smooth_im,
+	# without truncating the smoothed intensities to integers
+	im_smooth = copy.deepcopy(im)
+	wing_length = ic_window_points(im.get_ic_at_index(0), window, half_window=True)
+
+	for ii in range(im.size[1]):
+		ic = im_smooth.get_ic_at_index(ii)
+		ia = ic.intensity_array
+		ia_denoise = numpy.zeros(ia.size)
+
+		for index in range(ia.size):
+			window_ia = ia[max(index - wing_length, 0):index + wing_length + 1]
+			ia_denoise[index] = median(window_ia) if use_median else window_ia.mean()
+
+		ic.intensity_array = ia_denoise
+		im_smooth.set_ic_at_index(ii, ic)
+
+	return im_smooth
+
+
+print(f"window_smooth_im, {im.size[0]} x {im.size[1]}")
+
+for window in windows:
+	for use_median in (False, True):
+		expected = window_loop(window, use_median).intensity_array
+		assert numpy.allclose(window_smooth_im(im, window, use_median).intensity_array, expected)
+
+		print(f"  window={window}, {'median' if use_median else 'mean'}")
+		print(f"    loop:   {timeit(lambda: window_loop(window, use_median), number=1):.4f} s")
+		print(f"    matrix: {timeit(lambda: window_smooth_im(im, window, use_median), number=3) / 3:.4f} s")